@@ -0,0 +1,136 @@
+import asyncio
+import logging
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Summarizes a thread_data dict carrying 'aggregate_of' into a summary result
+Combine = Callable[[Dict[str, any]], Awaitable[Dict[str, any]]]
+
+class AuthorDigest:
+    """
+    Hierarchical summary of many threads by one author.
+
+    Every thread is summarized at once, so the wait is close to the slowest
+    thread rather than the sum. Per-thread summaries are grouped in the order
+    they finish and each full group of `fan_in` is combined while the other
+    threads are still running; group digests are then combined level by
+    level until one remains. Results are yielded as soon as they exist.
+    """
+    def __init__(self, combine: Combine, fan_in: int = 8):
+        self.combine = combine
+        self.fan_in = max(2, fan_in)
+
+    async def _combine_group(self, author: str, summaries: List[Dict[str, any]]) -> Dict[str, any]:
+        """
+        Summarize a group of summaries into one, keeping tweet and thread totals
+        """
+        if len(summaries) == 1:
+            return {**summaries[0], 'thread_count': summaries[0].get('thread_count', 1)}
+
+        result = await self.combine({
+            'author': author,
+            'tweets': [],
+            'full_text': ' '.join(point for summary in summaries for point in summary['bullet_points']),
+            'aggregate_of': [summary['bullet_points'] for summary in summaries]
+        })
+        if not result['success']:
+            raise ValueError(f"Failed to combine summaries: {result.get('error', 'Unknown error')}")
+
+        return {
+            'bullet_points': result['summary']['bullet_points'],
+            'author': author,
+            'tweet_count': sum(summary['tweet_count'] for summary in summaries),
+            'thread_count': sum(summary.get('thread_count', 1) for summary in summaries)
+        }
+
+    async def run(self, jobs: List[Tuple[str, Awaitable[Dict[str, any]]]],
+                  author: Optional[str] = None) -> AsyncIterator[Dict[str, any]]:
+        """
+        Summarize (url, awaitable summary) jobs, yielding each thread's result
+        as it finishes, then a digest per combined group and the final digest.
+
+        Threads by anyone other than `author` (by default, the author of the
+        first thread to finish) are reported but left out of the digest.
+        """
+        author = author.lstrip('@') if author else None
+
+        async def summarize(index: int, job: Awaitable[Dict[str, any]]):
+            try:
+                return index, await job, None
+            except Exception as e:
+                return index, None, str(e)
+
+        threads = [asyncio.create_task(summarize(index, job)) for index, (_, job) in enumerate(jobs)]
+        groups: List[asyncio.Task] = []
+        group_members: List[List[int]] = []
+        pending: List[Tuple[int, Dict[str, any]]] = []
+
+        def start_group():
+            members = [index for index, _ in pending]
+            groups.append(asyncio.create_task(self._combine_group(author, [summary for _, summary in pending])))
+            group_members.append(members)
+            pending.clear()
+
+        try:
+            for next_done in asyncio.as_completed(threads):
+                index, summary, error = await next_done
+                url = jobs[index][0]
+
+                if summary is not None:
+                    author = author or summary['author']
+                    if summary['author'].lower() != author.lower():
+                        summary, error = None, f"Thread is by @{summary['author']}, not @{author}"
+
+                if summary is None:
+                    yield {'type': 'thread', 'index': index, 'url': url, 'success': False, 'error': error}
+                    continue
+
+                yield {'type': 'thread', 'index': index, 'url': url, 'success': True, 'summary': summary}
+
+                # Combine a full group now, overlapping with the threads still running
+                pending.append((index, summary))
+                if len(pending) == self.fan_in:
+                    start_group()
+
+            if pending:
+                start_group()
+
+            if not groups:
+                yield {'type': 'digest', 'final': True, 'success': False,
+                       'error': 'No thread could be summarized'}
+                return
+
+            # Reduce level by level; each level's groups are combined concurrently
+            level = 1
+            while True:
+                try:
+                    digests = await asyncio.gather(*groups)
+                except Exception as e:
+                    yield {'type': 'digest', 'final': True, 'success': False, 'error': str(e)}
+                    return
+
+                if len(digests) == 1:
+                    yield {'type': 'digest', 'final': True, 'success': True, 'level': level,
+                           'summary': digests[0]}
+                    return
+
+                for members, digest in zip(group_members, digests):
+                    yield {'type': 'digest', 'final': False, 'success': True, 'level': level,
+                           'threads': members, 'summary': digest}
+
+                next_groups: List[asyncio.Task] = []
+                next_members: List[List[int]] = []
+                for start in range(0, len(digests), self.fan_in):
+                    next_groups.append(asyncio.create_task(
+                        self._combine_group(author, digests[start:start + self.fan_in])
+                    ))
+                    next_members.append([
+                        index for members in group_members[start:start + self.fan_in] for index in members
+                    ])
+                groups, group_members = next_groups, next_members
+                level += 1
+        finally:
+            # Stop outstanding work if the client goes away mid-stream
+            for task in threads + groups:
+                task.cancel()
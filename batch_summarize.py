@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Offline batch summarization of a list of thread URLs.
+
+URLs are read one per line from a file or stdin (blank lines and lines
+starting with # are skipped) and processed with bounded concurrency. Each
+result is appended to a JSONL file as soon as it is ready and its status ID
+is recorded in a checkpoint file, so a crashed or interrupted run can be
+restarted and only the remaining threads are processed:
+
+    python batch_summarize.py urls.txt --output results.jsonl --concurrency 8
+    cat urls.txt | python batch_summarize.py - --output results.jsonl
+
+Threads go through the same pipeline as the server (pipeline.py), with the
+shared cache, summary store and scrape archive, so threads the server
+already summarized cost nothing.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from typing import Dict, List, Optional, Set
+
+from deadline import set_deadline, DeadlineExceeded
+from pipeline import SummaryPipeline
+from scheduler import create_scheduler_from_env, set_priority, BATCH
+from structured_logging import configure_logging
+
+logger = logging.getLogger(__name__)
+
+def read_urls(source: str) -> List[str]:
+    """
+    Read URLs from a file, or from stdin when source is "-"
+    """
+    handle = sys.stdin if source == '-' else open(source, encoding='utf-8')
+    try:
+        lines = [line.strip() for line in handle]
+    finally:
+        if handle is not sys.stdin:
+            handle.close()
+    return [line for line in lines if line and not line.startswith('#')]
+
+def load_checkpoint(path: str) -> Set[str]:
+    """
+    Status IDs completed by earlier runs
+    """
+    if not os.path.exists(path):
+        return set()
+    with open(path, encoding='utf-8') as checkpoint_file:
+        return {line.strip() for line in checkpoint_file if line.strip()}
+
+def _format_eta(seconds: float) -> str:
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+    return f"{seconds // 60}m{seconds % 60:02d}s"
+
+class BatchSummarizer:
+    """
+    Runs the scrape + summarize pipeline over many threads outside the server
+    """
+    def __init__(self, scraper, summarizer, cache=None, store=None,
+                 concurrency: int = 4, timeout: float = 60, scrape_fraction: float = 0.5,
+                 negative_cache_ttl: float = 300, scrape_scheduler=None, llm_scheduler=None):
+        self.scraper = scraper
+        self.pipeline = SummaryPipeline(
+            scraper, summarizer, cache=cache, store=store,
+            scrape_scheduler=scrape_scheduler, llm_scheduler=llm_scheduler,
+            scrape_fraction=scrape_fraction, negative_cache_ttl=negative_cache_ttl
+        )
+        self.concurrency = max(1, concurrency)
+        self.timeout = timeout
+
+    async def summarize(self, url: str, status_id: Optional[str], canonical_url: Optional[str]) -> Dict[str, any]:
+        """
+        Summarize one thread, returning a result record (never raising)
+        """
+        start = time.perf_counter()
+        result = {'url': url, 'status_id': status_id}
+        set_deadline(self.timeout)
+        set_priority(BATCH)
+
+        try:
+            if not canonical_url:
+                raise ValueError("Invalid Twitter/X URL format")
+
+            summary = self.pipeline.cache_get('summary', status_id)
+            result['cached'] = summary is not None
+
+            if summary is None:
+                self.pipeline.check_failure(status_id)
+                summary, _ = await self.pipeline.compute(url, canonical_url, status_id)
+
+            result['success'] = True
+            result['summary'] = summary
+        except DeadlineExceeded as e:
+            result['success'] = False
+            result['error'] = f"Deadline exceeded during {e.stage} stage"
+        except Exception as e:
+            result['success'] = False
+            result['error'] = str(e)
+
+        result['processing_time'] = round(time.perf_counter() - start, 3)
+        return result
+
+    async def run(self, urls: List[str], output: str, checkpoint: str) -> Dict[str, any]:
+        """
+        Summarize every URL not already in the checkpoint, appending results as they finish
+        """
+        from xthread_scraper import canonicalize_thread_url
+
+        completed = load_checkpoint(checkpoint)
+
+        # One job per thread: URL variants and repeats collapse onto a status ID
+        jobs = []
+        seen = set()
+        skipped = 0
+        for url in urls:
+            canonical_url = canonicalize_thread_url(url)
+            status_id = self.scraper._extract_thread_id(canonical_url) if canonical_url else None
+            if status_id in completed:
+                skipped += 1
+                continue
+            if status_id and status_id in seen:
+                continue
+            seen.add(status_id)
+            jobs.append((url, status_id, canonical_url))
+
+        totals = {'urls': len(urls), 'skipped': skipped, 'processed': 0,
+                  'succeeded': 0, 'failed': 0, 'cached': 0}
+        print(f"{len(jobs)} threads to summarize ({skipped} already completed)", file=sys.stderr)
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def process(job):
+            async with semaphore:
+                return await self.summarize(*job)
+
+        start = time.perf_counter()
+        interactive = sys.stderr.isatty()
+        tasks = [asyncio.create_task(process(job)) for job in jobs]
+
+        try:
+            with open(output, 'a', encoding='utf-8') as out_file, \
+                 open(checkpoint, 'a', encoding='utf-8') as checkpoint_file:
+                for next_done in asyncio.as_completed(tasks):
+                    result = await next_done
+
+                    # Result first, then checkpoint: a crash in between only redoes one thread
+                    out_file.write(json.dumps(result) + '\n')
+                    out_file.flush()
+                    if result['success'] and result['status_id']:
+                        checkpoint_file.write(result['status_id'] + '\n')
+                        checkpoint_file.flush()
+
+                    totals['processed'] += 1
+                    totals['succeeded' if result['success'] else 'failed'] += 1
+                    totals['cached'] += 1 if result.get('cached') else 0
+
+                    done = totals['processed']
+                    if interactive or done % 25 == 0 or done == len(jobs):
+                        elapsed = time.perf_counter() - start
+                        rate = done / elapsed if elapsed else 0.0
+                        eta = _format_eta((len(jobs) - done) / rate) if rate else '?'
+                        line = (f"[{done}/{len(jobs)}] {rate:.2f} threads/s, ETA {eta}, "
+                                f"{totals['failed']} failed, {totals['cached']} cached")
+                        print('\r' + line if interactive else line, end='' if interactive else '\n',
+                              file=sys.stderr, flush=True)
+        finally:
+            for task in tasks:
+                task.cancel()
+            if interactive:
+                print(file=sys.stderr)
+
+        elapsed = time.perf_counter() - start
+        totals['elapsed_seconds'] = round(elapsed, 3)
+        totals['threads_per_second'] = round(totals['processed'] / elapsed, 2) if elapsed else 0.0
+        return totals
+
+def main():
+    from dotenv import load_dotenv
+    load_dotenv()
+    configure_logging(level=logging.WARNING, json_output=False)
+
+    parser = argparse.ArgumentParser(description="Summarize a list of thread URLs with resumable checkpoints")
+    parser.add_argument('input', help="File with one URL per line, or - for stdin")
+    parser.add_argument('--output', default='results.jsonl', help="JSONL file results are appended to")
+    parser.add_argument('--checkpoint', help="File of completed status IDs (default: <output>.checkpoint)")
+    parser.add_argument('--concurrency', type=int, default=int(os.getenv('BULK_CONCURRENCY', 4)),
+                        help="Threads processed in parallel")
+    parser.add_argument('--timeout', type=float, default=float(os.getenv('REQUEST_DEADLINE_SECONDS', 60)),
+                        help="Deadline per thread in seconds")
+    parser.add_argument('--no-cache', action='store_true', help="Do not read or write the shared cache")
+    args = parser.parse_args()
+
+    from xthread_scraper import ThreadScraper
+    from summarizer import MultiProviderSummarizer
+    from cache import create_cache_from_env
+    from summary_store import create_store_from_env
+    from scrape_archive import create_archive_from_env
+
+    urls = read_urls(args.input)
+    store = create_store_from_env()
+    batch = BatchSummarizer(
+        ThreadScraper(archive=create_archive_from_env()),
+        MultiProviderSummarizer(providers=["mistral", "openai"]),
+        cache=None if args.no_cache else create_cache_from_env(),
+        store=store,
+        concurrency=args.concurrency,
+        timeout=args.timeout,
+        scrape_fraction=float(os.getenv('SCRAPE_BUDGET_FRACTION', 0.5)),
+        negative_cache_ttl=float(os.getenv('NEGATIVE_CACHE_TTL', 300)),
+        scrape_scheduler=create_scheduler_from_env('scrape', 'SCRAPE_CONCURRENCY', 8),
+        llm_scheduler=create_scheduler_from_env('llm', 'LLM_CONCURRENCY', 8)
+    )
+
+    try:
+        totals = asyncio.run(batch.run(urls, args.output, args.checkpoint or args.output + '.checkpoint'))
+    except KeyboardInterrupt:
+        print("\nInterrupted; re-run the same command to resume", file=sys.stderr)
+        sys.exit(130)
+    finally:
+        if store:
+            store.close()
+
+    print(json.dumps(totals, indent=2))
+
+if __name__ == '__main__':
+    main()
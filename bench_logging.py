@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Logging load test: cost of logging on the event loop under concurrent requests.
+
+Simulated requests log the same kind of messages as the scrape and summarize
+path while a probe task measures how late the event loop wakes it. Output
+goes to a sink that takes --sink-latency-us per write, standing in for a
+slow terminal or a full stderr pipe. Compared setups:
+
+- direct: a plain StreamHandler writing from the event loop (the old setup)
+- queue/text, queue/json: the queue handler with a background writer thread
+- queue/json sampled: as above, keeping 10% of the INFO records
+
+Usage: python bench_logging.py [--requests N] [--records N] [--sink-latency-us N]
+"""
+
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+
+from structured_logging import TEXT_FORMAT, RequestContextFilter, bind_request_id, configure_logging, shutdown_logging
+
+MARKDOWN_SAMPLE = "Thread text from the scraped page. " * 200
+
+class SlowSink:
+    """
+    A stream whose writes block for a fixed time, like a congested stderr
+    """
+    def __init__(self, latency_us: float):
+        self.latency = latency_us / 1e6
+        self.writes = 0
+
+    def write(self, text: str):
+        self.writes += 1
+        # Blocking I/O releases the GIL, so sleep rather than spin
+        time.sleep(self.latency)
+
+    def flush(self):
+        pass
+
+def configure_direct(sink: SlowSink):
+    handler = logging.StreamHandler(sink)
+    handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+    handler.addFilter(RequestContextFilter())
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(logging.INFO)
+    return handler
+
+async def simulated_request(logger: logging.Logger, index: int, records: int, timings: list):
+    bind_request_id(f"bench-{index}")
+    for step in range(records):
+        start = time.perf_counter()
+        if step % 10 == 9:
+            logger.warning("No tweets found in content. Raw content sample: %.200s", MARKDOWN_SAMPLE)
+        else:
+            logger.info("Scraping thread: %s", f"https://x.com/user/status/{index}{step}")
+        timings.append(time.perf_counter() - start)
+        # Yield as a request awaiting I/O would
+        await asyncio.sleep(0)
+
+async def loop_lag_probe(stop: asyncio.Event, lags: list, interval: float = 0.001):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - start - interval)
+
+async def run_load(requests: int, records: int):
+    logger = logging.getLogger("xthread_scraper")
+    timings, lags = [], []
+    stop = asyncio.Event()
+    probe = asyncio.create_task(loop_lag_probe(stop, lags))
+    start = time.perf_counter()
+    await asyncio.gather(*(simulated_request(logger, index, records, timings) for index in range(requests)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await probe
+    return elapsed, timings, lags
+
+def run_setup(name: str, args) -> dict:
+    sink = SlowSink(args.sink_latency_us)
+    if name == "direct":
+        configure_direct(sink)
+    else:
+        configure_logging(
+            json_output=name != "queue/text",
+            sample_rates={"xthread_scraper": 0.1} if name.endswith("sampled") else None,
+            queue_size=args.requests * args.records + 1,
+            stream=sink
+        )
+
+    elapsed, timings, lags = asyncio.run(run_load(args.requests, args.records))
+    shutdown_logging()
+    timings.sort()
+    return {
+        "elapsed_ms": elapsed * 1000,
+        "call_us": statistics.mean(timings) * 1e6,
+        "p99_us": timings[int(len(timings) * 0.99)] * 1e6,
+        "max_lag_ms": max(lags, default=0) * 1000,
+        "writes": sink.writes
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure event-loop cost of logging under load")
+    parser.add_argument("--requests", type=int, default=200, help="Concurrent simulated requests (default: 200)")
+    parser.add_argument("--records", type=int, default=20, help="Log records per request (default: 20)")
+    parser.add_argument("--sink-latency-us", type=float, default=50,
+                        help="Time each write to the output blocks, in microseconds (default: 50)")
+    args = parser.parse_args()
+
+    print("=" * 76)
+    print(f"Logging load test: {args.requests} requests x {args.records} records, "
+          f"{args.sink_latency_us:g}us per write")
+    print("=" * 76)
+    print(f"{'setup':<22}{'load ms':>10}{'us/call':>10}{'p99 us':>10}{'max lag ms':>12}{'writes':>10}")
+
+    for name in ("direct", "queue/text", "queue/json", "queue/json sampled"):
+        result = run_setup(name, args)
+        print(
+            f"{name:<22}{result['elapsed_ms']:>10.1f}{result['call_us']:>10.2f}{result['p99_us']:>10.2f}"
+            f"{result['max_lag_ms']:>12.2f}{result['writes']:>10}"
+        )
+
+if __name__ == "__main__":
+    main()
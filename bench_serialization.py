@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Serialization benchmark: cost of encoding one POST /api/summarize response.
+
+Compares the old path (a Pydantic model with an untyped summary dict,
+validated then dumped with the stdlib encoder, as FastAPI does for a
+response_model) with the slotted response dataclasses encoded by
+serialization.dumps. Paths whose packages are not installed are skipped.
+
+Usage: python bench_serialization.py [--bullets N] [--number N]
+"""
+
+import argparse
+import json
+import timeit
+
+from serialization import BACKEND, SummaryResult, ThreadSummary, dumps
+
+def sample_result(bullets: int) -> SummaryResult:
+    """
+    A response shaped like a real one, with `bullets` bullet points
+    """
+    return SummaryResult(
+        success=True,
+        summary=ThreadSummary(
+            bullet_points=[
+                f"Point {i + 1}: the author explains how the launch went — what worked, "
+                f"what broke under load and what they would change next time around." for i in range(bullets)
+            ],
+            author="example_author",
+            tweet_count=bullets * 3,
+            original_url="https://x.com/example_author/status/1234567890123456789",
+            processing_time_seconds=4.21
+        ),
+        processing_time=4.2137,
+        usage={"cached": False, "provider": "openai", "model": "gpt-4o-mini",
+               "prompt_tokens": 2150, "completion_tokens": 410, "total_tokens": 2560, "cost_usd": 0.00057}
+    )
+
+def legacy_encoder():
+    """
+    The previous response path, or None without pydantic
+    """
+    try:
+        from pydantic import BaseModel
+    except ImportError:
+        return None
+
+    class SummaryResponse(BaseModel):
+        success: bool
+        summary: dict = None
+        error: str = None
+        processing_time: float = None
+        usage: dict = None
+
+    def encode(payload: dict) -> bytes:
+        model = SummaryResponse(**payload)
+        return json.dumps(model.model_dump(mode="json"), ensure_ascii=False,
+                          separators=(",", ":")).encode("utf-8")
+    return encode
+
+def measure(encode, value, number: int):
+    """
+    Median microseconds per call over five repeats, and the encoded size
+    """
+    timings = timeit.repeat(lambda: encode(value), number=number, repeat=5)
+    timings.sort()
+    return timings[2] / number * 1e6, len(encode(value))
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure per-response JSON serialization cost")
+    parser.add_argument("--bullets", type=int, default=8, help="Bullet points in the sample summary (default: 8)")
+    parser.add_argument("--number", type=int, default=20000, help="Encodings per timing run (default: 20000)")
+    args = parser.parse_args()
+
+    result = sample_result(args.bullets)
+    paths = [
+        ("pydantic + json", legacy_encoder(), result.to_dict()),
+        ("dict + json", lambda value: json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8"),
+         result.to_dict()),
+        (f"dataclass + {BACKEND}", dumps, result)
+    ]
+
+    print("=" * 60)
+    print("Serialization benchmark (median of 5 runs)")
+    print("=" * 60)
+    print(f"{'path':<24}{'us/response':>14}{'bytes':>10}{'speedup':>10}")
+
+    baseline = None
+    for name, encode, value in paths:
+        if encode is None:
+            print(f"{name:<24}  skipped: package not installed")
+            continue
+        micros, size = measure(encode, value, args.number)
+        baseline = baseline or micros
+        print(f"{name:<24}{micros:>14.2f}{size:>10}{baseline / micros:>9.1f}x")
+
+if __name__ == "__main__":
+    main()
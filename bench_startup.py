@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark: import time and resident memory of the app modules.
+
+Each measurement runs in a fresh interpreter so nothing is already cached in
+sys.modules. Run it before and after touching imports to catch regressions
+in worker cold-start time.
+
+Usage: python bench_startup.py [--runs N]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Executed in a child interpreter; prints a JSON line with the measurements
+PROBE = """
+import json, os, sys, time
+os.environ.setdefault('CACHE_PATH', '')
+
+def rss_mb():
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return usage / (1024 * 1024) if sys.platform == 'darwin' else usage / 1024
+
+baseline = rss_mb()
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+heavy = sorted(m for m in sys.modules if m.split('.')[0] in ('langchain', 'langchain_openai', 'langchain_mistralai', 'langchain_community', 'firecrawl', 'firecrawl_py'))
+print(json.dumps({{'import_ms': elapsed * 1000, 'rss_mb': rss_mb(), 'rss_delta_mb': rss_mb() - baseline, 'heavy_modules': len(heavy)}}))
+"""
+
+def measure(module: str, runs: int):
+    """
+    Import a module in fresh interpreters and collect the measurements
+    """
+    results = []
+    for _ in range(runs):
+        completed = subprocess.run(
+            [sys.executable, "-c", PROBE.format(module=module)],
+            capture_output=True,
+            text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        )
+        if completed.returncode != 0:
+            error = completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else "unknown error"
+            return {"error": error}
+        results.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+
+    return {
+        "import_ms": statistics.median(r["import_ms"] for r in results),
+        "rss_mb": statistics.median(r["rss_mb"] for r in results),
+        "rss_delta_mb": statistics.median(r["rss_delta_mb"] for r in results),
+        "heavy_modules": results[-1]["heavy_modules"]
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import time and RSS of the app modules")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per module (default: 5)")
+    args = parser.parse_args()
+
+    print("=" * 72)
+    print("Startup benchmark (median of %d runs)" % args.runs)
+    print("=" * 72)
+    print(f"{'module':<18}{'import ms':>12}{'RSS MB':>10}{'RSS +MB':>10}{'SDK modules':>14}")
+
+    for module in ["xthread_scraper", "summarizer", "main"]:
+        result = measure(module, args.runs)
+        if "error" in result:
+            print(f"{module:<18}  failed: {result['error']}")
+            continue
+        print(
+            f"{module:<18}{result['import_ms']:>12.1f}{result['rss_mb']:>10.1f}"
+            f"{result['rss_delta_mb']:>10.1f}{result['heavy_modules']:>14}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Build fingerprinted, precompressed copies of the static assets.
+
+Every stylesheet and script in static/ is copied to static/dist/ under a
+name containing a hash of its content, next to gzip and (when the brotli
+package is installed) brotli variants:
+
+    python build_assets.py
+
+static/dist/manifest.json maps each original name to its fingerprinted
+path. The template resolves asset URLs through the manifest, so a changed
+file gets a new URL and the old one can be cached forever. Without a
+manifest the original, unhashed files are served.
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import sys
+from typing import Dict
+
+ASSET_EXTENSIONS = ('.css', '.js')
+MANIFEST_NAME = 'manifest.json'
+
+def fingerprint(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:12]
+
+def _compressors():
+    """
+    Available (suffix, compress) pairs; brotli is optional
+    """
+    compressors = [('.gz', lambda data: gzip.compress(data, compresslevel=9, mtime=0))]
+    try:
+        import brotli
+        compressors.append(('.br', lambda data: brotli.compress(data, quality=11)))
+    except ImportError:
+        pass
+    return compressors
+
+def _write(path: str, data: bytes):
+    # Write then rename, so a server never reads a half-written asset
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as asset_file:
+        asset_file.write(data)
+    os.replace(tmp_path, path)
+
+def build(static_dir: str = 'static', out_dir: str = os.path.join('static', 'dist')) -> Dict[str, str]:
+    """
+    Fingerprint and compress every asset, returning the manifest
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    compressors = _compressors()
+    manifest = {}
+    written = {MANIFEST_NAME}
+
+    for name in sorted(os.listdir(static_dir)):
+        stem, ext = os.path.splitext(name)
+        source = os.path.join(static_dir, name)
+        if ext not in ASSET_EXTENSIONS or not os.path.isfile(source):
+            continue
+
+        with open(source, 'rb') as asset_file:
+            data = asset_file.read()
+
+        hashed_name = f"{stem}.{fingerprint(data)}{ext}"
+        _write(os.path.join(out_dir, hashed_name), data)
+        written.add(hashed_name)
+
+        sizes = {'raw': len(data)}
+        for suffix, compress in compressors:
+            compressed = compress(data)
+            # Only worth serving when it actually saves bytes
+            if len(compressed) < len(data):
+                _write(os.path.join(out_dir, hashed_name + suffix), compressed)
+                written.add(hashed_name + suffix)
+                sizes[suffix.lstrip('.')] = len(compressed)
+
+        manifest[name] = f"{os.path.basename(out_dir)}/{hashed_name}"
+        print(f"{name} -> {manifest[name]} " + ', '.join(f"{kind}={size}" for kind, size in sizes.items()),
+              file=sys.stderr)
+
+    # Drop outputs of earlier builds that no longer match any asset
+    for name in os.listdir(out_dir):
+        if name not in written:
+            os.remove(os.path.join(out_dir, name))
+
+    _write(os.path.join(out_dir, MANIFEST_NAME), json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+    return manifest
+
+def load_manifest(out_dir: str = os.path.join('static', 'dist')) -> Dict[str, str]:
+    """
+    Read the manifest of the last build, or an empty one if assets were never built
+    """
+    try:
+        with open(os.path.join(out_dir, MANIFEST_NAME), encoding='utf-8') as manifest_file:
+            return json.load(manifest_file)
+    except (OSError, ValueError):
+        return {}
+
+def main():
+    parser = argparse.ArgumentParser(description="Build fingerprinted, precompressed static assets")
+    parser.add_argument('--static-dir', default='static', help="Directory with the source assets")
+    parser.add_argument('--out-dir', default=os.path.join('static', 'dist'), help="Directory for built assets")
+    args = parser.parse_args()
+
+    manifest = build(args.static_dir, args.out_dir)
+    print(json.dumps(manifest, indent=2))
+
+if __name__ == '__main__':
+    main()
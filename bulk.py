@@ -0,0 +1,67 @@
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+# Summarizes one thread URL into a result line payload ('success' and either the result or 'error')
+Summarize = Callable[[str], Awaitable[Dict[str, Any]]]
+
+def group_by_thread(urls: List[str], thread_key: Callable[[str], Optional[str]]) -> Dict[str, List[int]]:
+    """
+    Group input indices by thread so repeated threads are processed once.
+
+    `thread_key` maps a URL to its status ID; URLs without one are grouped
+    by their own text.
+    """
+    groups: Dict[str, List[int]] = {}
+    for index, url in enumerate(urls):
+        url = url.strip()
+        groups.setdefault(thread_key(url) or url, []).append(index)
+    return groups
+
+class BulkSummary:
+    """
+    Summarize a list of thread URLs and stream one NDJSON line per input URL.
+
+    Each distinct thread is summarized once, at most `concurrency` at a time,
+    and its result is written for every index that named it as soon as it
+    completes. A failing thread yields error lines without stopping the rest.
+    """
+    def __init__(self, summarize: Summarize, concurrency: int = 5):
+        self.summarize = summarize
+        self.concurrency = max(1, concurrency)
+
+    async def _process_group(self, semaphore: asyncio.Semaphore, urls: List[str],
+                             indices: List[int]) -> Tuple[List[int], Dict[str, Any]]:
+        async with semaphore:
+            url = urls[indices[0]]
+            try:
+                payload = await self.summarize(url)
+            except Exception as e:
+                logger.error("Bulk item failed for %s: %s", url, e)
+                payload = {
+                    "success": False,
+                    "error": f"Internal server error: {str(e)}",
+                    "status_code": 500
+                }
+        return indices, payload
+
+    async def stream(self, urls: List[str], groups: Dict[str, List[int]]) -> AsyncIterator[bytes]:
+        """
+        Yield an NDJSON line for every index in `groups`, in completion order
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+        tasks = [asyncio.create_task(self._process_group(semaphore, urls, indices)) for indices in groups.values()]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                indices, payload = await next_done
+                for index in indices:
+                    line = {"index": index, "url": urls[index], **payload}
+                    yield dumps(line) + b"\n"
+        finally:
+            # Stop outstanding work if the client goes away mid-stream
+            for task in tasks:
+                task.cancel()
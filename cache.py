@@ -0,0 +1,219 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Optional
+
+from tweet_store import TweetStore, is_packed
+
+logger = logging.getLogger(__name__)
+
+# Seconds opening the database may wait for a lock; calls then use the cache's own busy timeout
+SETUP_BUSY_TIMEOUT = 5.0
+
+class SharedCache:
+    """
+    Key/value cache in a local SQLite database shared by all worker processes.
+
+    The database runs in WAL mode so readers in one worker never block on a
+    writer in another, and a primary-key lookup costs tens of microseconds,
+    which is cheap enough to call straight from the request path. Values are
+    stored as JSON and expire after a per-entry TTL.
+
+    Calls are synchronous and do block the event loop. Reads never wait on
+    locks, but a write waits while another worker holds the write lock, for
+    at most `busy_timeout` seconds. That is kept short: the caller treats a
+    failed cache call as a miss, which is cheaper than stalling every other
+    request on the loop.
+
+    Thread data in the `content_addressed` namespaces is stored as references
+    into a TweetStore in the same database, so a tweet appearing in many
+    cached threads is stored once and evicted with the last thread using it.
+    Expired entries only release their tweets when purged, so every
+    `purge_every` writes this handle purges them; 0 leaves it to the caller.
+    """
+    def __init__(self, path: str, default_ttl: float = 21600, content_addressed=('scrape',),
+                 purge_every: int = 500, busy_timeout: float = 0.1):
+        self.path = path
+        self.default_ttl = default_ttl
+        self.busy_timeout = busy_timeout
+        self.content_addressed = set(content_addressed)
+        self.purge_every = max(0, purge_every)
+        self._local = threading.local()
+        self._writes = 0
+        self._writes_lock = threading.Lock()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        # Schema setup may wait out other workers starting at the same time
+        conn = self._connection()
+        conn.execute(f"PRAGMA busy_timeout = {int(SETUP_BUSY_TIMEOUT * 1000)}")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_expires ON cache_entries (expires_at)")
+        self.tweets = TweetStore(self._connection)
+        conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout * 1000)}")
+
+    def _connection(self) -> sqlite3.Connection:
+        """
+        Get this thread's connection, opening it on first use
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=SETUP_BUSY_TIMEOUT, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout * 1000)}")
+            self._local.conn = conn
+        return conn
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        """
+        Return the cached value, or None if it is missing or expired
+        """
+        row = self._connection().execute(
+            "SELECT value, expires_at FROM cache_entries WHERE namespace = ? AND key = ?",
+            (namespace, key)
+        ).fetchone()
+
+        if row is None or row[1] < time.time():
+            return None
+
+        value = json.loads(row[0])
+        if namespace in self.content_addressed and is_packed(value):
+            # A dangling reference reads as a miss, so the thread is fetched again
+            return self.tweets.unpack(value)
+        return value
+
+    def set(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None):
+        """
+        Store a JSON-serializable value under namespace/key
+        """
+        expires_at = time.time() + (ttl if ttl is not None else self.default_ttl)
+        self._count_write()
+        if namespace not in self.content_addressed or not isinstance(value, dict) or 'tweets' not in value:
+            self._connection().execute(
+                "INSERT OR REPLACE INTO cache_entries (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                (namespace, key, json.dumps(value), expires_at)
+            )
+            return
+
+        with self._transaction() as conn:
+            # Reference the new tweets before releasing the old ones, so tweets
+            # shared by both versions are never dropped in between
+            packed = self.tweets.pack(value)
+            self._release(conn, namespace, key)
+            conn.execute(
+                "INSERT OR REPLACE INTO cache_entries (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                (namespace, key, json.dumps(packed), expires_at)
+            )
+
+    def delete(self, namespace: str, key: str):
+        with self._transaction() as conn:
+            self._release(conn, namespace, key)
+            conn.execute(
+                "DELETE FROM cache_entries WHERE namespace = ? AND key = ?",
+                (namespace, key)
+            )
+
+    def purge_expired(self) -> int:
+        """
+        Remove expired entries and return how many were deleted
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            for namespace in self.content_addressed:
+                for (value,) in conn.execute(
+                    "SELECT value FROM cache_entries WHERE namespace = ? AND expires_at < ?",
+                    (namespace, now)
+                ).fetchall():
+                    self.tweets.release(json.loads(value))
+
+            cursor = conn.execute(
+                "DELETE FROM cache_entries WHERE expires_at < ?",
+                (now,)
+            )
+        return cursor.rowcount
+
+    def _count_write(self):
+        """
+        Purge expired entries once every `purge_every` writes
+        """
+        if not self.purge_every:
+            return
+        with self._writes_lock:
+            self._writes += 1
+            due = self._writes >= self.purge_every
+            if due:
+                self._writes = 0
+        if due:
+            try:
+                purged = self.purge_expired()
+                logger.debug("Purged %d expired cache entries", purged)
+            except Exception as e:
+                # A busy database only delays the purge to the next round
+                logger.warning(f"Cache purge failed: {str(e)}")
+
+    def _release(self, conn: sqlite3.Connection, namespace: str, key: str):
+        """
+        Drop the tweet references held by the current value of namespace/key
+        """
+        if namespace not in self.content_addressed:
+            return
+        row = conn.execute(
+            "SELECT value FROM cache_entries WHERE namespace = ? AND key = ?",
+            (namespace, key)
+        ).fetchone()
+        if row is not None:
+            self.tweets.release(json.loads(row[0]))
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+def create_cache_from_env() -> Optional[SharedCache]:
+    """
+    Build the shared cache from CACHE_PATH / CACHE_TTL_SECONDS / CACHE_PURGE_EVERY /
+    CACHE_BUSY_TIMEOUT.
+
+    Setting CACHE_PATH to an empty string disables caching.
+    """
+    path = os.getenv('CACHE_PATH', '.cache/xthreads.db')
+    if not path:
+        return None
+
+    try:
+        cache = SharedCache(
+            path,
+            default_ttl=float(os.getenv('CACHE_TTL_SECONDS', 21600)),
+            purge_every=int(os.getenv('CACHE_PURGE_EVERY', 500)),
+            busy_timeout=float(os.getenv('CACHE_BUSY_TIMEOUT', 0.1))
+        )
+    except Exception as e:
+        logger.error(f"Failed to open shared cache at {path}: {str(e)}")
+        return None
+
+    try:
+        cache.purge_expired()
+    except Exception as e:
+        # Another worker may be purging; the periodic purge catches up
+        logger.warning(f"Startup cache purge failed: {str(e)}")
+    return cache
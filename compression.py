@@ -0,0 +1,134 @@
+import gzip
+import logging
+import mimetypes
+import os
+from typing import Iterable, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import Response
+from starlette.staticfiles import StaticFiles
+
+logger = logging.getLogger(__name__)
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Preferred first; the build step writes a variant per encoding
+PRECOMPRESSED_ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+def _accepts(headers: Headers, encoding: str) -> bool:
+    """
+    Whether Accept-Encoding allows `encoding` (an explicit q=0 refuses it)
+    """
+    for item in headers.get("accept-encoding", "").split(","):
+        name, _, params = item.strip().partition(";")
+        if name.strip().lower() == encoding:
+            return params.replace(" ", "").lower() not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    Static files that serve build-time brotli/gzip variants of fingerprinted assets.
+
+    Files under `immutable_prefix` have a content hash in their name, so they
+    are cached for a year without revalidation. Other files are served as-is
+    and revalidated on each use.
+    """
+    def __init__(self, *args, immutable_prefix: str = "dist/", **kwargs):
+        super().__init__(*args, **kwargs)
+        self.immutable_prefix = immutable_prefix
+
+    async def get_response(self, path: str, scope) -> Response:
+        if not path.replace(os.sep, "/").startswith(self.immutable_prefix):
+            response = await super().get_response(path, scope)
+            response.headers.setdefault("Cache-Control", "no-cache")
+            return response
+
+        headers = Headers(scope=scope)
+        for encoding, suffix in PRECOMPRESSED_ENCODINGS:
+            if not _accepts(headers, encoding):
+                continue
+            full_path, stat_result = self.lookup_path(path + suffix)
+            if stat_result is None:
+                continue
+            response = self.file_response(full_path, stat_result, scope)
+            # Typed as the original asset, not as an archive
+            media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+            if media_type.startswith("text/") or media_type.endswith("javascript"):
+                media_type += "; charset=utf-8"
+            response.headers["Content-Type"] = media_type
+            response.headers["Content-Encoding"] = encoding
+            break
+        else:
+            response = await super().get_response(path, scope)
+
+        response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        response.headers["Vary"] = "Accept-Encoding"
+        return response
+
+class GZipDynamicMiddleware:
+    """
+    Gzip complete JSON/HTML/text responses above `minimum_size`.
+
+    Unlike a general gzip middleware it leaves streamed responses alone, so
+    NDJSON lines still reach the client as they are produced rather than
+    waiting in the compressor's buffer, and it never re-encodes responses
+    that already carry a Content-Encoding (precompressed static assets).
+    Every response of a compressible type gets `Vary: Accept-Encoding`,
+    including small bodies and those sent to clients without gzip.
+    """
+    def __init__(self, app, minimum_size: int = 1024, compresslevel: int = 6,
+                 media_types: Iterable[str] = ("application/json", "text/html", "text/plain")):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.compresslevel = compresslevel
+        self.media_types = tuple(media_types)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accepts_gzip = _accepts(Headers(scope=scope), "gzip")
+        start_message: Optional[dict] = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start_message, passthrough
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(raw=message["headers"])
+                media_type = headers.get("content-type", "").split(";")[0].strip()
+                if "content-encoding" in headers or media_type not in self.media_types:
+                    passthrough = True
+                    await send(message)
+                    return
+
+                # Whether this response is compressed depends on the request's
+                # Accept-Encoding, so caches must key on it even when it is not
+                headers.add_vary_header("Accept-Encoding")
+                if not accepts_gzip:
+                    passthrough = True
+                    await send(message)
+                else:
+                    # Hold the headers until the body shows whether to compress
+                    start_message = message
+                return
+
+            body = message.get("body", b"")
+            passthrough = True
+            if message.get("more_body", False) or len(body) < self.minimum_size:
+                await send(start_message)
+                await send(message)
+                return
+
+            compressed = gzip.compress(body, compresslevel=self.compresslevel)
+            headers = MutableHeaders(raw=start_message["headers"])
+            headers["Content-Encoding"] = "gzip"
+            headers["Content-Length"] = str(len(compressed))
+            await send(start_message)
+            await send({"type": "http.response.body", "body": compressed, "more_body": False})
+
+        await self.app(scope, receive, send_compressed)
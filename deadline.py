@@ -0,0 +1,78 @@
+import asyncio
+import time
+from contextvars import ContextVar
+from typing import Awaitable, Optional, TypeVar
+
+T = TypeVar('T')
+
+class DeadlineExceeded(Exception):
+    """
+    Raised when a pipeline stage runs out of its share of the request deadline
+    """
+    def __init__(self, stage: str):
+        super().__init__(f"Deadline exceeded during {stage}")
+        self.stage = stage
+
+class Deadline:
+    """
+    Absolute point in time by which a request (or one of its stages) must finish
+    """
+    __slots__ = ('expires_at', 'stage')
+
+    def __init__(self, seconds: float, stage: str = 'request'):
+        self.expires_at = time.monotonic() + seconds
+        self.stage = stage
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+# Innermost active deadline. asyncio tasks copy the context, so stage
+# deadlines set in run_stage are visible to the code running in that stage.
+_current_deadline: ContextVar[Optional[Deadline]] = ContextVar('current_deadline', default=None)
+
+def set_deadline(seconds: float) -> Deadline:
+    """
+    Start the deadline for the current request
+    """
+    deadline = Deadline(seconds)
+    _current_deadline.set(deadline)
+    return deadline
+
+def current_deadline() -> Optional[Deadline]:
+    return _current_deadline.get()
+
+def remaining_seconds() -> Optional[float]:
+    """
+    Time left before the innermost deadline, or None when there is no deadline
+    """
+    deadline = _current_deadline.get()
+    return deadline.remaining() if deadline else None
+
+async def run_stage(stage: str, awaitable: Awaitable[T], fraction: float = 1.0) -> T:
+    """
+    Await a stage within `fraction` of the remaining deadline.
+
+    The stage is cancelled once its budget runs out and DeadlineExceeded is
+    raised naming it. Without an active deadline the awaitable runs as is.
+    """
+    parent = _current_deadline.get()
+    if parent is None:
+        return await awaitable
+
+    budget = parent.remaining() * fraction
+    if budget <= 0:
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()
+        raise DeadlineExceeded(stage)
+
+    token = _current_deadline.set(Deadline(budget, stage))
+    try:
+        return await asyncio.wait_for(awaitable, budget)
+    except asyncio.TimeoutError:
+        raise DeadlineExceeded(stage) from None
+    finally:
+        _current_deadline.reset(token)
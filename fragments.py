@@ -0,0 +1,69 @@
+import hashlib
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from metrics import STAGE_DURATION
+
+logger = logging.getLogger(__name__)
+
+NAMESPACE = 'fragment'
+
+# Stands in for the processing time in a cached card; every request fills in its own
+PROCESSING_TIME_SLOT = '__processing_time__'
+
+def template_version(source: str) -> str:
+    return hashlib.sha256(source.encode('utf-8')).hexdigest()[:12]
+
+def fill_processing_time(fragment: str, seconds: float) -> str:
+    return fragment.replace(PROCESSING_TIME_SLOT, f"{seconds:.2f}")
+
+class ResultFragments:
+    """
+    Rendered result cards cached per thread in the shared cache.
+
+    Entries are keyed by status ID and record the version of the template
+    that rendered them. A card from another template version counts as a
+    miss, so editing the template never serves stale markup, and a new
+    summary drops the card with one delete whichever version rendered it.
+    """
+    def __init__(self, cache_get: Callable[[str, str], Any], cache_set: Callable[[str, str, Any], None],
+                 cache_delete: Callable[[str, str], None], render: Callable[[str, Dict[str, Any]], str],
+                 version: str):
+        self._cache_get = cache_get
+        self._cache_set = cache_set
+        self._cache_delete = cache_delete
+        self._render = render
+        self.version = version
+
+    def get(self, status_id: Optional[str]) -> Optional[str]:
+        entry = self._cache_get(NAMESPACE, status_id)
+        if isinstance(entry, dict) and entry.get('version') == self.version:
+            return entry['html']
+        return None
+
+    def render(self, status_id: Optional[str], summary) -> str:
+        """
+        Render a thread's card and cache it for later requests
+        """
+        with STAGE_DURATION.time(stage='render'):
+            fragment = self._render(status_id, summary)
+        self._cache_set(NAMESPACE, status_id, {'version': self.version, 'html': fragment})
+        return fragment
+
+    async def get_or_render(self, status_id: Optional[str], summarize: Callable[[], Awaitable[Any]],
+                            on_hit: Optional[Callable[[], Awaitable[None]]] = None) -> str:
+        """
+        The cached card, or one rendered from the summary `summarize` produces.
+
+        A hit needs neither the pipeline nor the template; `on_hit` is awaited
+        before it is returned, e.g. to charge the client's rate limit.
+        """
+        fragment = self.get(status_id)
+        if fragment is not None:
+            if on_hit:
+                await on_hit()
+            return fragment
+        return self.render(status_id, await summarize())
+
+    def invalidate(self, status_id: Optional[str]):
+        self._cache_delete(NAMESPACE, status_id)
@@ -0,0 +1,55 @@
+import hashlib
+import json
+from typing import Any, Dict, Optional, Tuple
+
+def summary_body(status_id: str, summary: Dict[str, Any]) -> bytes:
+    """
+    Response body of GET /api/summary/{status_id}.
+
+    Serialized with sorted keys and no whitespace, so identical summaries
+    always produce the same bytes and the same strong ETag.
+    """
+    return json.dumps({
+        "success": True,
+        "summary": {
+            **summary,
+            "status_id": status_id,
+            "original_url": f"https://x.com/i/status/{status_id}"
+        }
+    }, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+def strong_etag(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+def cache_control(max_age: int, stale_while_revalidate: int) -> str:
+    return f"public, max-age={max_age}, stale-while-revalidate={stale_while_revalidate}"
+
+def etag_matches(etag: str, if_none_match: Optional[str]) -> bool:
+    """
+    Whether an If-None-Match header value covers `etag`.
+
+    If-None-Match uses weak comparison, so a W/ prefix on a listed tag is ignored.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return etag in [tag[2:] if tag.startswith("W/") else tag for tag in tags]
+
+def conditional_response(body: bytes, if_none_match: Optional[str], max_age: int,
+                         stale_while_revalidate: int) -> Tuple[int, Dict[str, str], bytes]:
+    """
+    Status, headers and body for a cacheable response to a conditional GET.
+
+    A matching If-None-Match gets 304 with an empty body; both carry the
+    ETag and Cache-Control headers so caches can revalidate either way.
+    """
+    etag = strong_etag(body)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": cache_control(max_age, stale_while_revalidate)
+    }
+    if etag_matches(etag, if_none_match):
+        return 304, headers, b""
+    return 200, headers, body
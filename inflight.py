@@ -0,0 +1,126 @@
+import asyncio
+import logging
+import time
+from contextvars import ContextVar
+from typing import Awaitable, Callable, Dict, Optional
+
+from metrics import ABANDONED_WORK, ABANDONED_WORK_SECONDS, DETACHED_WORK
+from progress import ProgressFeed, Listener, bind_feed
+
+logger = logging.getLogger(__name__)
+
+class ClientDisconnected(Exception):
+    """
+    Raised in a waiter whose client went away before the result was ready
+    """
+
+class Flight:
+    """
+    One in-progress pipeline run shared by every request for the same thread
+    """
+    __slots__ = ('key', 'task', 'waiters', 'keep_alive', 'stage', 'started_at', 'feed')
+
+    def __init__(self, key: str):
+        self.key = key
+        self.task: Optional[asyncio.Task] = None
+        self.waiters = 0
+        self.keep_alive = False
+        self.stage = 'queued'
+        self.started_at = time.monotonic()
+        self.feed = ProgressFeed()
+
+# Flight the current task is running, so the pipeline can report its stage
+_current_flight: ContextVar[Optional[Flight]] = ContextVar('current_flight', default=None)
+
+def mark_stage(stage: str):
+    """
+    Record which pipeline stage the current flight is in
+    """
+    flight = _current_flight.get()
+    if flight is not None:
+        flight.stage = stage
+
+class InflightRegistry:
+    """
+    Deduplicates concurrent pipeline runs and cancels work nobody is waiting for.
+
+    Requests for the same key join one shared task. Each waiter polls for its
+    client disconnecting; when the last waiter leaves, the task is cancelled
+    unless a waiter asked for the result to be kept (e.g. to populate caches).
+    The pipeline awaits async Firecrawl and provider clients, so cancellation
+    closes their in-flight HTTP requests rather than just discarding results.
+    A scrape already handed to a thread (a blocking Firecrawl SDK) still runs
+    to completion; ABANDONED_WORK counts those under stage 'scrape.blocking'.
+    """
+    def __init__(self, poll_interval: float = 0.25):
+        self.poll_interval = poll_interval
+        self._flights: Dict[str, Flight] = {}
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    async def run(self, key: str, factory: Callable[[], Awaitable],
+                  is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None,
+                  keep_alive: bool = False, on_progress: Optional[Listener] = None):
+        """
+        Join (or start) the flight for key and wait for its result.
+
+        `on_progress` receives the flight's stage events until this waiter leaves.
+        """
+        flight = self._flights.get(key)
+        if flight is None or flight.task.done():
+            flight = Flight(key)
+            flight.task = asyncio.create_task(self._fly(flight, factory))
+            flight.task.add_done_callback(lambda _, f=flight: self._land(f))
+            self._flights[key] = flight
+
+        flight.waiters += 1
+        flight.keep_alive = flight.keep_alive or keep_alive
+        if on_progress is not None:
+            flight.feed.subscribe(on_progress)
+
+        try:
+            while True:
+                done, _ = await asyncio.wait({flight.task}, timeout=self.poll_interval)
+                if done:
+                    return flight.task.result()
+                if is_disconnected is not None and await is_disconnected():
+                    raise ClientDisconnected()
+        except (ClientDisconnected, asyncio.CancelledError):
+            self._leave(flight)
+            raise
+        else:
+            flight.waiters -= 1
+        finally:
+            if on_progress is not None:
+                flight.feed.unsubscribe(on_progress)
+
+    async def _fly(self, flight: Flight, factory: Callable[[], Awaitable]):
+        _current_flight.set(flight)
+        bind_feed(flight.feed)
+        return await factory()
+
+    def _land(self, flight: Flight):
+        if self._flights.get(flight.key) is flight:
+            del self._flights[flight.key]
+        # Retrieve the exception so abandoned failures are not logged as unhandled
+        if not flight.task.cancelled():
+            flight.task.exception()
+
+    def _leave(self, flight: Flight):
+        """
+        Drop a waiter that gave up, cancelling the work if nobody else needs it
+        """
+        flight.waiters -= 1
+        if flight.waiters > 0 or flight.task.done():
+            return
+
+        if flight.keep_alive:
+            logger.info("Client left %s during %s; finishing to populate caches", flight.key, flight.stage)
+            DETACHED_WORK.inc(stage=flight.stage)
+            return
+
+        logger.info("Client left %s during %s; cancelling work", flight.key, flight.stage)
+        ABANDONED_WORK.inc(stage=flight.stage)
+        ABANDONED_WORK_SECONDS.inc(time.monotonic() - flight.started_at)
+        flight.task.cancel()
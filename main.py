@@ -1,38 +1,111 @@
-from fastapi import FastAPI, Request, Form, HTTPException
-from fastapi.responses import HTMLResponse, JSONResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi import FastAPI, Request, Form, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse, PlainTextResponse, Response
 from fastapi.templating import Jinja2Templates
 from pydantic import BaseModel, HttpUrl
+from typing import Dict, List, Optional
 import asyncio
+import hashlib
+import hmac
+import json
 import os
 import logging
+import time
+from collections import Counter
 from dotenv import load_dotenv
 
 # Import our custom modules
-from xthread_scraper import ThreadScraper
+from xthread_scraper import ThreadScraper, canonicalize_thread_url
 from summarizer import MultiProviderSummarizer, ThreadSummarizer
+from metrics import REGISTRY, STAGE_DURATION, PIPELINE_FAILURES, WORKER_INFO
+from tracing import start_trace, span, server_timing_header
+from cache import create_cache_from_env
+from summary_store import create_store_from_env
+from scrape_archive import create_archive_from_env
+from thread_watcher import create_watcher_from_env
+from deadline import set_deadline, run_stage, DeadlineExceeded
+from inflight import InflightRegistry, ClientDisconnected
+from scheduler import create_scheduler_from_env, set_priority, available_cpus, INTERACTIVE, BATCH
+from token_usage import USAGE, preload_encodings
+from rate_limit import create_rate_limiter_from_env, begin_request, client_id, RateLimitExceeded, HIT, MISS
+from progress import Listener, DONE, ERROR
+from bulk import BulkSummary, group_by_thread
+from author_digest import AuthorDigest
+from build_assets import load_manifest
+from compression import PrecompressedStaticFiles, GZipDynamicMiddleware
+from serialization import ThreadSummary, SummaryResult, dumps
+from pipeline import SummaryPipeline, PipelineError
+from http_cache import conditional_response, summary_body
+from fragments import ResultFragments, PROCESSING_TIME_SLOT, fill_processing_time, template_version
+from structured_logging import create_logging_from_env, bind_request_id
 
 # Load environment variables
 load_dotenv()
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Structured logging, written from a background thread
+create_logging_from_env()
 logger = logging.getLogger(__name__)
+trace_logger = logging.getLogger("trace")
+
+# Emit each request's span tree as a JSON log line when enabled
+TRACE_LOG_JSON = os.getenv("TRACE_LOG_JSON", "false").lower() in ("1", "true", "yes")
 
 # Initialize FastAPI app
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response encoded with orjson when available
+    """
+    def render(self, content) -> bytes:
+        return dumps(content)
+
 app = FastAPI(
     title="Twitter Thread Summarizer",
     description="Extract and summarize Twitter/X threads using Firecrawl and LLM",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=FastJSONResponse
 )
 
+# Compress complete JSON/HTML responses; streamed NDJSON is left as-is
+app.add_middleware(GZipDynamicMiddleware, minimum_size=int(os.getenv("GZIP_MIN_SIZE", 1024)))
+
 # Mount static files and templates
-app.mount("/static", StaticFiles(directory="static"), name="static")
+app.mount("/static", PrecompressedStaticFiles(directory="static"), name="static")
 templates = Jinja2Templates(directory="templates")
 
+# Fingerprinted asset paths written by build_assets.py; until it has run the
+# template falls back to the unhashed files
+ASSET_MANIFEST = load_manifest()
+
+def asset_url(name: str) -> str:
+    return "/static/" + ASSET_MANIFEST.get(name, name)
+
+templates.env.globals["asset_url"] = asset_url
+
+# Result card cached per thread; see fragments.py
+RESULT_TEMPLATE = "_result.html"
+
+# Bulk summarization limits
+BULK_MAX_URLS = int(os.getenv("BULK_MAX_URLS", 500))
+BULK_CONCURRENCY = int(os.getenv("BULK_CONCURRENCY", 4))
+
+# Author digests: threads per request, and summaries combined per LLM call
+AUTHOR_MAX_THREADS = int(os.getenv("AUTHOR_MAX_THREADS", 50))
+AUTHOR_DIGEST_FAN_IN = int(os.getenv("AUTHOR_DIGEST_FAN_IN", 8))
+
+# End-to-end request deadline (clients may ask for less via X-Request-Timeout)
+# and the share of it given to scraping; summarization gets the rest
+REQUEST_DEADLINE_SECONDS = float(os.getenv("REQUEST_DEADLINE_SECONDS", 60))
+SCRAPE_BUDGET_FRACTION = float(os.getenv("SCRAPE_BUDGET_FRACTION", 0.5))
+
+# How long known-bad threads (deleted, private, no tweets) fail without re-scraping
+NEGATIVE_CACHE_TTL = int(os.getenv("NEGATIVE_CACHE_TTL", 300))
+
+# HTTP caching of GET /api/summary/{status_id}
+SUMMARY_MAX_AGE = int(os.getenv("SUMMARY_MAX_AGE", 300))
+SUMMARY_STALE_WHILE_REVALIDATE = int(os.getenv("SUMMARY_STALE_WHILE_REVALIDATE", 86400))
+
 # Initialize services
 try:
-    thread_scraper = ThreadScraper()
+    thread_scraper = ThreadScraper(archive=create_archive_from_env())
     thread_summarizer = MultiProviderSummarizer(providers=["mistral", "openai"])
     logger.info("Services initialized successfully")
 except Exception as e:
@@ -40,22 +113,237 @@ except Exception as e:
     thread_scraper = None
     thread_summarizer = None
 
+# Shared cross-process cache for scrape and summary results
+shared_cache = create_cache_from_env()
+
+# Persistent history of every summary produced, searchable via /api/summaries
+summary_store = create_store_from_env()
+
+# Per-worker slots for Firecrawl and LLM calls, shared between priority classes
+scrape_scheduler = create_scheduler_from_env("scrape", "SCRAPE_CONCURRENCY", 8)
+llm_scheduler = create_scheduler_from_env("llm", "LLM_CONCURRENCY", 8)
+
+# Scrape-and-summarize through the caches and store, shared with the batch CLI
+summary_pipeline = SummaryPipeline(
+    thread_scraper, thread_summarizer, cache=shared_cache, store=summary_store,
+    scrape_scheduler=scrape_scheduler, llm_scheduler=llm_scheduler,
+    scrape_fraction=SCRAPE_BUDGET_FRACTION, negative_cache_ttl=NEGATIVE_CACHE_TTL
+)
+
+# Per-client token buckets for cache hits and misses, shared by all workers
+rate_limiter = create_rate_limiter_from_env()
+ADMIN_API_KEY = os.getenv("ADMIN_API_KEY", "")
+
+# API keys whose traffic always runs in a fixed priority class
+PRIORITY_API_KEYS = {
+    **{key.strip(): BATCH for key in os.getenv("BATCH_API_KEYS", "").split(",") if key.strip()},
+    **{key.strip(): INTERACTIVE for key in os.getenv("INTERACTIVE_API_KEYS", "").split(",") if key.strip()}
+}
+
+# Concurrent summaries one progress WebSocket may have running
+WS_MAX_SUMMARIES = int(os.getenv("WS_MAX_SUMMARIES", 8))
+
+# Pipeline runs in progress in this worker, shared by requests for the same thread
+inflight_pipelines = InflightRegistry(poll_interval=float(os.getenv("DISCONNECT_POLL_SECONDS", 0.25)))
+
 # Pydantic models
 class ThreadRequest(BaseModel):
     url: str
+    include_usage: bool = False
+    
+    class Config:
+        protected_namespaces = ()
+
+class BulkThreadRequest(BaseModel):
+    urls: List[str]
+    
+    class Config:
+        protected_namespaces = ()
+
+class AuthorDigestRequest(BaseModel):
+    urls: List[str] = []
+    author: Optional[str] = None
+    since: Optional[float] = None
+    until: Optional[float] = None
+    limit: int = 20
     
     class Config:
         protected_namespaces = ()
 
-class SummaryResponse(BaseModel):
-    success: bool
-    summary: dict = None
-    error: str = None
-    processing_time: float = None
+class WatchRequest(BaseModel):
+    url: str
+    interval_seconds: Optional[float] = None
     
     class Config:
         protected_namespaces = ()
 
+def _cache_get(namespace: str, key: str):
+    return summary_pipeline.cache_get(namespace, key)
+
+def _cache_set(namespace: str, key: str, value, ttl: Optional[float] = None):
+    summary_pipeline.cache_set(namespace, key, value, ttl=ttl)
+
+def _cache_delete(namespace: str, key: str):
+    summary_pipeline.cache_delete(namespace, key)
+
+def _known_summary(status_id: str) -> Optional[dict]:
+    """
+    A summary already computed for the thread, from the cache or the store
+    """
+    summary = _cache_get("summary", status_id)
+    
+    if summary is None and summary_store:
+        stored = summary_store.get(status_id)
+        if stored:
+            summary = {
+                "bullet_points": stored["bullet_points"],
+                "author": stored["author"],
+                "tweet_count": stored["tweet_count"]
+            }
+    
+    return summary
+
+def _render_result_card(status_id: str, summary) -> str:
+    return templates.get_template(RESULT_TEMPLATE).render(
+        summary=summary,
+        original_url=f"https://x.com/i/status/{status_id}",
+        share_url=f"/thread/{status_id}",
+        processing_time=PROCESSING_TIME_SLOT
+    )
+
+result_fragments = ResultFragments(
+    _cache_get, _cache_set, _cache_delete, _render_result_card,
+    version=template_version(templates.env.loader.get_source(templates.env, RESULT_TEMPLATE)[0])
+)
+
+def _result_page(request: Request, fragment: str, processing_time: float, url: str) -> HTMLResponse:
+    """
+    Wrap a result card in the page shell
+    """
+    with STAGE_DURATION.time(stage="render_page"):
+        return templates.TemplateResponse("index.html", {
+            "request": request,
+            "result_html": fill_processing_time(fragment, processing_time),
+            "url": url
+        })
+
+def _publish_refreshed_summary(status_id: str, url: str, thread_data: dict, summary: dict):
+    """
+    Make a watcher-refreshed summary visible through the regular API
+    """
+    _cache_set("scrape", status_id, thread_data)
+    summary_pipeline.publish(status_id, url, thread_data, summary)
+
+# Re-scrapes watched threads and re-summarizes them when new tweets appear
+thread_watcher = create_watcher_from_env(thread_scraper, thread_summarizer, _publish_refreshed_summary)
+
+@app.on_event("startup")
+async def preload_token_encodings():
+    """
+    Load the primary model's tokenizer before the first summary needs it
+    """
+    # Fallback models mostly share its encoding, which tiktoken keeps loaded
+    if thread_summarizer and thread_summarizer.summarizer:
+        await asyncio.to_thread(preload_encodings, [thread_summarizer.summarizer.model])
+
+@app.on_event("startup")
+async def start_thread_watcher():
+    """
+    Run the watch schedule in whichever worker gets the scheduler lock
+    """
+    if thread_watcher:
+        thread_watcher.start()
+
+@app.on_event("shutdown")
+async def flush_summary_store():
+    """
+    Stop background work and commit any summaries still queued for persistence
+    """
+    if thread_watcher:
+        await thread_watcher.stop()
+    if summary_store:
+        await asyncio.to_thread(summary_store.close)
+
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """
+    Trace each request and expose its span breakdown via Server-Timing
+    """
+    root = start_trace(f"{request.method} {request.url.path}")
+    # Honour an upstream proxy's request ID so log lines can be joined across hops
+    request_id = request.headers.get("x-request-id", "")[:64] or root.trace_id
+    bind_request_id(request_id)
+    try:
+        response = await call_next(request)
+    finally:
+        root.finish()
+    
+    response.headers["Server-Timing"] = server_timing_header(root)
+    response.headers["X-Trace-Id"] = root.trace_id
+    response.headers["X-Request-Id"] = request_id
+    
+    if TRACE_LOG_JSON and root.children:
+        # The JSON formatter serializes the span tree on the log writer thread
+        trace_logger.info("trace %s", root.trace_id, extra={
+            "trace": {"trace_id": root.trace_id, "status_code": response.status_code, **root.to_dict()}
+        })
+    
+    return response
+
+def _request_priority(request: Request) -> str:
+    """
+    Pick the priority class from the API key, else from the endpoint.
+
+    X-Priority can only lower a request to batch; otherwise any bulk client
+    could claim the interactive share reserved for the UI.
+    """
+    api_key = request.headers.get("x-api-key")
+    if api_key in PRIORITY_API_KEYS:
+        return PRIORITY_API_KEYS[api_key]
+    
+    if request.url.path == "/api/summarize/bulk":
+        return BATCH
+    if request.headers.get("x-priority", "").strip().lower() == BATCH:
+        return BATCH
+    return INTERACTIVE
+
+@app.middleware("http")
+async def classify_priority(request: Request, call_next):
+    """
+    Tag the request with its priority class for the scrape and LLM schedulers
+    """
+    set_priority(_request_priority(request))
+    return await call_next(request)
+
+@app.middleware("http")
+async def track_rate_limits(request: Request, call_next):
+    """
+    Identify the client for rate limiting and report its bucket in RateLimit-* headers
+    """
+    state = begin_request(client_id(
+        request.headers.get("x-api-key"),
+        request.client.host if request.client else None
+    ))
+    response = await call_next(request)
+    response.headers.update(state.headers())
+    return response
+
+@app.middleware("http")
+async def apply_request_deadline(request: Request, call_next):
+    """
+    Start the request deadline from X-Request-Timeout (seconds) or the default
+    """
+    timeout = REQUEST_DEADLINE_SECONDS
+    header = request.headers.get("x-request-timeout")
+    if header:
+        try:
+            timeout = min(timeout, max(0.0, float(header)))
+        except ValueError:
+            return JSONResponse(status_code=400, content={"detail": "X-Request-Timeout must be a number of seconds"})
+    
+    set_deadline(timeout)
+    return await call_next(request)
+
 @app.get("/", response_class=HTMLResponse)
 async def home(request: Request):
     """
@@ -74,20 +362,86 @@ async def health_check():
             "scraper": thread_scraper is not None,
             "summarizer": thread_summarizer is not None
         },
-        "providers": thread_summarizer.providers if thread_summarizer else []
+        "providers": thread_summarizer.providers if thread_summarizer else [],
+        "scheduling": {
+            "scrape": scrape_scheduler.stats(),
+            "llm": llm_scheduler.stats()
+        }
     }
 
-@app.post("/api/summarize", response_model=SummaryResponse)
-async def summarize_thread_api(request: ThreadRequest):
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    Pipeline latency histograms and counters in Prometheus text format.
+
+    Counters are per worker process; thread_worker_info names the one that answered.
+    """
+    WORKER_INFO.set(1, pid=str(os.getpid()))
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+async def _compute_summary(url: str, canonical_url: Optional[str], status_id: Optional[str]):
+    """
+    Scrape and summarize a thread, populating the caches and the store.
+    
+    Returns the summary and the token usage of the LLM call that produced it.
+    """
+    try:
+        return await summary_pipeline.compute(url, canonical_url, status_id)
+    except PipelineError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+
+def _rate_limited(error: RateLimitExceeded) -> HTTPException:
+    logger.info("Rate limited %s on cache %s", error.client, error.kind)
+    PIPELINE_FAILURES.inc(cause="rate_limited")
+    return HTTPException(
+        status_code=429,
+        detail=f"Too many requests; retry in {error.retry_after} seconds",
+        headers={"Retry-After": str(error.retry_after)}
+    )
+
+async def _charge_threads(keys: List[str]):
+    """
+    Charge a request covering several threads once, before any of them run.
+
+    Threads with a cached summary cost a hit each and the rest a miss each.
+    The items then run with `charge=False`, and since the charge happens
+    before the response starts, streamed responses carry RateLimit-* headers.
+    """
+    hits = sum(1 for key in keys if _cache_get("summary", key) is not None)
+    try:
+        # The miss bucket is charged last, so the headers report the scarcer one
+        await rate_limiter.consume(HIT, weight=hits)
+        await rate_limiter.consume(MISS, weight=len(keys) - hits)
+    except RateLimitExceeded as e:
+        raise _rate_limited(e)
+
+@app.post("/api/summarize", response_model=SummaryResult)
+async def summarize_thread_api(request: ThreadRequest, http_request: Request):
     """
     API endpoint to summarize a Twitter thread
     """
+    # Returning a response skips re-validating the result against response_model,
+    # which stays for the OpenAPI schema
+    return FastJSONResponse(await summarize_thread(request, http_request))
+
+async def summarize_thread(request: ThreadRequest, http_request: Optional[Request] = None,
+                           keep_alive: bool = False, on_progress: Optional[Listener] = None,
+                           charge: bool = True) -> SummaryResult:
+    """
+    Summarize a thread for one caller.
+
+    `http_request` lets the shared pipeline run be cancelled when the client
+    disconnects; `keep_alive` finishes it anyway so the result reaches the caches.
+    `on_progress` receives the pipeline's stage events while this caller waits.
+    `charge=False` skips the rate limit for endpoints that charged up front.
+    """
     import time
     start_time = time.time()
     
     try:
         # Validate services are available
         if not thread_scraper or not thread_summarizer:
+            PIPELINE_FAILURES.inc(cause="unavailable")
             raise HTTPException(
                 status_code=503,
                 detail="Services not properly initialized. Check your API keys."
@@ -96,72 +450,494 @@ async def summarize_thread_api(request: ThreadRequest):
         # Validate URL
         url = request.url.strip()
         if not url:
+            PIPELINE_FAILURES.inc(cause="invalid_request")
             raise HTTPException(status_code=400, detail="URL is required")
         
-        logger.info(f"Processing thread URL: {url}")
+        logger.info("Processing thread URL: %s", url)
         
-        # Step 1: Scrape the thread
-        scrape_result = await thread_scraper.scrape_thread(url)
+        # All URL variants of a status share one canonical URL and cache key;
+        # invalid URLs get no key and fail validation in the scraper
+        canonical_url = canonicalize_thread_url(url)
+        status_id = thread_scraper._extract_thread_id(canonical_url) if canonical_url else None
         
-        if not scrape_result['success']:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Failed to scrape thread: {scrape_result.get('error', 'Unknown error')}"
-            )
+        # Known-bad threads fail fast until the negative cache entry expires
+        try:
+            summary_pipeline.check_failure(status_id)
+        except PipelineError as e:
+            raise HTTPException(status_code=e.status_code, detail=str(e))
         
-        thread_data = scrape_result['thread_data']
+        # Serve a summary already computed by any worker
+        summary = _cache_get("summary", status_id)
+        usage = {"cached": True, "total_tokens": 0, "cost_usd": 0.0}
         
-        # Step 2: Summarize the content
-        summary_result = await thread_summarizer.summarize_thread(thread_data)
+        # Charge the client's hit or miss budget before doing any work
+        if charge:
+            await rate_limiter.consume(HIT if summary is not None else MISS)
         
-        if not summary_result['success']:
-            raise HTTPException(
-                status_code=500,
-                detail=f"Failed to generate summary: {summary_result.get('error', 'Unknown error')}"
+        if summary is None:
+            # Concurrent requests for one thread share a single pipeline run,
+            # which is cancelled once every waiting client has disconnected
+            summary, usage = await inflight_pipelines.run(
+                status_id or url,
+                lambda: _compute_summary(url, canonical_url, status_id),
+                is_disconnected=http_request.is_disconnected if http_request else None,
+                keep_alive=keep_alive,
+                on_progress=on_progress
             )
         
         processing_time = time.time() - start_time
+        STAGE_DURATION.observe(processing_time, stage="total")
         
-        return SummaryResponse(
+        return SummaryResult(
             success=True,
-            summary={
-                "bullet_points": summary_result['summary']['bullet_points'],
-                "author": summary_result['summary']['author'],
-                "tweet_count": summary_result['summary']['tweet_count'],
-                "original_url": url,
-                "processing_time_seconds": round(processing_time, 2)
-            },
-            processing_time=processing_time
+            summary=ThreadSummary(
+                bullet_points=summary["bullet_points"],
+                author=summary["author"],
+                tweet_count=summary["tweet_count"],
+                original_url=url,
+                processing_time_seconds=round(processing_time, 2)
+            ),
+            processing_time=processing_time,
+            usage=usage if request.include_usage else None
         )
         
     except HTTPException:
         raise
+    except RateLimitExceeded as e:
+        raise _rate_limited(e)
+    except ClientDisconnected:
+        logger.info("Client disconnected before the summary for %s was ready", request.url)
+        PIPELINE_FAILURES.inc(cause="disconnected")
+        # Nobody reads this response; 499 marks client-closed requests in access logs
+        raise HTTPException(status_code=499, detail="Client closed request")
+    except DeadlineExceeded as e:
+        logger.warning("Request deadline exceeded during %s stage", e.stage)
+        PIPELINE_FAILURES.inc(cause="deadline")
+        raise HTTPException(
+            status_code=504,
+            detail=f"Deadline exceeded during {e.stage} stage",
+            headers={"X-Deadline-Stage": e.stage}
+        )
     except Exception as e:
         logger.error(f"Unexpected error processing request: {str(e)}")
+        PIPELINE_FAILURES.inc(cause="internal")
         raise HTTPException(
             status_code=500,
             detail=f"Internal server error: {str(e)}"
         )
 
+@app.post("/api/summarize/bulk")
+async def summarize_bulk_api(request: BulkThreadRequest):
+    """
+    Bulk API endpoint that streams one NDJSON line per thread as it completes
+    """
+    if not thread_scraper or not thread_summarizer:
+        raise HTTPException(
+            status_code=503,
+            detail="Services not properly initialized. Check your API keys."
+        )
+    
+    if not request.urls:
+        raise HTTPException(status_code=400, detail="At least one URL is required")
+    
+    if len(request.urls) > BULK_MAX_URLS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many URLs: {len(request.urls)} (maximum is {BULK_MAX_URLS})"
+        )
+    
+    def thread_key(url: str) -> Optional[str]:
+        canonical_url = canonicalize_thread_url(url)
+        return thread_scraper._extract_thread_id(canonical_url) if canonical_url else None
+    
+    # Repeated threads are processed once
+    groups = group_by_thread(request.urls, thread_key)
+    
+    logger.info("Bulk request with %d URLs (%d unique threads)", len(request.urls), len(groups))
+    await _charge_threads(list(groups))
+    
+    async def summarize_item(url: str) -> dict:
+        # Each thread gets its own deadline, started once it leaves the queue
+        set_deadline(REQUEST_DEADLINE_SECONDS)
+        try:
+            result = await summarize_thread(ThreadRequest(url=url), charge=False)
+        except HTTPException as e:
+            return {
+                "success": False,
+                "error": e.detail,
+                "status_code": e.status_code
+            }
+        return {
+            "success": True,
+            "summary": result.summary,
+            "processing_time": result.processing_time
+        }
+    
+    bulk = BulkSummary(summarize_item, concurrency=BULK_CONCURRENCY)
+    return StreamingResponse(bulk.stream(request.urls, groups), media_type="application/x-ndjson")
+
+@app.websocket("/ws/progress")
+async def progress_socket(websocket: WebSocket):
+    """
+    Run summaries and push their stage events over one connection.
+    
+    Clients send {"id": ..., "url": ...} to start a summary and
+    {"id": ..., "cancel": true} to drop one. Every frame sent back carries the
+    id it belongs to, so any number of summaries can share the socket; each
+    ends with a "done" frame holding the summary or an "error" frame.
+    """
+    await websocket.accept()
+    
+    # HTTP middlewares do not run for WebSockets, so each summary sets up its own context
+    client = client_id(
+        websocket.headers.get("x-api-key"),
+        websocket.client.host if websocket.client else None
+    )
+    priority = _request_priority(websocket)
+    connection_id = websocket.headers.get("x-request-id", "")[:64] or os.urandom(8).hex()
+    outbox: asyncio.Queue = asyncio.Queue()
+    jobs: Dict[str, asyncio.Task] = {}
+    
+    def send_error(job_id: Optional[str], error: str, status_code: int):
+        outbox.put_nowait({"id": job_id, "event": ERROR, "error": error, "status_code": status_code})
+    
+    async def run_job(job_id: str, url: str):
+        set_deadline(REQUEST_DEADLINE_SECONDS)
+        set_priority(priority)
+        begin_request(client)
+        bind_request_id(f"{connection_id}/{job_id}")
+        
+        def forward(message: dict):
+            outbox.put_nowait({"id": job_id, **message})
+        
+        try:
+            result = await summarize_thread(ThreadRequest(url=url), on_progress=forward)
+            canonical_url = canonicalize_thread_url(url)
+            outbox.put_nowait({
+                "id": job_id,
+                "event": DONE,
+                # Lets the page open the share link, served from cache, instead of posting the form again
+                "status_id": thread_scraper._extract_thread_id(canonical_url) if canonical_url and thread_scraper else None,
+                "summary": result.summary,
+                "processing_time": result.processing_time
+            })
+        except HTTPException as e:
+            send_error(job_id, e.detail, e.status_code)
+        finally:
+            if jobs.get(job_id) is asyncio.current_task():
+                del jobs[job_id]
+    
+    async def send_events():
+        # The only writer, so frames from concurrent summaries never interleave
+        while True:
+            await websocket.send_text(dumps(await outbox.get()).decode("utf-8"))
+    
+    sender = asyncio.create_task(send_events())
+    try:
+        while True:
+            try:
+                message = json.loads(await websocket.receive_text())
+                job_id = str(message["id"])
+            except (ValueError, KeyError, TypeError):
+                send_error(None, 'Expected {"id": ..., "url": ...}', 400)
+                continue
+            
+            if message.get("cancel"):
+                task = jobs.pop(job_id, None)
+                if task:
+                    task.cancel()
+                    send_error(job_id, "Cancelled", 499)
+                continue
+            
+            if job_id in jobs:
+                send_error(job_id, "A summary with this id is already running", 409)
+            elif len(jobs) >= WS_MAX_SUMMARIES:
+                send_error(job_id, f"At most {WS_MAX_SUMMARIES} summaries may run per connection", 429)
+            else:
+                jobs[job_id] = asyncio.create_task(run_job(job_id, str(message.get("url", ""))))
+    except WebSocketDisconnect:
+        pass
+    finally:
+        # Leaving the shared pipeline runs cancels them unless another client waits
+        sender.cancel()
+        for task in list(jobs.values()):
+            task.cancel()
+
+async def _combine_summaries(thread_data: dict) -> dict:
+    """
+    Summarize a group of thread summaries, reusing the digest of identical input
+    """
+    key = hashlib.sha256(json.dumps(
+        [thread_data['author'], thread_data['aggregate_of']]
+    ).encode("utf-8")).hexdigest()[:32]
+    
+    cached = _cache_get("digest", key)
+    if cached is not None:
+        return {"success": True, "summary": {"bullet_points": cached}}
+    
+    # Each combine step gets a full deadline of its own, like a bulk item
+    set_deadline(REQUEST_DEADLINE_SECONDS)
+    with span("digest", threads=len(thread_data['aggregate_of'])):
+        result = await run_stage("digest", llm_scheduler.run(thread_summarizer.summarize_thread(thread_data)))
+    
+    if result['success']:
+        _cache_set("digest", key, result['summary']['bullet_points'])
+    return result
+
+@app.post("/api/summarize/author")
+async def summarize_author_api(request: AuthorDigestRequest):
+    """
+    Summarize many threads by one author and stream a hierarchical digest.
+    
+    Threads come from `urls`, or from the summary store's history for `author`
+    (optionally limited to `since`/`until`). One NDJSON line is streamed per
+    thread as it completes, then one per combined group, then the final digest.
+    """
+    if not thread_scraper or not thread_summarizer:
+        raise HTTPException(
+            status_code=503,
+            detail="Services not properly initialized. Check your API keys."
+        )
+    
+    if not 1 <= request.limit <= AUTHOR_MAX_THREADS:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {AUTHOR_MAX_THREADS}")
+    
+    # Stored threads already have summaries; listed URLs go through the pipeline
+    stored = {}
+    urls = [url.strip() for url in request.urls if url.strip()]
+    if not urls:
+        if not request.author:
+            raise HTTPException(status_code=400, detail="Either urls or author is required")
+        if not summary_store:
+            raise HTTPException(status_code=503, detail="Summary store is not enabled")
+        
+        items = summary_store.search(
+            author=request.author,
+            since=request.since,
+            until=request.until,
+            limit=request.limit
+        )['items']
+        for item in items:
+            url = item['original_url'] or f"https://x.com/i/status/{item['status_id']}"
+            stored[url] = {
+                "bullet_points": item['bullet_points'],
+                "author": item['author'],
+                "tweet_count": item['tweet_count']
+            }
+            urls.append(url)
+        
+        if not urls:
+            return JSONResponse(status_code=404, content={"detail": f"No stored threads by @{request.author.lstrip('@')}"})
+    
+    if len(urls) > AUTHOR_MAX_THREADS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many URLs: {len(urls)} (maximum is {AUTHOR_MAX_THREADS})"
+        )
+    
+    # One job per thread, and the author from the URLs' handles unless given
+    unique_urls = {}
+    handles = Counter()
+    for url in urls:
+        canonical_url = canonicalize_thread_url(url)
+        key = thread_scraper._extract_thread_id(canonical_url) if canonical_url else url
+        unique_urls.setdefault(key, url)
+        handle = canonical_url.split("/")[3] if canonical_url else None
+        if handle and handle != "i":
+            handles[handle] += 1
+    
+    author = request.author or (handles.most_common(1)[0][0] if handles else None)
+    logger.info("Author digest for @%s over %d threads", author or '?', len(unique_urls))
+    # Stored threads are summarized already and cost nothing
+    await _charge_threads([key for key, url in unique_urls.items() if url not in stored])
+    
+    async def summarize_one(url: str) -> dict:
+        if url in stored:
+            return stored[url]
+        
+        # Each thread gets its own deadline, as in the bulk endpoint
+        set_deadline(REQUEST_DEADLINE_SECONDS)
+        try:
+            result = await summarize_thread(ThreadRequest(url=url), charge=False)
+        except HTTPException as e:
+            raise ValueError(e.detail)
+        return result.summary.to_dict()
+    
+    digest = AuthorDigest(_combine_summaries, fan_in=AUTHOR_DIGEST_FAN_IN)
+    
+    async def stream_results():
+        start = time.perf_counter()
+        jobs = [(url, summarize_one(url)) for url in unique_urls.values()]
+        async for line in digest.run(jobs, author=author):
+            if line.get("final"):
+                line["processing_time"] = round(time.perf_counter() - start, 3)
+            yield dumps(line) + b"\n"
+    
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+@app.get("/api/summary/{status_id}")
+async def get_summary(status_id: str, request: Request):
+    """
+    Cacheable summary lookup by status ID, computing the summary on a miss
+    """
+    if not status_id.isdigit():
+        raise HTTPException(status_code=400, detail="Status ID must be numeric")
+    
+    summary = _known_summary(status_id)
+    
+    if summary is not None:
+        # A known summary costs a hit; summarize_thread charges its own miss
+        try:
+            await rate_limiter.consume(HIT)
+        except RateLimitExceeded as e:
+            raise _rate_limited(e)
+    else:
+        # The i/status path resolves to the thread regardless of the author handle
+        # Finished even if this client leaves: revalidating proxies expect the cache filled
+        result = await summarize_thread(
+            ThreadRequest(url=f"https://x.com/i/status/{status_id}"),
+            request,
+            keep_alive=True
+        )
+        summary = {
+            "bullet_points": result.summary.bullet_points,
+            "author": result.summary.author,
+            "tweet_count": result.summary.tweet_count
+        }
+    
+    status_code, headers, body = conditional_response(
+        summary_body(status_id, summary),
+        request.headers.get("if-none-match"),
+        SUMMARY_MAX_AGE,
+        SUMMARY_STALE_WHILE_REVALIDATE
+    )
+    if status_code == 304:
+        return Response(status_code=304, headers=headers)
+    
+    return Response(content=body, media_type="application/json", headers=headers)
+
+@app.get("/api/summaries")
+async def list_summaries(
+    author: Optional[str] = None,
+    q: Optional[str] = None,
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+    limit: int = 20,
+    offset: int = 0
+):
+    """
+    Page through stored summaries by author, creation time, or full-text query
+    """
+    if not summary_store:
+        raise HTTPException(status_code=503, detail="Summary store is not enabled")
+    
+    if not 1 <= limit <= 100:
+        raise HTTPException(status_code=400, detail="limit must be between 1 and 100")
+    if offset < 0:
+        raise HTTPException(status_code=400, detail="offset must not be negative")
+    
+    return summary_store.search(
+        author=author,
+        query=q,
+        since=since,
+        until=until,
+        limit=limit,
+        offset=offset
+    )
+
+@app.post("/api/watch")
+async def add_watch(request: WatchRequest):
+    """
+    Watch a thread and refresh its summary whenever new tweets are appended
+    """
+    if not thread_watcher:
+        raise HTTPException(status_code=503, detail="Thread watching is not enabled")
+    
+    canonical_url = canonicalize_thread_url(request.url)
+    if not canonical_url:
+        raise HTTPException(status_code=400, detail="Invalid Twitter/X URL format")
+    
+    status_id = thread_scraper._extract_thread_id(canonical_url)
+    
+    # Seed the watch with what we already know so the first check is a diff
+    watch = thread_watcher.add(
+        status_id,
+        canonical_url,
+        interval=request.interval_seconds,
+        thread_data=_cache_get("scrape", status_id),
+        summary=_cache_get("summary", status_id)
+    )
+    return {"success": True, "watch": watch}
+
+@app.get("/api/watch")
+async def list_watches():
+    """
+    List watched threads with their refresh state
+    """
+    if not thread_watcher:
+        raise HTTPException(status_code=503, detail="Thread watching is not enabled")
+    
+    return {"watches": thread_watcher.list()}
+
+@app.delete("/api/watch/{status_id}")
+async def remove_watch(status_id: str):
+    """
+    Stop watching a thread
+    """
+    if not thread_watcher:
+        raise HTTPException(status_code=503, detail="Thread watching is not enabled")
+    
+    if not thread_watcher.remove(status_id):
+        # Returned directly: the 404 exception handler renders the HTML page
+        return JSONResponse(status_code=404, content={"detail": "Thread is not being watched"})
+    
+    return {"success": True}
+
+@app.get("/api/admin/usage")
+async def get_usage(request: Request):
+    """
+    Per-client allowed and rejected request counts for cache hits and misses
+    """
+    if not ADMIN_API_KEY:
+        raise HTTPException(status_code=503, detail="Admin API is not enabled")
+    
+    if not hmac.compare_digest(request.headers.get("x-admin-key", ""), ADMIN_API_KEY):
+        raise HTTPException(status_code=403, detail="Invalid admin key")
+    
+    return {
+        "limits": {
+            kind: {"per_minute": per_minute, "burst": burst}
+            for kind, (per_minute, burst) in rate_limiter.limits.items()
+        },
+        "clients": rate_limiter.usage()
+    }
+
 @app.post("/summarize", response_class=HTMLResponse)
 async def summarize_thread_form(request: Request, url: str = Form(...)):
     """
     Form endpoint for HTML form submissions
     """
+    start_time = time.perf_counter()
     try:
-        # Create a request object for the API call
-        thread_request = ThreadRequest(url=url)
+        canonical_url = canonicalize_thread_url(url)
+        status_id = thread_scraper._extract_thread_id(canonical_url) if canonical_url and thread_scraper else None
         
-        # Call the API endpoint
-        result = await summarize_thread_api(thread_request)
+        async def summarize():
+            return (await summarize_thread(ThreadRequest(url=url), request)).summary
+        
+        # A thread rendered before needs neither the pipeline nor the template
+        fragment = await result_fragments.get_or_render(
+            status_id, summarize, on_hit=lambda: rate_limiter.consume(HIT)
+        )
         
-        # Return the results page
+        return _result_page(request, fragment, time.perf_counter() - start_time, url)
+        
+    except RateLimitExceeded as e:
         return templates.TemplateResponse("index.html", {
             "request": request,
-            "result": result.dict(),
+            "error": f"Too many requests; retry in {e.retry_after} seconds",
             "url": url
-        })
-        
+        }, status_code=429, headers={"Retry-After": str(e.retry_after)})
     except HTTPException as e:
         # Return error page
         return templates.TemplateResponse("index.html", {
@@ -177,6 +953,49 @@ async def summarize_thread_form(request: Request, url: str = Form(...)):
             "url": url
         })
 
+@app.get("/thread/{status_id}", response_class=HTMLResponse)
+async def shared_result_page(status_id: str, request: Request):
+    """
+    Shareable result page for a thread, served from the rendered card cache
+    """
+    start_time = time.perf_counter()
+    url = f"https://x.com/i/status/{status_id}"
+    if not status_id.isdigit():
+        return templates.TemplateResponse("index.html", {
+            "request": request,
+            "error": "Page not found"
+        }, status_code=404)
+    
+    try:
+        async def summarize():
+            summary = _known_summary(status_id)
+            if summary is not None:
+                await rate_limiter.consume(HIT)
+            else:
+                # Finished even if this visitor leaves, like GET /api/summary
+                summary = (await summarize_thread(ThreadRequest(url=url), request, keep_alive=True)).summary
+            return summary
+        
+        # Cached cards and known summaries cost a hit, like the form route
+        fragment = await result_fragments.get_or_render(
+            status_id, summarize, on_hit=lambda: rate_limiter.consume(HIT)
+        )
+        
+        return _result_page(request, fragment, time.perf_counter() - start_time, url)
+        
+    except RateLimitExceeded as e:
+        return templates.TemplateResponse("index.html", {
+            "request": request,
+            "error": f"Too many requests; retry in {e.retry_after} seconds",
+            "url": url
+        }, status_code=429, headers={"Retry-After": str(e.retry_after)})
+    except HTTPException as e:
+        return templates.TemplateResponse("index.html", {
+            "request": request,
+            "error": e.detail,
+            "url": url
+        }, status_code=e.status_code)
+
 @app.get("/api/providers")
 async def get_providers_status():
     """
@@ -205,7 +1024,10 @@ async def get_providers_status():
         
         return {
             "current_provider": thread_summarizer.providers[thread_summarizer.current_provider_index] if thread_summarizer.current_provider_index < len(thread_summarizer.providers) else None,
-            "providers": providers_info
+            "providers": providers_info,
+            # Token usage is counted in each worker process separately
+            "usage": USAGE.snapshot(),
+            "worker_pid": os.getpid()
         }
     except Exception as e:
         return {"error": str(e)}
@@ -226,8 +1048,23 @@ async def internal_error_handler(request: Request, exc):
     })
 
 if __name__ == "__main__":
+    import argparse
     import uvicorn
     
+    parser = argparse.ArgumentParser(description="Twitter Thread Summarizer server")
+    parser.add_argument(
+        "--production",
+        action="store_true",
+        help="Run multiple worker processes without auto-reload"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.getenv("WEB_CONCURRENCY") or 0) or available_cpus(),
+        help="Number of worker processes in production mode (default: usable CPUs)"
+    )
+    args = parser.parse_args()
+    
     # Check for required environment variables
     required_vars = ['FIRECRAWL_API_KEY']
     missing_vars = [var for var in required_vars if not os.getenv(var)]
@@ -251,10 +1088,24 @@ if __name__ == "__main__":
     print(f"[HEALTH] Health check: http://{host}:{port}/health")
     print("\n[NOTE] Make sure you have set up your API keys in .env file!\n")
     
-    uvicorn.run(
-        "main:app",
-        host=host,
-        port=port,
-        reload=True,
-        log_level="info"
-    )
\ No newline at end of file
+    if args.production:
+        # Workers share scrape/summary results through the SQLite cache
+        print(f"[MODE] Production: {args.workers} worker processes")
+        uvicorn.run(
+            "main:app",
+            host=host,
+            port=port,
+            workers=args.workers,
+            log_level="info",
+            # Leave uvicorn's loggers to propagate to the root queue handler
+            log_config=None
+        )
+    else:
+        uvicorn.run(
+            "main:app",
+            host=host,
+            port=port,
+            reload=True,
+            log_level="info",
+            log_config=None
+        )
\ No newline at end of file
@@ -0,0 +1,169 @@
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+from deadline import run_stage
+from fragments import NAMESPACE as FRAGMENT_NAMESPACE
+from inflight import mark_stage
+from metrics import CACHE_LOOKUPS, PIPELINE_FAILURES
+from progress import report, PARSED
+from tracing import span
+from xthread_scraper import TRANSIENT_FAILURE_CAUSES
+
+logger = logging.getLogger(__name__)
+
+class PipelineError(Exception):
+    """
+    A thread that could not be summarized, with the HTTP status the server answers with
+    """
+    def __init__(self, message: str, status_code: int = 500):
+        super().__init__(message)
+        self.status_code = status_code
+
+class SummaryPipeline:
+    """
+    Scrape and summarize one thread through the shared caches and store.
+
+    The server and the batch CLI both run threads through this, so they
+    read and fill the same cache namespaces: 'scrape', 'summary' and the
+    'failure' negative cache, and a new summary always drops the thread's
+    rendered result card. Cache failures are logged and treated as misses.
+    """
+    def __init__(self, scraper, summarizer, cache=None, store=None,
+                 scrape_scheduler=None, llm_scheduler=None,
+                 scrape_fraction: float = 0.5, negative_cache_ttl: float = 300):
+        self.scraper = scraper
+        self.summarizer = summarizer
+        self.cache = cache
+        self.store = store
+        self.scrape_scheduler = scrape_scheduler
+        self.llm_scheduler = llm_scheduler
+        self.scrape_fraction = scrape_fraction
+        self.negative_cache_ttl = negative_cache_ttl
+
+    def cache_get(self, namespace: str, key: Optional[str]):
+        """
+        Look up a shared cache entry, recording the hit or miss
+        """
+        if not self.cache or not key:
+            return None
+
+        try:
+            value = self.cache.get(namespace, key)
+        except Exception as e:
+            logger.warning(f"Cache read failed for {namespace}/{key}: {str(e)}")
+            return None
+
+        CACHE_LOOKUPS.inc(cache=namespace, result="hit" if value is not None else "miss")
+        return value
+
+    def cache_set(self, namespace: str, key: Optional[str], value, ttl: Optional[float] = None):
+        """
+        Store a shared cache entry, ignoring cache failures
+        """
+        if not self.cache or not key:
+            return
+
+        try:
+            self.cache.set(namespace, key, value, ttl=ttl)
+        except Exception as e:
+            logger.warning(f"Cache write failed for {namespace}/{key}: {str(e)}")
+
+    def cache_delete(self, namespace: str, key: Optional[str]):
+        """
+        Drop a shared cache entry, ignoring cache failures
+        """
+        if not self.cache or not key:
+            return
+
+        try:
+            self.cache.delete(namespace, key)
+        except Exception as e:
+            logger.warning(f"Cache delete failed for {namespace}/{key}: {str(e)}")
+
+    def check_failure(self, status_id: Optional[str]):
+        """
+        Fail fast on a known-bad thread until its negative cache entry expires
+        """
+        failure = self.cache_get("failure", status_id)
+        if failure is not None:
+            PIPELINE_FAILURES.inc(cause="negative_cache")
+            raise PipelineError(f"Failed to scrape thread: {failure['error']}", status_code=400)
+
+    @staticmethod
+    async def _scheduled(scheduler, awaitable):
+        # Time queued for a slot counts against the stage budget
+        return await (scheduler.run(awaitable) if scheduler else awaitable)
+
+    async def compute(self, url: str, canonical_url: Optional[str],
+                      status_id: Optional[str]) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+        """
+        Scrape and summarize a thread, populating the caches and the store.
+
+        Returns the summary and the token usage of the LLM call that produced it.
+        """
+        # Step 1: Scrape the thread (reusing a cached scrape when available)
+        mark_stage("scrape")
+        thread_data = self.cache_get("scrape", status_id)
+        scrape_cached = thread_data is not None
+
+        if thread_data is None:
+            with span("scrape"):
+                scrape_result = await run_stage(
+                    "scrape",
+                    self._scheduled(self.scrape_scheduler, self.scraper.scrape_thread(canonical_url or url)),
+                    fraction=self.scrape_fraction
+                )
+
+            if not scrape_result['success']:
+                PIPELINE_FAILURES.inc(cause="scrape")
+                # Only failures that hold for every client are remembered; one
+                # request's short deadline must not fail the thread for others
+                cause = scrape_result.get('failure_cause')
+                if cause and cause not in TRANSIENT_FAILURE_CAUSES:
+                    self.cache_set("failure", status_id, {
+                        "error": scrape_result.get('error', 'Unknown error'),
+                        "cause": cause
+                    }, ttl=self.negative_cache_ttl)
+                raise PipelineError(
+                    f"Failed to scrape thread: {scrape_result.get('error', 'Unknown error')}",
+                    status_code=400
+                )
+
+            thread_data = scrape_result['thread_data']
+            self.cache_set("scrape", status_id, thread_data)
+
+        report(PARSED, tweet_count=thread_data['total_tweets'], author=thread_data.get('author'), cached=scrape_cached)
+
+        # Step 2: Summarize the content
+        mark_stage("summarize")
+        with span("summarize"):
+            summary_result = await run_stage(
+                "summarize",
+                self._scheduled(self.llm_scheduler, self.summarizer.summarize_thread(thread_data))
+            )
+
+        if not summary_result['success']:
+            PIPELINE_FAILURES.inc(cause="summarize")
+            raise PipelineError(
+                f"Failed to generate summary: {summary_result.get('error', 'Unknown error')}",
+                status_code=500
+            )
+
+        summary = {
+            "bullet_points": summary_result['summary']['bullet_points'],
+            "author": summary_result['summary']['author'],
+            "tweet_count": summary_result['summary']['tweet_count']
+        }
+        self.publish(status_id, url, thread_data, summary)
+        return summary, summary_result.get('usage')
+
+    def publish(self, status_id: Optional[str], url: str, thread_data: Dict[str, Any], summary: Dict[str, Any]):
+        """
+        Make a new summary the one every reader gets
+        """
+        self.cache_set("summary", status_id, summary)
+        self.cache_delete(FRAGMENT_NAMESPACE, status_id)
+
+        # Persist off the request path; the store batches writes in the background
+        if self.store:
+            self.store.save(status_id, thread_data, summary, original_url=url)
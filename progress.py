@@ -0,0 +1,64 @@
+import logging
+import time
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Stage events, in the order a pipeline run emits them
+QUEUED = 'queued'
+SCRAPING = 'scraping'
+PARSED = 'parsed'
+SUMMARIZING = 'summarizing'
+FALLBACK = 'fallback'
+DONE = 'done'
+ERROR = 'error'
+
+Listener = Callable[[Dict[str, any]], None]
+
+class ProgressFeed:
+    """
+    Fan-out of stage events from one pipeline run to everyone waiting on it.
+
+    A subscriber that joins a run already in progress is first sent the
+    latest event, so it sees the current stage rather than nothing until the
+    next transition.
+    """
+    __slots__ = ('listeners', 'last')
+
+    def __init__(self):
+        self.listeners: List[Listener] = []
+        self.last: Optional[Dict[str, any]] = None
+
+    def subscribe(self, listener: Listener):
+        self.listeners.append(listener)
+        if self.last is not None:
+            listener(self.last)
+
+    def unsubscribe(self, listener: Listener):
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+
+    def publish(self, event: str, **data):
+        message = {'event': event, 'at': round(time.time(), 3), **data}
+        self.last = message
+        for listener in list(self.listeners):
+            try:
+                listener(message)
+            except Exception as e:
+                # A broken subscriber must not fail the pipeline it watches
+                logger.warning(f"Progress listener failed on {event}: {str(e)}")
+
+# Feed of the pipeline run the current task belongs to
+_current_feed: ContextVar[Optional[ProgressFeed]] = ContextVar('progress_feed', default=None)
+
+def bind_feed(feed: Optional[ProgressFeed]):
+    _current_feed.set(feed)
+
+def report(event: str, **data):
+    """
+    Publish a stage event for the current pipeline run, if anyone is listening
+    """
+    feed = _current_feed.get()
+    if feed is not None:
+        feed.publish(event, **data)
@@ -0,0 +1,267 @@
+import asyncio
+import hashlib
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+HIT = 'hit'
+MISS = 'miss'
+
+class RateLimitExceeded(Exception):
+    """
+    Raised when a client has no tokens left for the requested kind of work
+    """
+    def __init__(self, client: str, kind: str, retry_after: int):
+        super().__init__(f"Rate limit exceeded for cache-{kind} requests")
+        self.client = client
+        self.kind = kind
+        self.retry_after = retry_after
+
+def _refill(tokens: float, updated_at: float, now: float, rate: float, burst: float) -> float:
+    return min(burst, tokens + max(0.0, now - updated_at) * rate)
+
+def _admits(tokens: float, cost: float, burst: float) -> bool:
+    # A charge larger than the burst needs a full bucket and leaves it in debt,
+    # so it is admissible at all but still paid for before the next request
+    return tokens >= min(cost, burst)
+
+class MemoryBucketStore:
+    """
+    Token buckets and usage counters kept in this process only
+    """
+    # Takes are dict updates, cheap enough for the event loop
+    blocking = False
+
+    def __init__(self):
+        self._buckets: Dict[Tuple[str, str], Tuple[float, float]] = {}
+        self._usage: Dict[Tuple[str, str], List[float]] = {}
+
+    def take(self, client: str, kind: str, rate: float, burst: float, now: float,
+             cost: float = 1) -> Tuple[bool, float]:
+        """
+        Refill the bucket, try to take `cost` tokens and return (allowed, tokens left)
+        """
+        tokens, updated_at = self._buckets.get((client, kind), (burst, now))
+        tokens = _refill(tokens, updated_at, now, rate, burst)
+        allowed = _admits(tokens, cost, burst)
+        if allowed:
+            tokens -= cost
+        self._buckets[(client, kind)] = (tokens, now)
+
+        usage = self._usage.setdefault((client, kind), [0, 0, now])
+        usage[0 if allowed else 1] += cost
+        usage[2] = now
+        return allowed, tokens
+
+    def usage(self) -> List[Dict[str, any]]:
+        return [
+            {'client': client, 'kind': kind, 'allowed': int(allowed), 'rejected': int(rejected), 'last_seen': last_seen}
+            for (client, kind), (allowed, rejected, last_seen) in sorted(self._usage.items())
+        ]
+
+class SQLiteBucketStore:
+    """
+    Token buckets and usage counters in a SQLite file shared by all workers.
+
+    Each take runs in an IMMEDIATE transaction, so concurrent workers
+    serialize on the bucket update and a client's limit holds across the
+    whole deployment rather than per process. A take can wait up to the
+    5 second busy timeout for another worker's transaction, so the limiter
+    runs it in a worker thread rather than on the event loop.
+    """
+    blocking = True
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        conn = self._connection()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS rate_buckets (
+                client TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                tokens REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (client, kind)
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS rate_usage (
+                client TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                allowed INTEGER NOT NULL DEFAULT 0,
+                rejected INTEGER NOT NULL DEFAULT 0,
+                last_seen REAL NOT NULL,
+                PRIMARY KEY (client, kind)
+            )
+        """)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def take(self, client: str, kind: str, rate: float, burst: float, now: float,
+             cost: float = 1) -> Tuple[bool, float]:
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT tokens, updated_at FROM rate_buckets WHERE client = ? AND kind = ?",
+                (client, kind)
+            ).fetchone()
+            tokens = _refill(row[0], row[1], now, rate, burst) if row else burst
+            allowed = _admits(tokens, cost, burst)
+            if allowed:
+                tokens -= cost
+
+            conn.execute(
+                "INSERT OR REPLACE INTO rate_buckets (client, kind, tokens, updated_at) VALUES (?, ?, ?, ?)",
+                (client, kind, tokens, now)
+            )
+            conn.execute(f"""
+                INSERT INTO rate_usage (client, kind, allowed, rejected, last_seen) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (client, kind) DO UPDATE SET
+                    {'allowed = allowed + excluded.allowed' if allowed else 'rejected = rejected + excluded.rejected'},
+                    last_seen = excluded.last_seen
+            """, (client, kind, int(cost) if allowed else 0, 0 if allowed else int(cost), now))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return allowed, tokens
+
+    def usage(self) -> List[Dict[str, any]]:
+        rows = self._connection().execute(
+            "SELECT client, kind, allowed, rejected, last_seen FROM rate_usage ORDER BY client, kind"
+        ).fetchall()
+        return [
+            {'client': client, 'kind': kind, 'allowed': allowed, 'rejected': rejected, 'last_seen': last_seen}
+            for client, kind, allowed, rejected, last_seen in rows
+        ]
+
+class RateLimitState:
+    """
+    Client identity and latest bucket decision for one request
+    """
+    __slots__ = ('client', 'kind', 'limit', 'remaining', 'reset', 'window')
+
+    def __init__(self, client: str):
+        self.client = client
+        self.kind: Optional[str] = None
+        self.limit = 0
+        self.remaining = 0
+        self.reset = 0
+        self.window = 0
+
+    def headers(self) -> Dict[str, str]:
+        """
+        RateLimit-* response headers for the bucket this request drew from
+        """
+        if self.kind is None:
+            return {}
+        return {
+            'RateLimit-Limit': str(self.limit),
+            'RateLimit-Remaining': str(self.remaining),
+            'RateLimit-Reset': str(self.reset),
+            'RateLimit-Policy': f'{self.limit};w={self.window};comment="cache {self.kind}"'
+        }
+
+# Set by the API middleware; tasks started by the request inherit it
+_current_state: ContextVar[Optional[RateLimitState]] = ContextVar('rate_limit_state', default=None)
+
+def client_id(api_key: Optional[str], host: Optional[str]) -> str:
+    """
+    Identify a client by API key (hashed, so raw keys are never stored) or by IP
+    """
+    if api_key:
+        return 'key:' + hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:12]
+    return f"ip:{host or 'unknown'}"
+
+def begin_request(client: str) -> RateLimitState:
+    state = RateLimitState(client)
+    _current_state.set(state)
+    return state
+
+class RateLimiter:
+    """
+    Per-client token buckets with separate limits for cache hits and misses.
+
+    A miss costs a Firecrawl scrape and an LLM call while a hit costs a cache
+    read, so each kind gets its own rate (tokens per minute) and burst size.
+    A rate of 0 leaves that kind unlimited. Requests covering several threads
+    are charged once with a `weight` of one token per thread.
+    """
+    def __init__(self, store, limits: Dict[str, Tuple[float, float]]):
+        self.store = store
+        self.limits = limits
+
+    async def consume(self, kind: str, weight: int = 1):
+        """
+        Charge the current request's client for `weight` units of `kind`
+        """
+        state = _current_state.get()
+        per_minute, burst = self.limits.get(kind, (0, 0))
+        if state is None or per_minute <= 0 or weight <= 0:
+            return
+
+        rate = per_minute / 60.0
+        burst = max(1.0, burst)
+        take = (state.client, kind, rate, burst, time.time(), weight)
+        try:
+            if self.store.blocking:
+                allowed, tokens = await asyncio.to_thread(self.store.take, *take)
+            else:
+                allowed, tokens = self.store.take(*take)
+        except Exception as e:
+            # Fail open: a broken limiter store must not take the API down
+            logger.warning(f"Rate limit store failed for {state.client}: {str(e)}")
+            return
+
+        state.kind = kind
+        state.limit = int(burst)
+        state.remaining = max(0, int(tokens))
+        state.reset = math.ceil((burst - tokens) / rate)
+        state.window = math.ceil(burst / rate)
+
+        if not allowed:
+            raise RateLimitExceeded(state.client, kind, retry_after=math.ceil((min(weight, burst) - tokens) / rate))
+
+    def usage(self) -> List[Dict[str, any]]:
+        return self.store.usage()
+
+def create_rate_limiter_from_env() -> RateLimiter:
+    """
+    Build the limiter from RATE_LIMIT_* settings.
+
+    RATE_LIMIT_PATH names the SQLite file shared by workers; an empty value
+    keeps buckets in process memory.
+    """
+    limits = {
+        HIT: (float(os.getenv('RATE_LIMIT_HITS_PER_MINUTE', 600)), float(os.getenv('RATE_LIMIT_HIT_BURST', 60))),
+        MISS: (float(os.getenv('RATE_LIMIT_MISSES_PER_MINUTE', 10)), float(os.getenv('RATE_LIMIT_MISS_BURST', 5)))
+    }
+
+    path = os.getenv('RATE_LIMIT_PATH', '.cache/ratelimit.db')
+    store = None
+    if path:
+        try:
+            store = SQLiteBucketStore(path)
+        except Exception as e:
+            logger.error(f"Failed to open rate limit store at {path}, limiting per process: {str(e)}")
+
+    return RateLimiter(store or MemoryBucketStore(), limits)
@@ -0,0 +1,194 @@
+import asyncio
+import logging
+import math
+import os
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Awaitable, Deque, Dict, Optional, TypeVar
+
+from metrics import SCHEDULER_QUEUE_DEPTH, SCHEDULER_WAIT, SCHEDULER_ACTIVE
+from progress import report, QUEUED
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+INTERACTIVE = 'interactive'
+BATCH = 'batch'
+DEFAULT_WEIGHTS = {INTERACTIVE: 8, BATCH: 1}
+
+# Priority class of the current request; asyncio tasks (including shared
+# pipeline runs) inherit it from the request that started them
+_current_priority: ContextVar[str] = ContextVar('current_priority', default=INTERACTIVE)
+
+def set_priority(priority: str):
+    _current_priority.set(priority)
+
+def current_priority() -> str:
+    return _current_priority.get()
+
+def parse_weights(value: Optional[str]) -> Dict[str, float]:
+    """
+    Parse "interactive=8,batch=1" into class weights, falling back to the defaults
+    """
+    weights = dict(DEFAULT_WEIGHTS)
+    for item in (value or '').split(','):
+        name, _, weight = item.partition('=')
+        try:
+            if name.strip() and float(weight) > 0:
+                weights[name.strip()] = float(weight)
+        except ValueError:
+            logger.warning(f"Ignoring invalid priority weight: {item}")
+    return weights
+
+class PriorityScheduler:
+    """
+    Weighted fair scheduler limiting concurrent use of one backend.
+
+    Work runs immediately while there is spare capacity, so batch traffic can
+    use whatever interactive traffic leaves idle. Once the backend is full,
+    callers queue per priority class and each freed slot goes to the class
+    whose virtual clock would be lowest after being served; a class advances
+    its clock by 1/weight per slot it receives. With the default
+    8:1 weights interactive requests overtake queued batch work while batch
+    still gets a share and never starves.
+    """
+    def __init__(self, name: str, capacity: int, weights: Optional[Dict[str, float]] = None):
+        self.name = name
+        self.capacity = max(1, capacity)
+        self.weights = weights or dict(DEFAULT_WEIGHTS)
+        self.active = 0
+        self._queues: Dict[str, Deque[asyncio.Future]] = {cls: deque() for cls in self.weights}
+        self._virtual_time: Dict[str, float] = {cls: 0.0 for cls in self.weights}
+
+    def queue_depth(self, priority: str) -> int:
+        return len(self._queues.get(priority, ()))
+
+    def stats(self) -> Dict[str, any]:
+        return {
+            'capacity': self.capacity,
+            'active': self.active,
+            'queued': {cls: len(queue) for cls, queue in self._queues.items()}
+        }
+
+    async def run(self, awaitable: Awaitable[T], priority: Optional[str] = None) -> T:
+        """
+        Await `awaitable` once a slot is granted to this priority class
+        """
+        priority = priority or current_priority()
+        if priority not in self._queues:
+            priority = BATCH if BATCH in self._queues else next(iter(self._queues))
+
+        queued_at = time.monotonic()
+        if self.active < self.capacity and not any(self._queues.values()):
+            self.active += 1
+        else:
+            report(QUEUED, scheduler=self.name, priority=priority,
+                   ahead=sum(len(queue) for queue in self._queues.values()))
+            try:
+                await self._wait_for_slot(priority)
+            except asyncio.CancelledError:
+                if asyncio.iscoroutine(awaitable):
+                    awaitable.close()
+                raise
+
+        SCHEDULER_WAIT.observe(time.monotonic() - queued_at, scheduler=self.name, priority=priority)
+        SCHEDULER_ACTIVE.set(self.active, scheduler=self.name)
+        try:
+            return await awaitable
+        finally:
+            self._release()
+
+    async def _wait_for_slot(self, priority: str):
+        queue = self._queues[priority]
+        if not queue:
+            # A class that sat idle may not bank credit: it rejoins at the
+            # clock of the busiest competitor rather than where it left off
+            busy = [self._virtual_time[cls] for cls, other in self._queues.items() if other]
+            if busy:
+                self._virtual_time[priority] = max(self._virtual_time[priority], min(busy))
+
+        future = asyncio.get_running_loop().create_future()
+        queue.append(future)
+        SCHEDULER_QUEUE_DEPTH.set(len(queue), scheduler=self.name, priority=priority)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just as we were cancelled; pass it on
+                self._release()
+            elif future in queue:
+                queue.remove(future)
+                SCHEDULER_QUEUE_DEPTH.set(len(queue), scheduler=self.name, priority=priority)
+            raise
+
+    def _release(self):
+        """
+        Hand the freed slot to the next waiter, or return it to the pool
+        """
+        while True:
+            waiting = [cls for cls, queue in self._queues.items() if queue]
+            if not waiting:
+                self.active -= 1
+                SCHEDULER_ACTIVE.set(self.active, scheduler=self.name)
+                return
+
+            # Lowest virtual finish time wins, as in weighted fair queueing
+            priority = min(waiting, key=lambda cls: self._virtual_time[cls] + 1.0 / self.weights[cls])
+            queue = self._queues[priority]
+            future = queue.popleft()
+            SCHEDULER_QUEUE_DEPTH.set(len(queue), scheduler=self.name, priority=priority)
+            # Skip waiters cancelled but not yet resumed to dequeue themselves
+            if not future.done():
+                self._virtual_time[priority] += 1.0 / self.weights[priority]
+                future.set_result(None)
+                return
+
+def _cgroup_cpu_limit(cgroup_root: str) -> Optional[float]:
+    """
+    CPU quota of the process's cgroup in cores (v2 cpu.max, else v1 CFS files), or None if unlimited
+    """
+    try:
+        with open(os.path.join(cgroup_root, 'cpu.max')) as f:
+            # "<quota> <period>" in microseconds, or "max <period>"
+            fields = f.read().split()
+        if fields[0] == 'max':
+            return None
+        return int(fields[0]) / int(fields[1] if len(fields) > 1 else 100000)
+    except (OSError, ValueError, IndexError, ZeroDivisionError):
+        pass
+    try:
+        with open(os.path.join(cgroup_root, 'cpu', 'cpu.cfs_quota_us')) as f:
+            quota = int(f.read())
+        with open(os.path.join(cgroup_root, 'cpu', 'cpu.cfs_period_us')) as f:
+            period = int(f.read())
+        return quota / period if quota > 0 and period > 0 else None
+    except (OSError, ValueError):
+        return None
+
+def available_cpus(cgroup_root: str = '/sys/fs/cgroup') -> int:
+    """
+    CPUs this process may actually use.
+
+    os.cpu_count() reports the host's cores; in a container the affinity
+    mask and the cgroup CPU quota are usually much smaller.
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    limit = _cgroup_cpu_limit(cgroup_root)
+    if limit is not None:
+        cpus = min(cpus, math.ceil(limit))
+    return max(1, cpus)
+
+def create_scheduler_from_env(name: str, env_var: str, default_capacity: int) -> PriorityScheduler:
+    """
+    Build a scheduler whose capacity comes from env_var and weights from PRIORITY_WEIGHTS
+    """
+    return PriorityScheduler(
+        name,
+        int(os.getenv(env_var) or default_capacity),
+        parse_weights(os.getenv('PRIORITY_WEIGHTS'))
+    )
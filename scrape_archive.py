@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Append-only archive of raw Firecrawl payloads, plus a bulk re-parse command.
+
+Every scrape is stored as a zlib-compressed JSON record in a segment file.
+Each segment has a sidecar offset index so single records can be read back
+without scanning, and segments are memory-mapped for reading. When the
+markdown parser improves, past scrapes can be re-parsed locally instead of
+paying Firecrawl again:
+
+    python scrape_archive.py reparse --workers 8 --output reparsed.jsonl
+"""
+
+import argparse
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process appends only
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Record framing: magic, compressed length, CRC32 of the compressed bytes
+RECORD_MAGIC = b'XTSR'
+RECORD_HEADER = struct.Struct('<4sII')
+SEGMENT_MAX_BYTES = 64 * 1024 * 1024
+
+class ScrapeArchive:
+    """
+    Compressed, append-only segment store of raw scrape payloads
+    """
+    def __init__(self, directory: str, segment_max_bytes: int = SEGMENT_MAX_BYTES):
+        self.directory = directory
+        self.segment_max_bytes = segment_max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def segments(self) -> List[str]:
+        """
+        Return segment paths in write order
+        """
+        names = sorted(name for name in os.listdir(self.directory) if name.endswith('.seg'))
+        return [os.path.join(self.directory, name) for name in names]
+
+    def _active_segment(self) -> str:
+        segments = self.segments()
+        if segments and os.path.getsize(segments[-1]) < self.segment_max_bytes:
+            return segments[-1]
+        number = int(os.path.basename(segments[-1])[8:14]) + 1 if segments else 1
+        return os.path.join(self.directory, f'segment-{number:06d}.seg')
+
+    def append(self, status_id: str, url: str, payload: Dict[str, any]) -> Tuple[str, int]:
+        """
+        Compress and append one raw payload, returning (segment, offset)
+        """
+        record = {
+            'status_id': status_id,
+            'url': url,
+            'scraped_at': time.time(),
+            'payload': payload
+        }
+        data = zlib.compress(json.dumps(record, default=str).encode('utf-8'), 6)
+        frame = RECORD_HEADER.pack(RECORD_MAGIC, len(data), zlib.crc32(data)) + data
+
+        with self._lock:
+            segment = self._active_segment()
+            with open(segment, 'ab') as seg_file:
+                # Workers share segments, so hold an exclusive lock while the
+                # offset is taken and the frame and index entry are written
+                if fcntl:
+                    fcntl.flock(seg_file.fileno(), fcntl.LOCK_EX)
+                try:
+                    offset = seg_file.seek(0, os.SEEK_END)
+                    seg_file.write(frame)
+                    seg_file.flush()
+                    with open(segment[:-4] + '.idx', 'a', encoding='utf-8') as index_file:
+                        index_file.write(f"{status_id}\t{offset}\t{len(frame)}\t{record['scraped_at']:.3f}\n")
+                finally:
+                    if fcntl:
+                        fcntl.flock(seg_file.fileno(), fcntl.LOCK_UN)
+
+        return segment, offset
+
+    def lookup(self, status_id: str) -> Optional[Dict[str, any]]:
+        """
+        Return the most recent archived record for a status ID
+        """
+        for segment in reversed(self.segments()):
+            index_path = segment[:-4] + '.idx'
+            if not os.path.exists(index_path):
+                continue
+            latest = None
+            with open(index_path, encoding='utf-8') as index_file:
+                for line in index_file:
+                    parts = line.rstrip('\n').split('\t')
+                    if len(parts) >= 3 and parts[0] == status_id:
+                        latest = (int(parts[1]), int(parts[2]))
+            if latest:
+                with open(segment, 'rb') as seg_file:
+                    seg_file.seek(latest[0])
+                    return _decode_frame(seg_file.read(latest[1]), 0)[0]
+        return None
+
+def _decode_frame(buffer, offset: int) -> Tuple[Optional[Dict[str, any]], int]:
+    """
+    Decode the record framed at offset, returning (record, next_offset).
+
+    A truncated or corrupt tail (e.g. a crash mid-append) yields (None, -1).
+    """
+    if offset + RECORD_HEADER.size > len(buffer):
+        return None, -1
+    magic, length, crc = RECORD_HEADER.unpack_from(buffer, offset)
+    start = offset + RECORD_HEADER.size
+    data = buffer[start:start + length]
+    if magic != RECORD_MAGIC or len(data) != length or zlib.crc32(data) != crc:
+        return None, -1
+    return json.loads(zlib.decompress(data)), start + length
+
+def iter_segment(segment: str) -> Iterator[Dict[str, any]]:
+    """
+    Yield every record in a segment by scanning a read-only memory map
+    """
+    if os.path.getsize(segment) == 0:
+        return
+    with open(segment, 'rb') as seg_file:
+        with mmap.mmap(seg_file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            offset = 0
+            while offset < len(buffer):
+                record, offset = _decode_frame(buffer, offset)
+                if record is None:
+                    logger.warning(f"Stopping at corrupt or truncated record in {segment}")
+                    return
+                yield record
+
+def create_archive_from_env() -> Optional[ScrapeArchive]:
+    """
+    Build the archive from SCRAPE_ARCHIVE_DIR; an empty value disables it
+    """
+    directory = os.getenv('SCRAPE_ARCHIVE_DIR', '.cache/scrape_archive')
+    if not directory:
+        return None
+
+    try:
+        return ScrapeArchive(directory)
+    except Exception as e:
+        logger.error(f"Failed to open scrape archive at {directory}: {str(e)}")
+        return None
+
+def _reparse_segment(segment: str) -> Dict[str, any]:
+    """
+    Re-run the current markdown parser over one segment (process pool worker)
+    """
+    from xthread_scraper import ThreadScraper, PARSER_VERSION
+
+    # The parser needs no Firecrawl client, so skip __init__
+    scraper = ThreadScraper.__new__(ThreadScraper)
+    results = []
+    raw_bytes = 0
+
+    for record in iter_segment(segment):
+        markdown = (record.get('payload') or {}).get('markdown') or ''
+        raw_bytes += len(markdown)
+        result = {
+            'status_id': record.get('status_id'),
+            'url': record.get('url'),
+            'scraped_at': record.get('scraped_at'),
+            'parser_version': PARSER_VERSION
+        }
+        try:
+            result['thread_data'] = scraper._process_scraped_content(markdown, record.get('url', ''))
+            result['success'] = True
+        except Exception as e:
+            result['success'] = False
+            result['error'] = str(e)
+        results.append(result)
+
+    return {'segment': segment, 'results': results, 'raw_bytes': raw_bytes}
+
+def reparse(archive: ScrapeArchive, workers: int, output: Optional[str], update_cache: bool) -> Dict[str, any]:
+    """
+    Fan segments out across a process pool and collect the re-parsed threads
+    """
+    segments = archive.segments()
+    cache = None
+    if update_cache:
+        from cache import create_cache_from_env
+        cache = create_cache_from_env()
+
+    start = time.perf_counter()
+    totals = {'segments': len(segments), 'records': 0, 'succeeded': 0, 'failed': 0, 'raw_bytes': 0}
+    out_file = open(output, 'w', encoding='utf-8') if output else None
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_reparse_segment, segment) for segment in segments]
+            for future in as_completed(futures):
+                segment_result = future.result()
+                totals['raw_bytes'] += segment_result['raw_bytes']
+                for result in segment_result['results']:
+                    totals['records'] += 1
+                    totals['succeeded' if result['success'] else 'failed'] += 1
+                    if out_file:
+                        out_file.write(json.dumps(result) + '\n')
+                    if cache and result['success'] and result['status_id']:
+                        cache.set('scrape', result['status_id'], result['thread_data'])
+
+                elapsed = time.perf_counter() - start
+                print(
+                    f"[{os.path.basename(segment_result['segment'])}] "
+                    f"{totals['records']} records, {totals['records'] / elapsed:.1f} records/s"
+                )
+    finally:
+        if out_file:
+            out_file.close()
+
+    elapsed = time.perf_counter() - start
+    totals['elapsed_seconds'] = round(elapsed, 3)
+    totals['records_per_second'] = round(totals['records'] / elapsed, 1) if elapsed else 0.0
+    totals['mb_per_second'] = round(totals['raw_bytes'] / elapsed / 1e6, 2) if elapsed else 0.0
+    return totals
+
+def main():
+    from dotenv import load_dotenv
+    from scheduler import available_cpus
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Raw scrape archive tools")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    reparse_parser = subparsers.add_parser('reparse', help="Re-parse archived scrapes with the current parser")
+    reparse_parser.add_argument('--archive-dir', default=os.getenv('SCRAPE_ARCHIVE_DIR', '.cache/scrape_archive'))
+    reparse_parser.add_argument('--workers', type=int, default=available_cpus())
+    reparse_parser.add_argument('--output', help="Write re-parsed threads as JSONL to this file")
+    reparse_parser.add_argument('--update-cache', action='store_true',
+                                help="Replace cached scrapes with the re-parsed threads")
+
+    args = parser.parse_args()
+
+    if args.command == 'reparse':
+        from xthread_scraper import PARSER_VERSION
+        archive = ScrapeArchive(args.archive_dir)
+        print(f"Re-parsing {len(archive.segments())} segments with parser version {PARSER_VERSION}...")
+        totals = reparse(archive, args.workers, args.output, args.update_cache)
+        print(json.dumps(totals, indent=2))
+
+if __name__ == '__main__':
+    main()
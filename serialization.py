@@ -0,0 +1,74 @@
+import dataclasses
+import json
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# Name of the encoder in use, reported by the serialization benchmark
+BACKEND = 'orjson' if orjson else 'json'
+
+@dataclass(slots=True)
+class ThreadSummary:
+    """
+    Summary of one thread as returned to API clients
+    """
+    bullet_points: List[str]
+    author: str
+    tweet_count: int
+    original_url: str
+    processing_time_seconds: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'bullet_points': self.bullet_points,
+            'author': self.author,
+            'tweet_count': self.tweet_count,
+            'original_url': self.original_url,
+            'processing_time_seconds': self.processing_time_seconds
+        }
+
+@dataclass(slots=True)
+class SummaryResult:
+    """
+    Response body of POST /api/summarize.
+
+    Built from values the pipeline already validated, so it skips model
+    validation entirely; `dumps` writes it straight to JSON bytes.
+    """
+    success: bool
+    summary: Optional[ThreadSummary] = None
+    error: Optional[str] = None
+    processing_time: Optional[float] = None
+    usage: Optional[Dict[str, Any]] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'success': self.success,
+            'summary': self.summary.to_dict() if self.summary is not None else None,
+            'error': self.error,
+            'processing_time': self.processing_time,
+            'usage': self.usage
+        }
+
+def _default(value):
+    # The stdlib fallback's hook for the response dataclasses
+    if hasattr(value, 'to_dict'):
+        return value.to_dict()
+    if dataclasses.is_dataclass(value):
+        return dataclasses.asdict(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps(value) -> bytes:
+    """
+    Compact UTF-8 JSON, with orjson when installed and the stdlib otherwise
+    """
+    if orjson:
+        return orjson.dumps(value, default=_default)
+    return json.dumps(value, default=_default, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
@@ -6,15 +6,7 @@
 const AppState = {
     isLoading: false,
     currentStep: 0,
-    processingTexts: [
-        'Analyzing content...',
-        'Extracting key insights...',
-        'Processing thread structure...',
-        'Identifying main themes...',
-        'Generating summary points...',
-        'Finalizing results...'
-    ],
-    currentProcessingIndex: 0
+    activeJobId: null
 };
 
 // DOM Elements Cache
@@ -139,7 +131,12 @@ function handleFormSubmit(e) {
     }
     
     setLoadingState(true);
-    startProcessingAnimation();
+    
+    // Without WebSockets the form posts normally and the page waits for the result
+    if (!('WebSocket' in window)) return;
+    
+    e.preventDefault();
+    startProgressTracking(Elements.urlInput.value.trim());
 }
 
 function createRippleEffect(e) {
@@ -317,77 +314,148 @@ function setLoadingState(loading) {
     }
 }
 
-function startProcessingAnimation() {
-    if (!Elements.loading) return;
+// ===========================
+// LIVE PROGRESS
+// ===========================
+
+// One WebSocket shared by every summary in flight; frames carry the summary id
+const ProgressSocket = {
+    socket: null,
+    opening: null,
+    listeners: new Map(),
+    nextId: 1,
     
-    AppState.currentStep = 0;
-    AppState.currentProcessingIndex = 0;
+    connect() {
+        if (this.socket && this.socket.readyState === WebSocket.OPEN) {
+            return Promise.resolve(this.socket);
+        }
+        if (this.opening) return this.opening;
+        
+        const scheme = window.location.protocol === 'https:' ? 'wss' : 'ws';
+        this.opening = new Promise((resolve, reject) => {
+            const socket = new WebSocket(`${scheme}://${window.location.host}/ws/progress`);
+            
+            socket.addEventListener('open', () => {
+                this.socket = socket;
+                this.opening = null;
+                resolve(socket);
+            });
+            socket.addEventListener('message', (e) => this.dispatch(JSON.parse(e.data)));
+            socket.addEventListener('close', () => {
+                this.socket = null;
+                this.opening = null;
+                reject(new Error('Progress connection closed'));
+                
+                // Summaries still running on the server can no longer report back
+                this.listeners.forEach(listener => listener({
+                    event: 'error',
+                    error: 'Lost connection to the server',
+                    status_code: 0
+                }));
+                this.listeners.clear();
+            });
+        });
+        
+        return this.opening;
+    },
     
-    // Start typing animation
-    startTypingAnimation();
+    dispatch(message) {
+        const listener = this.listeners.get(message.id);
+        if (!listener) return;
+        
+        if (message.event === 'done' || message.event === 'error') {
+            this.listeners.delete(message.id);
+        }
+        listener(message);
+    },
     
-    // Start pipeline animation
-    setTimeout(() => {
-        animateProcessingPipeline();
-    }, 1000);
-}
+    async summarize(url, listener) {
+        const socket = await this.connect();
+        const id = `job-${this.nextId++}`;
+        
+        this.listeners.set(id, listener);
+        socket.send(JSON.stringify({ id, url }));
+        return id;
+    },
+    
+    cancel(id) {
+        if (this.listeners.delete(id) && this.socket) {
+            this.socket.send(JSON.stringify({ id, cancel: true }));
+        }
+    }
+};
 
-function startTypingAnimation() {
-    if (!Elements.typingText) return;
+async function startProgressTracking(url) {
+    resetPipeline();
+    setProgressText('Connecting...');
     
-    const typeText = (text, callback) => {
-        Elements.typingText.textContent = '';
-        let index = 0;
-        
-        const typeInterval = setInterval(() => {
-            if (index < text.length) {
-                Elements.typingText.textContent += text[index];
-                index++;
+    try {
+        AppState.activeJobId = await ProgressSocket.summarize(url, renderProgressEvent);
+    } catch (err) {
+        // No live progress available; fall back to a plain form post
+        Elements.form.submit();
+    }
+}
+
+function renderProgressEvent(message) {
+    switch (message.event) {
+        case 'queued':
+            setProgressText(`Waiting for a free ${message.scheduler} slot (${message.ahead} ahead)`);
+            break;
+        case 'scraping':
+            setPipelineStep(1);
+            setProgressText(message.retry
+                ? `Thread looked incomplete, waiting ${message.wait_ms / 1000}s for more tweets...`
+                : 'Scraping thread...');
+            break;
+        case 'parsed':
+            setPipelineStep(2);
+            setProgressText(`Parsed ${message.tweet_count} tweets by ${message.author}`);
+            break;
+        case 'summarizing':
+            setPipelineStep(3);
+            setProgressText(`Summarizing with ${message.provider} (${message.model})...`);
+            break;
+        case 'fallback':
+            setProgressText(`${message.from_provider} failed, falling back to ${message.to_provider}...`);
+            break;
+        case 'done':
+            AppState.activeJobId = null;
+            setPipelineStep(3);
+            setProgressText('Done! Rendering summary...');
+            // Open the cached result page; posting the form again would charge
+            // the request twice and rerun the pipeline without a cache
+            if (message.status_id) {
+                window.location.assign(`/thread/${encodeURIComponent(message.status_id)}`);
             } else {
-                clearInterval(typeInterval);
-                if (callback) callback();
+                Elements.form.submit();
             }
-        }, 50);
-    };
-    
-    const cycleTexts = () => {
-        const currentText = AppState.processingTexts[AppState.currentProcessingIndex];
-        
-        typeText(currentText, () => {
-            setTimeout(() => {
-                AppState.currentProcessingIndex = 
-                    (AppState.currentProcessingIndex + 1) % AppState.processingTexts.length;
-                cycleTexts();
-            }, 1500);
-        });
-    };
-    
-    cycleTexts();
+            break;
+        case 'error':
+            AppState.activeJobId = null;
+            setLoadingState(false);
+            if (message.status_code !== 499) {
+                showError(message.error);
+            }
+            break;
+    }
 }
 
-function animateProcessingPipeline() {
-    const steps = document.querySelectorAll('.pipeline-step');
-    
-    if (steps.length === 0) return;
-    
-    const animateStep = (index) => {
-        if (index >= steps.length) {
-            // Restart animation
-            setTimeout(() => {
-                steps.forEach(step => step.classList.remove('active'));
-                setTimeout(() => animateStep(0), 500);
-            }, 2000);
-            return;
-        }
-        
-        steps[index].classList.add('active');
-        
-        setTimeout(() => {
-            animateStep(index + 1);
-        }, 1500);
-    };
-    
-    animateStep(0);
+function setProgressText(text) {
+    if (Elements.typingText) {
+        Elements.typingText.textContent = text;
+    }
+}
+
+function setPipelineStep(step) {
+    AppState.currentStep = step;
+    document.querySelectorAll('.pipeline-step').forEach(element => {
+        element.classList.toggle('active', parseInt(element.dataset.step) <= step);
+    });
+}
+
+function resetPipeline() {
+    setPipelineStep(0);
 }
 
 // ===========================
@@ -488,17 +556,20 @@ function copyAllPoints() {
 
 function shareResults() {
     const author = document.querySelector('.author-info .value')?.textContent || 'Unknown';
+    // Link to the thread's own result page rather than the form POST target
+    const sharePath = document.querySelector('.results-section')?.dataset.shareUrl || window.location.pathname;
+    const shareUrl = new URL(sharePath, window.location.origin).href;
     
     if (navigator.share) {
         const shareData = {
             title: `Thread Summary by ${author}`,
             text: 'Check out this AI-generated thread summary!',
-            url: window.location.href
+            url: shareUrl
         };
         
         navigator.share(shareData).catch(console.error);
     } else {
-        copyToClipboard(window.location.href).then(() => {
+        copyToClipboard(shareUrl).then(() => {
             showCopyFeedback(document.querySelector('[onclick="shareResults()"]'), 'Link copied!');
         });
     }
@@ -547,6 +618,11 @@ function resetForm() {
         Elements.urlInput.focus();
     }
     
+    if (AppState.activeJobId) {
+        ProgressSocket.cancel(AppState.activeJobId);
+        AppState.activeJobId = null;
+    }
+    
     setLoadingState(false);
     
     // Hide results and errors with animation
@@ -769,6 +845,7 @@ if (typeof module !== 'undefined' && module.exports) {
     module.exports = {
         AppState,
         Elements,
+        ProgressSocket,
         isValidUrl,
         copyToClipboard,
         debounce,
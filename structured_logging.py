@@ -0,0 +1,183 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+from contextvars import ContextVar
+from typing import Dict, Optional, TextIO
+
+from metrics import LOG_RECORDS_DROPPED
+
+TEXT_FORMAT = '%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s'
+
+# Request the current task is serving; stamped on every record it logs
+_request_id: ContextVar[Optional[str]] = ContextVar('request_id', default=None)
+
+# Attributes every record has; anything else was passed with `extra=` and becomes a field
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {
+    'message', 'asctime', 'request_id'
+}
+
+def bind_request_id(request_id: Optional[str]):
+    _request_id.set(request_id)
+
+def current_request_id() -> Optional[str]:
+    return _request_id.get()
+
+class RequestContextFilter(logging.Filter):
+    """
+    Copy the request ID onto the record while still in the logging task
+    """
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = _request_id.get()
+        return True
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep only a fraction of the records below WARNING from high-volume loggers.
+
+    Rates are keyed by logger name and also apply to its child loggers;
+    warnings and errors are always kept.
+    """
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = {name: max(0.0, min(1.0, rate)) for name, rate in rates.items()}
+        self._resolved: Dict[str, float] = {}
+
+    def rate(self, name: str) -> float:
+        rate = self._resolved.get(name)
+        if rate is None:
+            # Nearest configured ancestor, e.g. 'a' for 'a.b.c'
+            parts = name.split('.')
+            rate = next((self.rates['.'.join(parts[:end])] for end in range(len(parts), 0, -1)
+                         if '.'.join(parts[:end]) in self.rates), 1.0)
+            self._resolved[name] = rate
+        return rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rate(record.name)
+        if rate >= 1.0 or random.random() < rate:
+            return True
+        LOG_RECORDS_DROPPED.inc(reason='sampled')
+        return False
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queue records for the writer thread without formatting them.
+
+    The stock QueueHandler renders the message before queueing it, on the
+    event loop. Here %-style arguments are interpolated only when the writer
+    thread formats the record, so a log call costs the filters and a queue
+    put; arguments must not be mutated after they are logged. When the queue
+    is full the record is dropped rather than blocking the caller.
+    """
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc(reason='queue_full')
+
+class JSONFormatter(logging.Formatter):
+    """
+    One JSON object per record, including any fields passed with `extra=`
+    """
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': round(record.created, 3),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'request_id': getattr(record, 'request_id', None)
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry['stack_info'] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+_handler: Optional[DeferredQueueHandler] = None
+_listener: Optional[logging.handlers.QueueListener] = None
+
+def configure_logging(level: int = logging.INFO, json_output: bool = True,
+                      sample_rates: Optional[Dict[str, float]] = None, queue_size: int = 10000,
+                      stream: Optional[TextIO] = None) -> logging.handlers.QueueListener:
+    """
+    Route all logging through a queue to a background writer thread.
+
+    Replaces the root logger's handlers, so calling it again reconfigures
+    logging instead of adding a second output.
+    """
+    global _handler, _listener
+    shutdown_logging()
+
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(JSONFormatter() if json_output else logging.Formatter(TEXT_FORMAT))
+
+    handler = DeferredQueueHandler(queue.Queue(max(1, queue_size)))
+    # Sample first so dropped records skip the rest of the work
+    if sample_rates:
+        handler.addFilter(SamplingFilter(sample_rates))
+    handler.addFilter(RequestContextFilter())
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level)
+
+    _handler = handler
+    _listener = logging.handlers.QueueListener(handler.queue, output)
+    _listener.start()
+    return _listener
+
+def shutdown_logging():
+    """
+    Write out queued records and detach the queue handler
+    """
+    global _handler, _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+    if _handler is not None:
+        logging.getLogger().removeHandler(_handler)
+        _handler = None
+
+# Flush records still queued when the process exits
+atexit.register(shutdown_logging)
+
+def parse_sample_rates(spec: str) -> Dict[str, float]:
+    """
+    Parse 'logger=rate,...' into a dict, skipping malformed entries
+    """
+    rates = {}
+    for item in spec.split(','):
+        name, _, rate = item.partition('=')
+        try:
+            rates[name.strip()] = float(rate)
+        except ValueError:
+            continue
+    rates.pop('', None)
+    return rates
+
+def create_logging_from_env() -> logging.handlers.QueueListener:
+    """
+    Configure logging from LOG_LEVEL, LOG_FORMAT, LOG_SAMPLE_RATES and LOG_QUEUE_SIZE
+    """
+    level = logging.getLevelName(os.getenv('LOG_LEVEL', 'INFO').upper())
+    return configure_logging(
+        level=level if isinstance(level, int) else logging.INFO,
+        json_output=os.getenv('LOG_FORMAT', 'json').lower() != 'text',
+        sample_rates=parse_sample_rates(os.getenv('LOG_SAMPLE_RATES', '')),
+        queue_size=int(os.getenv('LOG_QUEUE_SIZE', 10000))
+    )
@@ -1,21 +1,117 @@
 import os
+import re
+import json
 import asyncio
-from typing import List, Dict, Optional
-from langchain_community.llms import OpenAI
-from langchain_openai import ChatOpenAI
-from langchain_mistralai import ChatMistralAI
-from langchain.prompts import PromptTemplate
-from langchain.chains import LLMChain
-from langchain.schema import HumanMessage, SystemMessage
+from functools import lru_cache
+from typing import List, Dict, Optional, Tuple, TYPE_CHECKING
 import logging
 
-logging.basicConfig(level=logging.INFO)
+from metrics import STAGE_DURATION, PROVIDER_FALLBACKS, SUMMARY_REPAIRS
+from tracing import span
+from deadline import run_stage, current_deadline, DeadlineExceeded
+from token_usage import USAGE, estimate_tokens, usage_from_llm_output
+from progress import report, SUMMARIZING, FALLBACK
+
+# LangChain and the provider SDKs take seconds to import, so they are loaded
+# only when a provider is actually initialized
+if TYPE_CHECKING:
+    from langchain.prompts import PromptTemplate
+
 logger = logging.getLogger(__name__)
 
+BULLET_COUNT = 5
+
+# Tool/JSON schema for structured output: exactly five bullet point strings
+SUMMARY_SCHEMA = {
+    "title": "thread_summary",
+    "description": "Summary of a Twitter/X thread as exactly five bullet points",
+    "type": "object",
+    "properties": {
+        "bullet_points": {
+            "type": "array",
+            "items": {"type": "string"},
+            "minItems": BULLET_COUNT,
+            "maxItems": BULLET_COUNT,
+            "description": "Five concise bullet points, one or two sentences each"
+        }
+    },
+    "required": ["bullet_points"]
+}
+
+STRUCTURED_PROMPT = """You are an expert at summarizing Twitter/X threads.
+
+Thread Content:
+{thread_content}
+
+Summarize the thread as exactly 5 bullet points capturing the main ideas, key insights and actionable takeaways. Each point is 1-2 sentences, keeps the author's tone and perspective, does not repeat another point, and has no leading bullet symbol or number.
+
+Respond only with a JSON object of the form {{"bullet_points": ["...", "...", "...", "...", "..."]}}."""
+
+REPAIR_PROMPT = """
+
+Your previous answer was rejected: {error}
+Previous answer: {previous}
+Answer again with exactly 5 non-empty bullet point strings in the required JSON form."""
+
+# Error text of a provider or model refusing tool calling / response formats at request time
+_TOOL_REJECTION = re.compile(r'tool|function.?call|response_format|json_schema|structured output', re.IGNORECASE)
+
+_BULLET_PREFIX = re.compile(r'^\s*(?:[•\-*]|\d+[.)])\s*')
+
+def parse_bullet_points(data) -> List[str]:
+    """
+    Validate structured model output, returning exactly five bullet points.
+
+    Accepts the parsed tool arguments (dict), a bare list, or JSON text
+    (possibly wrapped in prose or a code fence). Raises ValueError describing what is wrong, which
+    is fed back to the model on the repair attempt.
+    """
+    if isinstance(data, str):
+        text = data.strip()
+        start, end = text.find('{'), text.rfind('}')
+        if start == -1 or end < start:
+            raise ValueError("response is not a JSON object")
+        try:
+            data = json.loads(text[start:end + 1])
+        except json.JSONDecodeError as e:
+            raise ValueError(f"response is not valid JSON ({e.msg})")
+    
+    points = data.get('bullet_points') if isinstance(data, dict) else data
+    if not isinstance(points, list):
+        raise ValueError("bullet_points must be a list of strings")
+    
+    cleaned = [_BULLET_PREFIX.sub('', point).strip() for point in points if isinstance(point, str)]
+    cleaned = [point for point in cleaned if point]
+    if len(cleaned) != BULLET_COUNT:
+        raise ValueError(f"expected exactly {BULLET_COUNT} non-empty strings, got {len(cleaned)}")
+    return cleaned
+
+@lru_cache(maxsize=1)
+def _usage_callback_class():
+    """
+    Callback handler class that keeps the provider's llm_output (token usage)
+    """
+    from langchain.callbacks.base import BaseCallbackHandler
+    
+    class UsageCallback(BaseCallbackHandler):
+        def __init__(self):
+            self.llm_output = None
+        
+        def on_llm_end(self, response, **kwargs):
+            self.llm_output = response.llm_output
+    
+    return UsageCallback
+
 class ThreadSummarizer:
     def __init__(self, provider: str = "openai"):
         self.provider = provider.lower()
+        # "json" asks for schema-constrained output (tool calling where the
+        # provider supports it); "text" parses bullets out of free text
+        self.output_mode = os.getenv('SUMMARY_OUTPUT_MODE', 'json').lower()
+        self.max_tokens = int(os.getenv('STRUCTURED_MAX_TOKENS', 300)) if self.output_mode == 'json' else 500
+        self._structured_llm = None
         self.llm = self._initialize_llm()
+        self.model = getattr(self.llm, 'model_name', None) or getattr(self.llm, 'model', None) or 'unknown'
         self.summary_prompt = self._create_summary_prompt()
     
     def _initialize_llm(self):
@@ -28,11 +124,13 @@ class ThreadSummarizer:
                 if not api_key:
                     raise ValueError("OPENAI_API_KEY environment variable is required")
                 
+                from langchain_openai import ChatOpenAI
+                
                 return ChatOpenAI(
                     api_key=api_key,
                     model_name="gpt-3.5-turbo",
                     temperature=0.3,
-                    max_tokens=500
+                    max_tokens=self.max_tokens
                 )
             
             elif self.provider == "mistral":
@@ -40,11 +138,13 @@ class ThreadSummarizer:
                 if not api_key:
                     raise ValueError("MISTRAL_API_KEY environment variable is required")
                 
+                from langchain_mistralai import ChatMistralAI
+                
                 return ChatMistralAI(
                     api_key=api_key,
                     model="mistral-tiny",
                     temperature=0.3,
-                    max_tokens=500
+                    max_tokens=self.max_tokens
                 )
             
             else:
@@ -54,10 +154,12 @@ class ThreadSummarizer:
             logger.error(f"Failed to initialize LLM: {str(e)}")
             raise
     
-    def _create_summary_prompt(self) -> PromptTemplate:
+    def _create_summary_prompt(self) -> 'PromptTemplate':
         """
         Create a prompt template for thread summarization
         """
+        from langchain.prompts import PromptTemplate
+        
         template = """
 You are an expert at summarizing Twitter/X threads. Your task is to read the following thread content and create a concise, informative summary.
 
@@ -101,16 +203,35 @@ Summary:
             if not full_text:
                 raise ValueError("No content found to summarize")
             
-            # Prepare the content for summarization
-            formatted_content = self._format_thread_content(tweets, author)
+            # Prepare the content for summarization. Refreshes of a watched
+            # thread send the previous summary plus only the new tweets, and
+            # author digests send the summaries of several threads.
+            previous_summary = thread_data.get('previous_summary')
+            with STAGE_DURATION.time(stage='format'):
+                if thread_data.get('aggregate_of'):
+                    formatted_content = self._format_aggregate_content(thread_data['aggregate_of'], author)
+                elif previous_summary:
+                    formatted_content = self._format_incremental_content(
+                        previous_summary, thread_data.get('new_tweets', []), author, len(tweets)
+                    )
+                else:
+                    formatted_content = self._format_thread_content(tweets, author)
             
-            logger.info(f"Summarizing thread with {len(tweets)} tweets")
+            logger.info("Summarizing thread with %d tweets", len(tweets))
             
             # Generate the summary
-            summary = await self._generate_summary(formatted_content)
+            with span('llm'), STAGE_DURATION.time(stage='llm', provider=self.provider):
+                if self.output_mode == 'json':
+                    bullet_points, usage = await self._generate_structured_summary(formatted_content)
+                    summary = '\n'.join(f"• {point}" for point in bullet_points)
+                else:
+                    summary, usage = await self._generate_summary(formatted_content)
+                    bullet_points = None
             
-            # Process and validate the summary
-            bullet_points = self._extract_bullet_points(summary)
+            # Free-text summaries still need their bullets parsed out
+            if bullet_points is None:
+                with STAGE_DURATION.time(stage='bullets'):
+                    bullet_points = self._extract_bullet_points(summary)
             
             return {
                 'success': True,
@@ -120,6 +241,7 @@ Summary:
                     'tweet_count': len(tweets),
                     'raw_summary': summary
                 },
+                'usage': usage,
                 'original_content': {
                     'full_text': full_text[:500] + '...' if len(full_text) > 500 else full_text,
                     'tweet_count': len(tweets)
@@ -150,10 +272,49 @@ Summary:
         
         return formatted_content
     
-    async def _generate_summary(self, content: str) -> str:
+    def _format_incremental_content(self, previous_summary: List[str], new_tweets: List[Dict],
+                                    author: str, total_tweets: int) -> str:
+        """
+        Format an updated thread as its previous summary plus the appended tweets
+        """
+        formatted_content = f"Twitter Thread by @{author} ({total_tweets} tweets, recently extended)\n\n"
+        formatted_content += "Summary of the thread so far:\n"
+        for point in previous_summary:
+            formatted_content += f"- {point}\n"
+        
+        formatted_content += "\nNew tweets added to the thread since that summary:\n\n"
+        first_number = total_tweets - len(new_tweets) + 1
+        for i, tweet in enumerate(new_tweets, first_number):
+            tweet_text = tweet.get('text', '').strip()
+            if tweet_text:
+                formatted_content += f"Tweet {i}: {tweet_text}\n\n"
+        
+        formatted_content += "Update the summary so it covers the whole thread, including the new tweets.\n"
+        return formatted_content
+    
+    def _format_aggregate_content(self, summaries: List[List[str]], author: str) -> str:
         """
-        Generate summary using the configured LLM
+        Format the summaries of several threads by one author as one document
         """
+        formatted_content = f"Summaries of {len(summaries)} Twitter threads by @{author}\n\n"
+        for i, bullet_points in enumerate(summaries, 1):
+            formatted_content += f"Thread {i}:\n"
+            for point in bullet_points:
+                formatted_content += f"- {point}\n"
+            formatted_content += "\n"
+        
+        formatted_content += (
+            "Summarize what the author has been saying across all of these threads: "
+            "recurring themes, main arguments and notable takeaways.\n"
+        )
+        return formatted_content
+    
+    async def _generate_summary(self, content: str) -> Tuple[str, Dict[str, any]]:
+        """
+        Generate summary using the configured LLM, returning it with its token usage
+        """
+        from langchain.chains import LLMChain
+        
         try:
             # Create the chain
             chain = LLMChain(
@@ -162,17 +323,104 @@ Summary:
                 verbose=False
             )
             
-            # Generate summary
-            result = await asyncio.to_thread(
-                chain.run,
-                thread_content=content
-            )
-            
-            return result.strip()
+            # Generate summary with the async client so that a cancelled
+            # request (deadline, disconnect) also aborts the provider call
+            usage_callback = _usage_callback_class()()
+            result = await chain.ainvoke({"thread_content": content}, config={"callbacks": [usage_callback]})
+            summary = result[chain.output_key].strip()
             
         except Exception as e:
             logger.error(f"LLM generation failed: {str(e)}")
             raise Exception(f"Failed to generate summary: {str(e)}")
+        
+        prompt_text = self.summary_prompt.format(thread_content=content)
+        return summary, self._record_usage(prompt_text, summary, usage_callback.llm_output)
+    
+    async def _generate_structured_summary(self, content: str) -> Tuple[List[str], Dict[str, any]]:
+        """
+        Generate exactly five bullet points as validated JSON, with one repair retry
+        """
+        prompt = STRUCTURED_PROMPT.format(thread_content=content)
+        output, usage = await self._invoke_structured(prompt)
+        
+        try:
+            return parse_bullet_points(output), usage
+        except ValueError as e:
+            logger.warning("Invalid structured summary from %s: %s, retrying once", self.provider, e)
+            error = str(e)
+        
+        previous = output if isinstance(output, str) else json.dumps(output, default=str)
+        repair_prompt = prompt + REPAIR_PROMPT.format(error=error, previous=previous[:2000])
+        output, repair_usage = await self._invoke_structured(repair_prompt)
+        usage = {
+            **repair_usage,
+            'prompt_tokens': usage['prompt_tokens'] + repair_usage['prompt_tokens'],
+            'completion_tokens': usage['completion_tokens'] + repair_usage['completion_tokens'],
+            'total_tokens': usage['total_tokens'] + repair_usage['total_tokens'],
+            'cost_usd': round(usage['cost_usd'] + repair_usage['cost_usd'], 6),
+            'repaired': True
+        }
+        
+        try:
+            bullet_points = parse_bullet_points(output)
+        except ValueError as e:
+            SUMMARY_REPAIRS.inc(provider=self.provider, outcome='failed')
+            raise Exception(f"Model returned an invalid summary after a repair attempt: {str(e)}")
+        
+        SUMMARY_REPAIRS.inc(provider=self.provider, outcome='repaired')
+        return bullet_points, usage
+    
+    async def _invoke_structured(self, prompt: str):
+        """
+        Call the model for structured output, returning (output, usage).
+
+        Providers with tool calling return parsed arguments; others are asked
+        for JSON in the prompt and return text for parse_bullet_points. A
+        model that rejects tool calling only when called is switched to the
+        prompted JSON for good, and the call is retried that way.
+        """
+        if self._structured_llm is None:
+            try:
+                self._structured_llm = self.llm.with_structured_output(SUMMARY_SCHEMA)
+            except (NotImplementedError, AttributeError):
+                self._structured_llm = False
+        
+        usage_callback = _usage_callback_class()()
+        config = {"callbacks": [usage_callback]}
+        try:
+            if self._structured_llm:
+                try:
+                    output = await self._structured_llm.ainvoke(prompt, config=config)
+                except Exception as e:
+                    if not _TOOL_REJECTION.search(str(e)):
+                        raise
+                    logger.warning("%s rejected tool calling, using prompted JSON instead: %s", self.provider, e)
+                    self._structured_llm = False
+                    usage_callback = _usage_callback_class()()
+                    config = {"callbacks": [usage_callback]}
+            if not self._structured_llm:
+                output = (await self.llm.ainvoke(prompt, config=config)).content
+        except Exception as e:
+            logger.error(f"LLM generation failed: {str(e)}")
+            raise Exception(f"Failed to generate summary: {str(e)}")
+        
+        completion = output if isinstance(output, str) else json.dumps(output, default=str)
+        return output, self._record_usage(prompt, completion, usage_callback.llm_output)
+    
+    def _record_usage(self, prompt_text: str, completion_text: str,
+                      llm_output: Optional[Dict[str, any]]) -> Dict[str, any]:
+        """
+        Account the call's tokens, estimating them locally if the provider reported none
+        """
+        model = (llm_output or {}).get('model_name') or (llm_output or {}).get('model') or self.model
+        reported = usage_from_llm_output(llm_output)
+        if reported:
+            prompt_tokens, completion_tokens = reported
+        else:
+            prompt_tokens = estimate_tokens(prompt_text, model)
+            completion_tokens = estimate_tokens(completion_text, model)
+        
+        return USAGE.record(self.provider, model, prompt_tokens, completion_tokens, estimated=reported is None)
     
     def _extract_bullet_points(self, summary_text: str) -> List[str]:
         """
@@ -219,63 +467,101 @@ Summary:
         return {
             'provider': self.provider,
             'initialized': self.llm is not None,
-            'model': getattr(self.llm, 'model_name', 'Unknown')
+            'model': self.model
         }
 
 class MultiProviderSummarizer:
     """
-    A wrapper that can fallback between multiple LLM providers
+    A wrapper that can fallback between multiple LLM providers.
+
+    Every request walks the providers in order from the first one that
+    initialized; a failure or timeout only moves that request to the next
+    provider, so one slow or short-deadline request never changes the
+    provider used by the others.
     """
     def __init__(self, providers: List[str] = ["mistral", "openai"]):
         self.providers = providers
         self.current_provider_index = 0
         self.summarizer = None
+        # One summarizer per provider, created on first use; None marks a
+        # provider that could not be initialized
+        self._summarizers: Dict[str, Optional[ThreadSummarizer]] = {}
+        # Share of the remaining deadline given to an attempt that still has a
+        # fallback behind it; the last provider gets whatever is left
+        self.attempt_fraction = float(os.getenv('PROVIDER_ATTEMPT_FRACTION', 0.6))
         self._initialize_current_provider()
     
     def _initialize_current_provider(self):
         """
-        Initialize the current provider
+        Initialize the first provider that can be, which every request tries first
         """
         while self.current_provider_index < len(self.providers):
+            self.summarizer = self._summarizer_for(self.providers[self.current_provider_index])
+            if self.summarizer:
+                return
+            self.current_provider_index += 1
+        
+        raise Exception("No LLM providers could be initialized")
+    
+    def _summarizer_for(self, provider: str) -> Optional[ThreadSummarizer]:
+        """
+        The provider's summarizer, initializing it on first use
+        """
+        if provider not in self._summarizers:
             try:
-                provider = self.providers[self.current_provider_index]
-                self.summarizer = ThreadSummarizer(provider)
+                self._summarizers[provider] = ThreadSummarizer(provider)
                 logger.info(f"Successfully initialized {provider} provider")
-                return
             except Exception as e:
                 logger.warning(f"Failed to initialize {provider}: {str(e)}")
-                self.current_provider_index += 1
-        
-        raise Exception("No LLM providers could be initialized")
+                self._summarizers[provider] = None
+        return self._summarizers[provider]
     
     async def summarize_thread(self, thread_data: Dict[str, any]) -> Dict[str, any]:
         """
         Summarize thread with automatic provider fallback
         """
         last_error = None
+        # Fallback position is local to this request
+        candidates = [provider for provider in self.providers[self.current_provider_index:]
+                      if self._summarizers.get(provider, True) is not None]
         
-        for attempt in range(len(self.providers)):
+        for attempt, provider in enumerate(candidates):
+            summarizer = self._summarizer_for(provider)
+            if summarizer is None:
+                last_error = f"Failed to initialize {provider}"
+                continue
+            
             try:
-                if self.summarizer:
-                    result = await self.summarizer.summarize_thread(thread_data)
-                    if result['success']:
-                        return result
-                    else:
-                        last_error = result.get('error', 'Unknown error')
-                        raise Exception(last_error)
+                is_last = attempt >= len(candidates) - 1
+                report(SUMMARIZING, provider=provider, model=summarizer.model, attempt=attempt + 1)
+                with span(provider, attempt=attempt + 1) as attempt_span:
+                    result = await run_stage(
+                        f"summarize.{provider}",
+                        summarizer.summarize_thread(thread_data),
+                        fraction=1.0 if is_last else self.attempt_fraction
+                    )
+                if result['success']:
+                    return result
+                else:
+                    last_error = result.get('error', 'Unknown error')
+                    attempt_span.error = 'SummarizationFailed'
+                    raise Exception(last_error)
                 
             except Exception as e:
+                # An attempt that ran out of its own share falls back; running
+                # out of the whole deadline ends the summarize stage
+                deadline = current_deadline()
+                if isinstance(e, DeadlineExceeded) and deadline is not None and deadline.expired:
+                    raise
+                
                 last_error = str(e)
-                logger.warning(f"Provider {self.providers[self.current_provider_index]} failed: {str(e)}")
+                logger.warning("Provider %s failed: %s", provider, e)
                 
                 # Try next provider
-                self.current_provider_index += 1
-                if self.current_provider_index < len(self.providers):
-                    try:
-                        self._initialize_current_provider()
-                    except Exception as init_error:
-                        logger.error(f"Failed to initialize next provider: {str(init_error)}")
-                        continue
+                if attempt + 1 < len(candidates):
+                    next_provider = candidates[attempt + 1]
+                    PROVIDER_FALLBACKS.inc(from_provider=provider, to_provider=next_provider)
+                    report(FALLBACK, from_provider=provider, to_provider=next_provider, error=last_error)
         
         return {
             'success': False,
@@ -0,0 +1,327 @@
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from tweet_store import TweetStore
+
+logger = logging.getLogger(__name__)
+
+# Rows are keyed by the threads rowid; the indexed text itself is not stored
+FTS_SCHEMA = "CREATE VIRTUAL TABLE threads_fts USING fts5(tweets_text, bullets_text, content='')"
+
+class SummaryStore:
+    """
+    Persistent store of scraped threads and their summaries.
+
+    Threads are indexed by status ID, author, and creation time, and an FTS5
+    table covers tweet text and bullet points for full-text search. Writes are
+    queued and committed in batches by a background thread, so saving a
+    summary never blocks the request that produced it.
+
+    Tweet text is stored once, in a TweetStore keyed by the same content hash
+    as the shared cache; threads hold references to it. The FTS table is
+    contentless, so it indexes the text without keeping another copy.
+    """
+    def __init__(self, path: str, batch_size: int = 50, flush_interval: float = 0.5):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue[Optional[Dict]]" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self._writer_lock = threading.Lock()
+        self._local = threading.local()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.tweets = TweetStore(self._connection)
+        self._create_schema(self._connection())
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _create_schema(self, conn: sqlite3.Connection):
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS threads (
+                status_id TEXT PRIMARY KEY,
+                author TEXT NOT NULL,
+                original_url TEXT,
+                tweet_count INTEGER NOT NULL,
+                -- JSON list of references into the tweets table
+                tweets TEXT NOT NULL,
+                bullet_points TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_threads_author ON threads (author COLLATE NOCASE, created_at DESC);
+            CREATE INDEX IF NOT EXISTS idx_threads_created ON threads (created_at DESC);
+        """)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            fts = conn.execute("SELECT sql FROM sqlite_master WHERE name = 'threads_fts'").fetchone()
+            if fts is None:
+                conn.execute(FTS_SCHEMA)
+            elif 'status_id' in fts['sql']:
+                self._migrate_inline_tweets(conn)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _migrate_inline_tweets(self, conn: sqlite3.Connection):
+        """
+        Move tweet text stored inline by older versions into the tweet store
+        """
+        rows = conn.execute("SELECT rowid, author, tweets, bullet_points FROM threads").fetchall()
+        conn.execute("DROP TABLE threads_fts")
+        conn.execute(FTS_SCHEMA)
+        for row in rows:
+            # Older rows kept only the text; the thread author is the best guess for each tweet
+            tweets = [{'author': row['author'], 'text': text} for text in json.loads(row['tweets'])]
+            refs = self.tweets.pack({'tweets': tweets})['tweet_refs']
+            conn.execute("UPDATE threads SET tweets = ? WHERE rowid = ?", (json.dumps(refs), row['rowid']))
+            self._index(conn, row['rowid'], tweets, json.loads(row['bullet_points']))
+        logger.info(f"Moved the tweets of {len(rows)} stored threads into the tweet store")
+
+    def _index(self, conn: sqlite3.Connection, rowid: int, tweets: List[Dict], bullet_points: List[str],
+               delete: bool = False):
+        """
+        Add a thread to the full-text index, or remove it with the values it was indexed with
+        """
+        values = (rowid, '\n'.join(tweet.get('text', '') for tweet in tweets), '\n'.join(bullet_points))
+        if delete:
+            # A contentless table cannot look the old values up itself
+            conn.execute(
+                "INSERT INTO threads_fts (threads_fts, rowid, tweets_text, bullets_text) VALUES ('delete', ?, ?, ?)",
+                values
+            )
+        else:
+            conn.execute("INSERT INTO threads_fts (rowid, tweets_text, bullets_text) VALUES (?, ?, ?)", values)
+
+    def save(self, status_id: str, thread_data: Dict[str, any], summary: Dict[str, any],
+             original_url: str = ''):
+        """
+        Queue a thread and its summary for persistence
+        """
+        if not status_id:
+            return
+
+        self._ensure_writer()
+        self._queue.put({
+            'status_id': status_id,
+            'author': summary.get('author') or thread_data.get('author') or 'Unknown',
+            'original_url': original_url,
+            'tweets': [{'author': str(tweet.get('author', '')), 'text': str(tweet.get('text', ''))}
+                       for tweet in thread_data.get('tweets', [])],
+            'bullet_points': summary.get('bullet_points', []),
+            'saved_at': time.time()
+        })
+
+    def _ensure_writer(self):
+        if self._writer is not None and self._writer.is_alive():
+            return
+        with self._writer_lock:
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(target=self._write_loop, name='summary-store-writer', daemon=True)
+                self._writer.start()
+
+    def _write_loop(self):
+        """
+        Drain the queue in batches, committing each batch in one transaction
+        """
+        while True:
+            record = self._queue.get()
+            if record is None:
+                return
+
+            batch = [record]
+            deadline = time.monotonic() + self.flush_interval
+            stop = False
+            while len(batch) < self.batch_size:
+                try:
+                    record = self._queue.get(timeout=max(0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if record is None:
+                    stop = True
+                    break
+                batch.append(record)
+
+            try:
+                self._write_batch(batch)
+            except Exception as e:
+                logger.error(f"Failed to persist {len(batch)} summaries: {str(e)}")
+
+            if stop:
+                return
+
+    def _write_batch(self, batch: List[Dict]):
+        conn = self._connection()
+        conn.execute("BEGIN")
+        try:
+            for record in batch:
+                # Reference the new tweets before releasing the old ones, so tweets
+                # shared by both versions are never dropped in between
+                refs = self.tweets.pack({'tweets': record['tweets']})['tweet_refs']
+                previous = conn.execute(
+                    "SELECT rowid, tweets, bullet_points FROM threads WHERE status_id = ?", (record['status_id'],)
+                ).fetchone()
+                if previous is not None:
+                    self._unindex(conn, previous)
+                    self.tweets.release({'tweet_refs': json.loads(previous['tweets'])})
+
+                conn.execute("""
+                    INSERT INTO threads (status_id, author, original_url, tweet_count, tweets,
+                                         bullet_points, created_at, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (status_id) DO UPDATE SET
+                        author = excluded.author,
+                        original_url = excluded.original_url,
+                        tweet_count = excluded.tweet_count,
+                        tweets = excluded.tweets,
+                        bullet_points = excluded.bullet_points,
+                        updated_at = excluded.updated_at
+                """, (
+                    record['status_id'], record['author'], record['original_url'],
+                    len(record['tweets']), json.dumps(refs),
+                    json.dumps(record['bullet_points']), record['saved_at'], record['saved_at']
+                ))
+                # An upsert keeps the row's rowid, so a new row is the only case needing a lookup
+                rowid = previous['rowid'] if previous is not None else conn.execute(
+                    "SELECT rowid FROM threads WHERE status_id = ?", (record['status_id'],)
+                ).fetchone()[0]
+                self._index(conn, rowid, record['tweets'], record['bullet_points'])
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _unindex(self, conn: sqlite3.Connection, row: sqlite3.Row):
+        """
+        Remove a stored thread from the full-text index
+        """
+        thread = self.tweets.unpack({'tweet_refs': json.loads(row['tweets'])})
+        if thread is None:
+            # Without the indexed text the entry cannot be removed; it only widens searches
+            logger.warning(f"Stored thread {row['rowid']} references missing tweets")
+            return
+        self._index(conn, row['rowid'], thread['tweets'], json.loads(row['bullet_points']), delete=True)
+
+    def flush(self, timeout: float = 5.0):
+        """
+        Block until all queued writes are committed
+        """
+        if self._writer is None or not self._writer.is_alive():
+            return
+        self._queue.put(None)
+        self._writer.join(timeout)
+        self._writer = None
+
+    close = flush
+
+    @contextmanager
+    def _snapshot(self):
+        """
+        Read a thread and its tweets from one snapshot, even while the writer commits
+        """
+        conn = self._connection()
+        conn.execute("BEGIN")
+        try:
+            yield conn
+        finally:
+            conn.execute("COMMIT")
+
+    def get(self, status_id: str) -> Optional[Dict[str, any]]:
+        with self._snapshot() as conn:
+            row = conn.execute(
+                "SELECT * FROM threads WHERE status_id = ?", (status_id,)
+            ).fetchone()
+            return self._row_to_dict(row) if row else None
+
+    def search(self, author: Optional[str] = None, query: Optional[str] = None,
+               since: Optional[float] = None, until: Optional[float] = None,
+               limit: int = 20, offset: int = 0) -> Dict[str, any]:
+        """
+        Page through stored summaries, optionally filtered by author, creation
+        time, and a full-text query over tweets and bullet points
+        """
+        clauses = []
+        params: List[any] = []
+
+        if author:
+            clauses.append("t.author = ? COLLATE NOCASE")
+            params.append(author.lstrip('@'))
+        if since is not None:
+            clauses.append("t.created_at >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("t.created_at < ?")
+            params.append(until)
+
+        sql = "SELECT t.* FROM threads t"
+        match = self._fts_query(query) if query else None
+        if match:
+            sql += " JOIN threads_fts f ON f.rowid = t.rowid"
+            clauses.append("threads_fts MATCH ?")
+            params.append(match)
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY t.created_at DESC LIMIT ? OFFSET ?"
+
+        with self._snapshot() as conn:
+            # Fetch one extra row to know whether another page exists
+            rows = conn.execute(sql, params + [limit + 1, offset]).fetchall()
+            items = [self._row_to_dict(row) for row in rows[:limit]]
+
+        return {
+            'items': items,
+            'limit': limit,
+            'offset': offset,
+            'has_more': len(rows) > limit
+        }
+
+    def _fts_query(self, query: str) -> str:
+        """
+        Quote each search term so user input is never parsed as FTS5 syntax
+        """
+        terms = [term.replace('"', '""') for term in query.split()]
+        return ' '.join(f'"{term}"' for term in terms if term)
+
+    def _row_to_dict(self, row: sqlite3.Row) -> Dict[str, any]:
+        thread = self.tweets.unpack({'tweet_refs': json.loads(row['tweets'])})
+        return {
+            'status_id': row['status_id'],
+            'author': row['author'],
+            'original_url': row['original_url'],
+            'tweet_count': row['tweet_count'],
+            'tweets': [tweet['text'] for tweet in thread['tweets']] if thread else [],
+            'bullet_points': json.loads(row['bullet_points']),
+            'created_at': row['created_at'],
+            'updated_at': row['updated_at']
+        }
+
+def create_store_from_env() -> Optional[SummaryStore]:
+    """
+    Build the summary store from SUMMARY_STORE_PATH; an empty value disables it
+    """
+    path = os.getenv('SUMMARY_STORE_PATH', '.cache/summaries.db')
+    if not path:
+        return None
+
+    try:
+        return SummaryStore(path)
+    except Exception as e:
+        logger.error(f"Failed to open summary store at {path}: {str(e)}")
+        return None
@@ -79,12 +79,163 @@ def test_firecrawl_module():
                 print(f"Invalid URL incorrectly accepted: {url}")
                 return False
         
+        # Test that URL variants collapse to one canonical URL
+        from xthread_scraper import canonicalize_thread_url
+        
+        canonical = "https://x.com/user/status/1234567890"
+        variants = [
+            "https://twitter.com/user/status/1234567890",
+            "https://www.twitter.com/user/status/1234567890?s=20",
+            "http://mobile.twitter.com/user/status/1234567890?t=abc&s=19",
+            "x.com/user/status/1234567890/photo/1",
+            "https://X.com/user/status/1234567890#reply"
+        ]
+        
+        for url in variants:
+            if canonicalize_thread_url(url) != canonical:
+                print(f"URL not canonicalized: {url} -> {canonicalize_thread_url(url)}")
+                return False
+        print("URL variants canonicalized correctly")
+        
+        for url in invalid_urls + ["https://evil.com/user/status/1234567890"]:
+            if canonicalize_thread_url(url) is not None:
+                print(f"Invalid URL canonicalized: {url}")
+                return False
+        
+        # Test that permanent failures are classified for negative caching
+        deleted_page = "Hmm...this page doesn't exist. Try searching for something else." + " " * 60
+        try:
+            scraper._process_scraped_content(deleted_page, canonical)
+            print("Deleted thread was not detected")
+            return False
+        except Exception as e:
+            if scraper._classify_failure(e) != "deleted":
+                print(f"Deleted thread classified as {scraper._classify_failure(e)}")
+                return False
+        
+        if scraper._classify_failure(Exception("Request timed out")) is not None:
+            print("Transient failure classified as permanent")
+            return False
+        print("Failure causes classified correctly")
+        
         return True
         
     except Exception as e:
         print(f"✗ Firecrawl module test failed: {e}")
         return False
 
+def test_scrape_policy():
+    """
+    Test truncation detection and progressive waitFor escalation
+    """
+    print("\nTesting adaptive scrape policy...")
+    
+    try:
+        import asyncio
+        from xthread_scraper import ThreadScraper, ScrapePolicy, thread_looks_truncated
+        
+        complete = [{"text": "1/ Start of the thread"}, {"text": "2/ Middle"}, {"text": "3/3 The end"}]
+        gap = [{"text": "1/ Start of the thread"}, {"text": "3/ Skipped one"}]
+        short = [{"text": "1/5 Start of the thread"}, {"text": "2/5 Second"}]
+        unnumbered = [{"text": "Just a single tweet with no numbering at all"}]
+        
+        if thread_looks_truncated(complete) or thread_looks_truncated(unnumbered):
+            print("Complete thread flagged as truncated")
+            return False
+        if not thread_looks_truncated(gap) or not thread_looks_truncated(short):
+            print("Truncated thread not detected")
+            return False
+        
+        # Fractions, dates and "24/7" in the text are not thread numbering
+        false_positives = [
+            [{"text": "About 1/3 of users churn in the first month"}],
+            [{"text": "Meeting on 12/25 to review the roadmap"}],
+            [{"text": "24/7 support is included in every plan"}],
+            [{"text": "1/ Start of the thread"}, {"text": "2/ We offer 24/7 support"}, {"text": "3/ The end"}],
+            [{"text": "1/ Start of the thread"}, {"text": "2/ Roughly 1/3 of users, as of 12/25"}]
+        ]
+        for tweets in false_positives:
+            if thread_looks_truncated(tweets):
+                print(f"Complete thread flagged as truncated: {tweets}")
+                return False
+        print("Truncation detection working correctly")
+        
+        page_short = "@alice\n\n1/ The opening tweet of a long thread about caching.\n\n3/ A later tweet that arrived before the second one.\n"
+        page_full = "@alice\n\n1/ The opening tweet of a long thread about caching.\n\n2/ The second tweet finally rendered on the page.\n\n3/ A later tweet that arrived before the second one.\n"
+        
+        class FakeFirecrawl:
+            def __init__(self):
+                self.waits = []
+            def scrape_url(self, url, params=None):
+                self.waits.append(params['waitFor'])
+                return {"markdown": page_full if params['waitFor'] >= 3000 else page_short}
+        
+        scraper = ThreadScraper.__new__(ThreadScraper)
+        scraper.app = FakeFirecrawl()
+        scraper.archive = None
+        scraper.policy = ScrapePolicy(wait_levels_ms=[1000, 3000, 6000], explore_rate=0)
+        
+        result = asyncio.run(scraper.scrape_thread("https://x.com/alice/status/1"))
+        if not result["success"] or scraper.app.waits != [1000, 3000]:
+            print(f"Unexpected escalation: waits={scraper.app.waits} result={result}")
+            return False
+        
+        # Escalations that wait longer than the old fixed 3s are counted, not hidden
+        from metrics import SCRAPE_WAIT_EXTRA
+        
+        class SlowFirecrawl(FakeFirecrawl):
+            def scrape_url(self, url, params=None):
+                self.waits.append(params['waitFor'])
+                return {"markdown": page_full if params['waitFor'] >= 6000 else page_short}
+        
+        slow = ThreadScraper.__new__(ThreadScraper)
+        slow.app = SlowFirecrawl()
+        slow.archive = None
+        slow.policy = ScrapePolicy(wait_levels_ms=[1000, 3000, 6000], explore_rate=0)
+        before = SCRAPE_WAIT_EXTRA.get()
+        asyncio.run(slow.scrape_thread("https://x.com/alice/status/1"))
+        if slow.app.waits != [1000, 3000, 6000] or SCRAPE_WAIT_EXTRA.get() - before != 7:
+            print(f"Extra wait of escalated scrape not recorded: waits={slow.app.waits}")
+            return False
+        print(f"Escalated waits: {scraper.app.waits}")
+        
+        # After enough slow threads the policy starts at the longer wait
+        for _ in range(5):
+            scraper.policy.record(1, 3, True)
+        if scraper.policy.initial_level() != 1:
+            print("Policy did not learn the longer default wait")
+            return False
+        print("Policy learned default wait from history")
+        
+        # An empty page is only 'no_tweets' when the deadline did not cut the scrape short
+        from deadline import set_deadline
+        from xthread_scraper import TRUNCATED_BY_DEADLINE
+        
+        class EmptyFirecrawl:
+            def scrape_url(self, url, params=None):
+                return {"markdown": "Nothing rendered yet"}
+        
+        scraper.app = EmptyFirecrawl()
+        scraper.policy = ScrapePolicy(wait_levels_ms=[1000, 3000, 6000], explore_rate=0)
+        
+        async def scrape_with_deadline(seconds):
+            if seconds is not None:
+                set_deadline(seconds)
+            return await scraper.scrape_thread("https://x.com/alice/status/1")
+        
+        capped = asyncio.run(scrape_with_deadline(0.5))
+        uncapped = asyncio.run(scrape_with_deadline(None))
+        if capped.get("failure_cause") != TRUNCATED_BY_DEADLINE or uncapped.get("failure_cause") != "no_tweets":
+            print(f"Deadline-capped scrape misclassified: {capped} / {uncapped}")
+            return False
+        print("Deadline-capped empty scrapes are not reported as 'no_tweets'")
+        
+        return True
+        
+    except Exception as e:
+        print(f"✗ Scrape policy test failed: {e}")
+        return False
+
 def test_summarizer_module():
     """
     Test the summarizer module functionality
@@ -116,38 +267,1847 @@ def test_summarizer_module():
             print(f"Expected 5 bullet points, got {len(bullet_points)}")
             return False
         
+        # Test incremental formatting used when refreshing watched threads
+        content = summarizer._format_incremental_content(
+            ["Earlier point"], [{"text": "A newly appended tweet"}], "TestUser", 4
+        )
+        if "- Earlier point" not in content or "Tweet 4: A newly appended tweet" not in content:
+            print("Incremental thread content formatted incorrectly")
+            return False
+        print("Incremental content formatting working correctly")
+        
+        # Test structured output validation and the single repair retry
+        import asyncio
+        from summarizer import parse_bullet_points
+        
+        five = [f"Point {n}" for n in range(1, 6)]
+        if parse_bullet_points('Sure! ```json\n{"bullet_points": ["• Point 1", "2. Point 2", "Point 3", "Point 4", "Point 5"]}\n```') != five:
+            print("Structured output not parsed")
+            return False
+        for invalid in ({"bullet_points": five[:4]}, {"bullet_points": five + ["Point 6"]}, "no json here", {"points": five}):
+            try:
+                parse_bullet_points(invalid)
+                print(f"Invalid structured output accepted: {invalid}")
+                return False
+            except ValueError:
+                pass
+        
+        responses = [{"bullet_points": five[:4]}, {"bullet_points": five}]
+        prompts = []
+        
+        async def fake_invoke(prompt):
+            prompts.append(prompt)
+            usage = {"prompt_tokens": 100, "completion_tokens": 20, "total_tokens": 120, "cost_usd": 0.001}
+            return responses[len(prompts) - 1], usage
+        
+        summarizer.provider = "mistral"
+        summarizer._invoke_structured = fake_invoke
+        bullet_points, usage = asyncio.run(summarizer._generate_structured_summary("thread"))
+        if bullet_points != five or len(prompts) != 2 or "got 4" not in prompts[1]:
+            print(f"Repair retry did not run as expected: {prompts}")
+            return False
+        if usage["total_tokens"] != 240 or not usage.get("repaired"):
+            print(f"Repair usage not combined: {usage}")
+            return False
+        print("Structured output validation and repair working correctly")
+        
+        # A model that rejects tool calling at request time falls back to prompted JSON
+        import json
+        import summarizer as summarizer_module
+        
+        class FakeCallback:
+            llm_output = None
+        
+        class RejectingToolCalls:
+            calls = 0
+            async def ainvoke(self, prompt, config=None):
+                RejectingToolCalls.calls += 1
+                raise Exception("Error response 400: Function calling is not enabled for this model")
+        
+        class FakeLLM:
+            prompts = []
+            def with_structured_output(self, schema):
+                return RejectingToolCalls()
+            async def ainvoke(self, prompt, config=None):
+                FakeLLM.prompts.append(prompt)
+                return type("Message", (), {"content": json.dumps({"bullet_points": five})})()
+        
+        saved_callback = summarizer_module._usage_callback_class
+        summarizer_module._usage_callback_class = lambda: FakeCallback
+        try:
+            fallback = ThreadSummarizer.__new__(ThreadSummarizer)
+            fallback.provider, fallback.model = "mistral", "mistral-tiny"
+            fallback.llm, fallback._structured_llm = FakeLLM(), None
+            first, _ = asyncio.run(fallback._generate_structured_summary("thread"))
+            second, _ = asyncio.run(fallback._generate_structured_summary("thread"))
+        finally:
+            summarizer_module._usage_callback_class = saved_callback
+        if first != five or second != five or fallback._structured_llm is not False:
+            print(f"Tool-call rejection did not fall back to prompted JSON: {first}")
+            return False
+        if RejectingToolCalls.calls != 1 or len(FakeLLM.prompts) != 2:
+            print(f"Tool calling retried after the model rejected it: {RejectingToolCalls.calls}")
+            return False
+        print("Tool-call rejection falls back to prompted JSON")
+        
         return True
         
     except Exception as e:
         print(f"✗ Summarizer module test failed: {e}")
         return False
 
-def test_main_module():
+def test_token_usage_module():
     """
-    Test the main FastAPI module
+    Test token accounting from reported usage and from local estimates
     """
-    print("\nTesting main module...")
+    print("\nTesting token usage accounting...")
+
+    try:
+        from summarizer import ThreadSummarizer
+        from token_usage import UsageLedger, USAGE, parse_prices, usage_from_llm_output
+
+        ledger = UsageLedger(parse_prices("custom-model=2:4"))
+        record = ledger.record("openai", "gpt-3.5-turbo-0125", 1000, 200)
+        if abs(record["cost_usd"] - 0.0008) > 1e-9:
+            print(f"Dated model snapshot priced incorrectly: {record}")
+            return False
+        ledger.record("mistral", "custom-model", 500_000, 0, estimated=True)
+        totals = ledger.snapshot()
+        if totals["mistral"]["custom-model"]["cost_usd"] != 1.0 or totals["mistral"]["custom-model"]["estimated_calls"] != 1:
+            print(f"Unexpected totals: {totals}")
+            return False
+
+        if usage_from_llm_output({"token_usage": {"prompt_tokens": 12, "completion_tokens": 3}}) != (12, 3):
+            print("Reported token usage not extracted")
+            return False
+
+        summarizer = ThreadSummarizer.__new__(ThreadSummarizer)
+        summarizer.provider = "mistral"
+        summarizer.model = "mistral-tiny"
+
+        reported = summarizer._record_usage("thread", "• point", {"token_usage": {"prompt_tokens": 40, "completion_tokens": 10}})
+        estimated = summarizer._record_usage("a thread about caching " * 20, "• point", None)
+        if reported["estimated"] or reported["total_tokens"] != 50:
+            print(f"Reported usage recorded incorrectly: {reported}")
+            return False
+        if not estimated["estimated"] or estimated["prompt_tokens"] <= estimated["completion_tokens"]:
+            print(f"Estimated usage recorded incorrectly: {estimated}")
+            return False
+        if USAGE.snapshot()["mistral"]["mistral-tiny"]["calls"] < 2:
+            print("Summarizer calls not added to the process ledger")
+            return False
+
+        # The encoding is loaded once per model, whether tiktoken is installed or not
+        from token_usage import estimate_tokens, preload_encodings, _encoding
+        _encoding.cache_clear()
+        preload_encodings(["mistral-tiny"])
+        for text in ("first estimate", "second estimate", "third estimate"):
+            estimate_tokens(text, "mistral-tiny")
+        info = _encoding.cache_info()
+        if info.misses != 1 or info.hits != 3:
+            print(f"Encoding not cached per model: {info}")
+            return False
+
+        print(f"Token accounting working correctly ({estimated['prompt_tokens']} estimated prompt tokens)")
+        return True
+
+    except Exception as e:
+        print(f"✗ Token usage test failed: {e}")
+        return False
+
+def test_lazy_imports():
+    """
+    Test that importing the app modules does not load LangChain or provider SDKs
+    """
+    print("\nTesting lazy imports...")
     
     try:
-        from main import app
-        print("FastAPI app imported successfully")
+        import subprocess
         
-        # Check if required routes exist
-        routes = [route.path for route in app.routes]
+        probe = (
+            "import sys, xthread_scraper, summarizer; "
+            "print(','.join(sorted(m for m in sys.modules "
+            "if m.split('.')[0] in ('langchain', 'langchain_openai', 'langchain_mistralai', "
+            "'langchain_community', 'firecrawl', 'firecrawl_py'))))"
+        )
+        completed = subprocess.run(
+            [sys.executable, "-c", probe],
+            capture_output=True,
+            text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        )
         
-        required_routes = ["/", "/health", "/api/summarize", "/summarize"]
+        if completed.returncode != 0:
+            print(f"Import probe failed: {completed.stderr.strip()}")
+            return False
         
-        for route in required_routes:
-            if route in routes:
-                print(f"Route {route} exists")
+        loaded = completed.stdout.strip()
+        if loaded:
+            print(f"Provider SDKs imported eagerly: {loaded}")
+            return False
+        
+        print("No provider SDKs imported at module load")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Lazy import test failed: {e}")
+        return False
+
+def test_metrics_module():
+    """
+    Test the metrics collectors and Prometheus rendering
+    """
+    print("\nTesting metrics module...")
+    
+    try:
+        from metrics import MetricsRegistry
+        
+        registry = MetricsRegistry()
+        latency = registry.histogram("test_stage_seconds", "Stage latency", ("stage",), buckets=(0.1, 1.0))
+        failures = registry.counter("test_failures_total", "Failures", ("cause",))
+        
+        latency.observe(0.05, stage="scrape")
+        latency.observe(0.5, stage="scrape")
+        latency.observe(5.0, stage="scrape")
+        failures.inc(cause="scrape")
+        failures.inc(cause="scrape")
+        
+        output = registry.render()
+        expected_lines = [
+            '# TYPE test_stage_seconds histogram',
+            'test_stage_seconds_bucket{stage="scrape",le="0.1"} 1',
+            'test_stage_seconds_bucket{stage="scrape",le="1"} 2',
+            'test_stage_seconds_bucket{stage="scrape",le="+Inf"} 3',
+            'test_stage_seconds_count{stage="scrape"} 3',
+            'test_failures_total{cause="scrape"} 2'
+        ]
+        
+        for line in expected_lines:
+            if line in output:
+                print(f"Found metric line: {line}")
             else:
-                print(f"Route {route} missing")
+                print(f"Missing metric line: {line}")
                 return False
         
         return True
         
     except Exception as e:
-        print(f"✗ Main module test failed: {e}")
+        print(f"✗ Metrics module test failed: {e}")
+        return False
+
+def test_tracing_module():
+    """
+    Test span nesting and Server-Timing header rendering
+    """
+    print("\nTesting tracing module...")
+    
+    try:
+        from tracing import start_trace, span, server_timing_header
+        
+        root = start_trace("POST /api/summarize")
+        with span("scrape"):
+            with span("firecrawl"):
+                pass
+        with span("summarize"):
+            with span("mistral", attempt=1) as attempt_span:
+                attempt_span.error = "SummarizationFailed"
+        root.finish()
+        
+        header = server_timing_header(root)
+        print(f"Server-Timing: {header}")
+        
+        for name in ["total;dur=", "scrape;dur=", "scrape.firecrawl;dur=", "summarize.mistral;dur="]:
+            if name not in header:
+                print(f"Missing Server-Timing entry: {name}")
+                return False
+        
+        if 'desc="error: SummarizationFailed"' not in header:
+            print("Failed span not marked in Server-Timing header")
+            return False
+        
+        return True
+        
+    except Exception as e:
+        print(f"✗ Tracing module test failed: {e}")
+        return False
+
+def test_deadline_module():
+    """
+    Test stage budgets and cancellation under a request deadline
+    """
+    print("\nTesting deadline module...")
+    
+    try:
+        import asyncio
+        from deadline import set_deadline, run_stage, remaining_seconds, DeadlineExceeded
+        
+        async def slow_stage():
+            await asyncio.sleep(5)
+            return "finished"
+        
+        async def stage_budget():
+            return remaining_seconds()
+        
+        async def scenario():
+            # No deadline: stages run unbounded
+            if await run_stage("scrape", stage_budget()) is not None:
+                return "stage saw a deadline without one being set"
+            
+            set_deadline(0.2)
+            budget = await run_stage("scrape", stage_budget(), fraction=0.5)
+            if not 0 < budget <= 0.1:
+                return f"scrape stage budget was {budget}, expected at most 0.1"
+            
+            try:
+                await run_stage("summarize", slow_stage())
+                return "slow stage was not cancelled"
+            except DeadlineExceeded as e:
+                if e.stage != "summarize":
+                    return f"deadline reported stage {e.stage}"
+            return None
+        
+        error = asyncio.run(scenario())
+        if error:
+            print(error)
+            return False
+        
+        print("Stage budgets and cancellation working correctly")
+        
+        # Provider timeouts fall back per request without moving the shared provider
+        from summarizer import MultiProviderSummarizer
+        
+        class FakeProvider:
+            def __init__(self, provider, delay):
+                self.provider, self.model, self.delay = provider, provider + "-model", delay
+                self.calls = 0
+            
+            async def summarize_thread(self, thread_data):
+                self.calls += 1
+                await asyncio.sleep(self.delay)
+                return {"success": True, "summary": {"provider": self.provider}}
+        
+        multi = MultiProviderSummarizer.__new__(MultiProviderSummarizer)
+        multi.providers = ["mistral", "openai"]
+        multi.current_provider_index = 0
+        multi.attempt_fraction = 0.5
+        multi._summarizers = {"mistral": FakeProvider("mistral", 5), "openai": FakeProvider("openai", 0)}
+        multi.summarizer = multi._summarizers["mistral"]
+        
+        async def short_deadline_request():
+            set_deadline(0.2)
+            return await multi.summarize_thread({})
+        
+        async def concurrent_timeouts():
+            return await asyncio.gather(short_deadline_request(), short_deadline_request())
+        
+        results = asyncio.run(concurrent_timeouts())
+        if [r["summary"]["provider"] for r in results if r["success"]] != ["openai", "openai"]:
+            print(f"Timed-out attempts did not fall back: {results}")
+            return False
+        if multi.current_provider_index != 0 or multi.summarizer is not multi._summarizers["mistral"]:
+            print("A request's timeout changed the provider for every request")
+            return False
+        
+        multi._summarizers["mistral"].delay = 0
+        result = asyncio.run(short_deadline_request())
+        if result["summary"]["provider"] != "mistral" or multi._summarizers["mistral"].calls != 3:
+            print(f"Later request did not start with the first provider: {result}")
+            return False
+        print("Provider fallback is per request under concurrent timeouts")
+        
+        return True
+        
+    except Exception as e:
+        print(f"✗ Deadline module test failed: {e}")
+        return False
+
+def test_inflight_module():
+    """
+    Test shared pipeline runs and cancellation when every client disconnects
+    """
+    print("\nTesting inflight module...")
+
+    try:
+        import asyncio
+        import time
+        from inflight import InflightRegistry, ClientDisconnected, mark_stage
+        from metrics import ABANDONED_WORK, DETACHED_WORK
+
+        runs = []
+
+        async def pipeline():
+            runs.append(1)
+            mark_stage("summarize")
+            await asyncio.sleep(0.2)
+            return {"bullet_points": ["a"]}
+
+        async def connected():
+            return False
+
+        async def disconnected():
+            return True
+
+        async def scenario():
+            registry = InflightRegistry(poll_interval=0.01)
+
+            # Concurrent waiters share one run
+            first, second = await asyncio.gather(
+                registry.run("1", pipeline, connected),
+                registry.run("1", pipeline, connected)
+            )
+            if len(runs) != 1 or first != second:
+                return f"expected one shared run, got {len(runs)}"
+            if len(registry) != 0:
+                return "finished run was not removed"
+
+            # The last waiter leaving cancels the run
+            abandoned = ABANDONED_WORK.get(stage="summarize")
+            try:
+                await registry.run("2", pipeline, disconnected)
+                return "disconnected waiter got a result"
+            except ClientDisconnected:
+                pass
+            await asyncio.sleep(0.01)
+            if ABANDONED_WORK.get(stage="summarize") != abandoned + 1 or len(registry) != 0:
+                return "abandoned run was not cancelled"
+
+            # A remaining waiter keeps the run going
+            staying = asyncio.create_task(registry.run("3", pipeline, connected))
+            await asyncio.sleep(0.02)
+            try:
+                await registry.run("3", pipeline, disconnected)
+            except ClientDisconnected:
+                pass
+            if (await staying) != {"bullet_points": ["a"]}:
+                return "remaining waiter lost its result"
+
+            # keep_alive finishes the run with nobody waiting
+            detached = DETACHED_WORK.get(stage="summarize")
+            try:
+                await registry.run("4", pipeline, disconnected, keep_alive=True)
+            except ClientDisconnected:
+                pass
+            if DETACHED_WORK.get(stage="summarize") != detached + 1 or len(registry) != 1:
+                return "keep_alive run did not keep running"
+            await asyncio.sleep(0.3)
+
+            # Cancelling a scrape reaches the async Firecrawl request itself
+            from xthread_scraper import ThreadScraper
+
+            class AsyncFirecrawl:
+                cancelled = False
+                async def scrape_url(self, url, **options):
+                    try:
+                        await asyncio.sleep(5)
+                    except asyncio.CancelledError:
+                        AsyncFirecrawl.cancelled = True
+                        raise
+
+            class BlockingFirecrawl:
+                def scrape_url(self, url, params=None):
+                    time.sleep(0.1)
+                    return {"markdown": "late"}
+
+            scraper = ThreadScraper.__new__(ThreadScraper)
+
+            async def scrape():
+                mark_stage("scrape")
+                return await scraper._fetch("https://x.com/a/status/5", {"waitFor": 1000, "timeout": 8000})
+
+            scraper.app = AsyncFirecrawl()
+            try:
+                await registry.run("5", scrape, disconnected)
+            except ClientDisconnected:
+                pass
+            await asyncio.sleep(0.01)
+            if not AsyncFirecrawl.cancelled:
+                return "cancelled run left the Firecrawl request running"
+
+            # A blocking SDK's scrape cannot be stopped; it is reported as such
+            scraper.app = BlockingFirecrawl()
+            blocking = ABANDONED_WORK.get(stage="scrape.blocking")
+            try:
+                await registry.run("6", scrape, disconnected)
+            except ClientDisconnected:
+                pass
+            if ABANDONED_WORK.get(stage="scrape.blocking") != blocking + 1:
+                return "abandoned blocking scrape not reported separately"
+            await asyncio.sleep(0.15)
+            return None
+
+        error = asyncio.run(scenario())
+        if error:
+            print(error)
+            return False
+
+        print("Shared runs and disconnect cancellation working correctly")
+        return True
+
+    except Exception as e:
+        print(f"✗ Inflight module test failed: {e}")
+        return False
+
+def test_progress_module():
+    """
+    Test that stage events reach every waiter on a shared pipeline run
+    """
+    print("\nTesting progress module...")
+
+    try:
+        import asyncio
+        from inflight import InflightRegistry
+        from progress import ProgressFeed, report, SCRAPING, PARSED, DONE
+
+        # Late subscribers are caught up with the latest event
+        feed = ProgressFeed()
+        feed.publish(SCRAPING, wait_ms=1000)
+        seen = []
+        feed.subscribe(seen.append)
+        feed.publish(DONE)
+        if [message["event"] for message in seen] != [SCRAPING, DONE]:
+            print(f"Unexpected feed events: {seen}")
+            return False
+
+        # Reporting outside a pipeline run is a no-op
+        report(SCRAPING)
+
+        async def pipeline():
+            report(SCRAPING, wait_ms=1000, retry=False)
+            await asyncio.sleep(0.05)
+            report(PARSED, tweet_count=3)
+            return "summary"
+
+        async def scenario():
+            registry = InflightRegistry(poll_interval=0.01)
+            first, second = [], []
+            await asyncio.gather(
+                registry.run("1", pipeline, on_progress=first.append),
+                registry.run("1", pipeline, on_progress=second.append)
+            )
+            return first, second
+
+        first, second = asyncio.run(scenario())
+        if [message["event"] for message in first] != [SCRAPING, PARSED] or first != second:
+            print(f"Waiters saw different events: {first} vs {second}")
+            return False
+        if first[1]["tweet_count"] != 3:
+            print(f"Event data missing: {first[1]}")
+            return False
+
+        print("Stage events fan out to every waiter")
+        return True
+
+    except Exception as e:
+        print(f"✗ Progress module test failed: {e}")
+        return False
+
+def test_scheduler_module():
+    """
+    Test that interactive work overtakes queued batch work without starving it
+    """
+    print("\nTesting scheduler module...")
+
+    try:
+        import asyncio
+        import tempfile
+        from scheduler import PriorityScheduler, parse_weights, available_cpus, INTERACTIVE, BATCH
+
+        if parse_weights("interactive=4,batch=x") != {INTERACTIVE: 4.0, BATCH: 1}:
+            print(f"Unexpected weights: {parse_weights('interactive=4,batch=x')}")
+            return False
+
+        with tempfile.TemporaryDirectory() as cgroup_root:
+            unlimited = available_cpus(cgroup_root)
+            with open(os.path.join(cgroup_root, "cpu.max"), "w") as f:
+                f.write("150000 100000\n")
+            if available_cpus(cgroup_root) != min(unlimited, 2):
+                print(f"cgroup v2 quota not applied: {available_cpus(cgroup_root)}")
+                return False
+            with open(os.path.join(cgroup_root, "cpu.max"), "w") as f:
+                f.write("max 100000\n")
+            if available_cpus(cgroup_root) != unlimited:
+                print("Unlimited cgroup v2 quota reduced the CPU count")
+                return False
+            os.remove(os.path.join(cgroup_root, "cpu.max"))
+            os.makedirs(os.path.join(cgroup_root, "cpu"))
+            with open(os.path.join(cgroup_root, "cpu", "cpu.cfs_quota_us"), "w") as f:
+                f.write("50000")
+            with open(os.path.join(cgroup_root, "cpu", "cpu.cfs_period_us"), "w") as f:
+                f.write("100000")
+            if available_cpus(cgroup_root) != 1:
+                print("cgroup v1 quota not applied")
+                return False
+        print("Worker count follows the affinity mask and cgroup CPU quota")
+
+        order = []
+
+        async def job(name, delay=0.0):
+            await asyncio.sleep(delay)
+            order.append(name)
+
+        async def scenario():
+            scheduler = PriorityScheduler("test", 1, {INTERACTIVE: 2, BATCH: 1})
+            blocker = asyncio.create_task(scheduler.run(job("blocker", 0.05), BATCH))
+            await asyncio.sleep(0)
+
+            tasks = [asyncio.create_task(scheduler.run(job(f"b{n}"), BATCH)) for n in range(3)]
+            await asyncio.sleep(0)
+            tasks += [asyncio.create_task(scheduler.run(job(f"i{n}"), INTERACTIVE)) for n in range(3)]
+            await asyncio.sleep(0)
+
+            if scheduler.queue_depth(BATCH) != 3 or scheduler.queue_depth(INTERACTIVE) != 3:
+                return f"unexpected queue depths: {scheduler.stats()}"
+
+            # A cancelled waiter leaves the queue without taking a slot
+            tasks.pop(0).cancel()
+            await asyncio.gather(blocker, *tasks)
+
+            if order != ["blocker", "i0", "i1", "b1", "i2", "b2"]:
+                return f"unexpected service order: {order}"
+            if scheduler.active != 0:
+                return f"slots leaked: {scheduler.stats()}"
+            return None
+
+        error = asyncio.run(scenario())
+        if error:
+            print(error)
+            return False
+
+        print("Weighted fair scheduling working correctly")
+        return True
+
+    except Exception as e:
+        print(f"✗ Scheduler module test failed: {e}")
+        return False
+
+def test_rate_limit_module():
+    """
+    Test separate hit/miss token buckets in memory and in the shared store
+    """
+    print("\nTesting rate limit module...")
+
+    try:
+        import asyncio
+        import tempfile
+        import threading
+        from rate_limit import (RateLimiter, MemoryBucketStore, SQLiteBucketStore, RateLimitExceeded,
+                                begin_request, client_id, HIT, MISS)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "ratelimit.db")
+            for store in (MemoryBucketStore(), SQLiteBucketStore(path)):
+                limiter = RateLimiter(store, {HIT: (600, 10), MISS: (6, 2)})
+                state = begin_request(client_id("secret", "10.0.0.1"))
+                if "secret" in state.client:
+                    print("Raw API key used as client ID")
+                    return False
+
+                asyncio.run(limiter.consume(MISS))
+                asyncio.run(limiter.consume(MISS))
+                try:
+                    asyncio.run(limiter.consume(MISS))
+                    print("Third miss was not rate limited")
+                    return False
+                except RateLimitExceeded as e:
+                    if e.kind != MISS or e.retry_after < 1:
+                        print(f"Unexpected rejection: {e.kind} retry after {e.retry_after}")
+                        return False
+
+                # Hits draw from their own bucket
+                asyncio.run(limiter.consume(HIT))
+                headers = state.headers()
+                if headers.get("RateLimit-Limit") != "10" or headers.get("RateLimit-Remaining") != "9":
+                    print(f"Unexpected headers: {headers}")
+                    return False
+
+                usage = {(row["kind"]): (row["allowed"], row["rejected"]) for row in limiter.usage()}
+                if usage != {HIT: (1, 0), MISS: (2, 1)}:
+                    print(f"Unexpected usage: {usage}")
+                    return False
+
+            # A second process sharing the file sees the same buckets
+            begin_request(client_id("secret", None))
+            try:
+                asyncio.run(RateLimiter(SQLiteBucketStore(path), {MISS: (6, 2)}).consume(MISS))
+                print("Shared store did not carry the bucket over")
+                return False
+            except RateLimitExceeded:
+                pass
+
+            # Multi-thread requests are charged once by weight; a weight above
+            # the burst needs a full bucket and leaves it in debt
+            limiter = RateLimiter(MemoryBucketStore(), {MISS: (6, 2)})
+            begin_request(client_id(None, "10.0.0.2"))
+            asyncio.run(limiter.consume(MISS, weight=0))
+            asyncio.run(limiter.consume(MISS, weight=5))
+            try:
+                asyncio.run(limiter.consume(MISS))
+                print("Bucket in debt admitted another miss")
+                return False
+            except RateLimitExceeded as e:
+                if e.retry_after < 40:
+                    print(f"Debt not repaid before retry: {e.retry_after}s")
+                    return False
+            if limiter.usage()[0]["allowed"] != 5:
+                print(f"Weighted charge not counted: {limiter.usage()}")
+                return False
+
+            # The shared store's transaction can wait on other workers, so it runs off the loop
+            class RecordingStore(SQLiteBucketStore):
+                threads = []
+                def take(self, *args):
+                    RecordingStore.threads.append(threading.get_ident())
+                    return super().take(*args)
+
+            begin_request(client_id(None, "10.0.0.3"))
+            asyncio.run(RateLimiter(RecordingStore(path), {HIT: (600, 10)}).consume(HIT, weight=3))
+            if len(RecordingStore.threads) != 1 or RecordingStore.threads[0] == threading.get_ident():
+                print("Shared store take ran on the event loop thread")
+                return False
+
+        print("Hit and miss rate limits working correctly")
+        return True
+
+    except Exception as e:
+        print(f"✗ Rate limit module test failed: {e}")
+        return False
+
+def test_cache_module():
+    """
+    Test the shared SQLite cache round trip and expiry
+    """
+    print("\nTesting cache module...")
+    
+    try:
+        import tempfile
+        from cache import SharedCache
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache = SharedCache(os.path.join(tmp_dir, "cache.db"), default_ttl=60)
+            
+            summary = {"bullet_points": ["a", "b"], "author": "user", "tweet_count": 2}
+            cache.set("summary", "123", summary)
+            
+            if cache.get("summary", "123") != summary:
+                print("Cached value did not round trip")
+                return False
+            print("Cached value round trip working correctly")
+            
+            # A second handle simulates another worker process
+            other_worker = SharedCache(os.path.join(tmp_dir, "cache.db"))
+            if other_worker.get("summary", "123") != summary:
+                print("Cached value not visible to another cache handle")
+                return False
+            print("Cached value shared across handles")
+            
+            cache.set("summary", "456", summary, ttl=-1)
+            if cache.get("summary", "456") is not None:
+                print("Expired entry was returned")
+                return False
+            
+            if cache.purge_expired() != 1:
+                print("Expired entry was not purged")
+                return False
+            print("Expired entries handled correctly")
+            
+            # A worker holding the write lock costs other writers at most the busy timeout
+            import sqlite3
+            import time
+            blocker = sqlite3.connect(os.path.join(tmp_dir, "cache.db"), isolation_level=None)
+            blocker.execute("BEGIN IMMEDIATE")
+            start = time.perf_counter()
+            try:
+                cache.set("summary", "789", summary)
+                print("Write succeeded while another worker held the lock")
+                return False
+            except sqlite3.OperationalError:
+                pass
+            finally:
+                waited = time.perf_counter() - start
+                blocker.execute("ROLLBACK")
+                blocker.close()
+            if waited > 1.0 or cache.get("summary", "123") != summary:
+                print(f"Locked cache blocked for {waited:.2f}s")
+                return False
+            print(f"Locked cache fails writes after {waited * 1000:.0f} ms")
+        
+        return True
+        
+    except Exception as e:
+        print(f"✗ Cache module test failed: {e}")
+        return False
+
+def test_tweet_store_module():
+    """
+    Test that cached threads share tweets by content and evict them by refcount
+    """
+    print("\nTesting tweet store module...")
+    
+    try:
+        import tempfile
+        from cache import SharedCache
+        
+        def thread(thread_id, texts):
+            tweets = [{"text": text, "author": "user", "timestamp": f"Tweet {i + 1}"} for i, text in enumerate(texts)]
+            return {
+                "thread_id": thread_id,
+                "tweets": tweets,
+                "total_tweets": len(tweets),
+                "full_text": " ".join(texts),
+                "author": "user"
+            }
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache = SharedCache(os.path.join(tmp_dir, "cache.db"), default_ttl=60)
+            
+            original = thread("1", ["shared opening tweet", "only in the original"])
+            repost = thread("2", ["shared opening tweet", "only in the repost"])
+            cache.set("scrape", "1", original)
+            cache.set("scrape", "2", repost)
+            
+            if cache.get("scrape", "1") != original or cache.get("scrape", "2") != repost:
+                print("Content-addressed thread did not round trip")
+                return False
+            
+            stats = cache.tweets.stats()
+            if stats["tweets"] != 3 or stats["references"] != 4:
+                print(f"Shared tweet stored more than once: {stats}")
+                return False
+            print("Shared tweets stored once")
+            
+            # Replacing a thread releases tweets only it referenced
+            cache.set("scrape", "2", thread("2", ["shared opening tweet"]))
+            if cache.tweets.stats()["tweets"] != 2:
+                print(f"Replaced tweets were not released: {cache.tweets.stats()}")
+                return False
+            
+            # Expiry drops the last references and evicts the tweets
+            cache.set("scrape", "1", original, ttl=-1)
+            cache.purge_expired()
+            cache.delete("scrape", "2")
+            if cache.tweets.stats()["tweets"] != 0:
+                print(f"Unreferenced tweets were not evicted: {cache.tweets.stats()}")
+                return False
+            print("Reference counts drive tweet eviction")
+            
+            # A running cache purges on its own every `purge_every` writes, not only at startup
+            cache = SharedCache(os.path.join(tmp_dir, "periodic.db"), default_ttl=60, purge_every=3)
+            cache.set("scrape", "1", original, ttl=-1)
+            cache.set("summary", "1", {"bullet_points": []})
+            if cache.tweets.stats()["tweets"] != 2:
+                print(f"Purged before the write count was reached: {cache.tweets.stats()}")
+                return False
+            cache.set("summary", "2", {"bullet_points": []})
+            if cache.tweets.stats()["tweets"] != 0 or cache.get("summary", "1") is None:
+                print(f"Periodic purge did not free expired tweets: {cache.tweets.stats()}")
+                return False
+            print("Periodic purge frees expired threads' tweets")
+        
+        return True
+        
+    except Exception as e:
+        print(f"✗ Tweet store module test failed: {e}")
+        return False
+
+def test_build_assets_module():
+    """
+    Test fingerprinted, precompressed asset builds and the manifest
+    """
+    print("\nTesting asset build...")
+    
+    try:
+        import contextlib
+        import gzip
+        import io
+        import tempfile
+        from build_assets import build, load_manifest, fingerprint
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            static_dir = os.path.join(tmp_dir, "static")
+            out_dir = os.path.join(static_dir, "dist")
+            os.makedirs(static_dir)
+            css = (".card { padding: 1rem; }\n" * 200).encode()
+            with open(os.path.join(static_dir, "style.css"), "wb") as f:
+                f.write(css)
+            with open(os.path.join(static_dir, "notes.txt"), "w") as f:
+                f.write("not an asset")
+            
+            with contextlib.redirect_stderr(io.StringIO()):
+                manifest = build(static_dir, out_dir)
+            hashed = f"style.{fingerprint(css)}.css"
+            if manifest != {"style.css": f"dist/{hashed}"} or load_manifest(out_dir) != manifest:
+                print(f"Unexpected manifest: {manifest}")
+                return False
+            
+            with open(os.path.join(out_dir, hashed + ".gz"), "rb") as f:
+                if gzip.decompress(f.read()) != css:
+                    print("Gzip variant does not match the source")
+                    return False
+            print("Assets fingerprinted and precompressed")
+            
+            # A changed asset gets a new name and the stale build is removed
+            with open(os.path.join(static_dir, "style.css"), "ab") as f:
+                f.write(b".new { margin: 0; }\n")
+            with contextlib.redirect_stderr(io.StringIO()):
+                manifest = build(static_dir, out_dir)
+            if manifest["style.css"] == f"dist/{hashed}" or os.path.exists(os.path.join(out_dir, hashed)):
+                print("Changed asset kept its old fingerprint")
+                return False
+            
+            if load_manifest(os.path.join(tmp_dir, "missing")) != {}:
+                print("Missing manifest did not fall back to unhashed assets")
+                return False
+            print("Rebuilds replace stale fingerprints")
+        
+        return True
+        
+    except Exception as e:
+        print(f"✗ Asset build test failed: {e}")
+        return False
+
+def test_compression_module():
+    """
+    Test that dynamic gzip sets Vary on every compressible response
+    """
+    print("\nTesting response compression...")
+
+    try:
+        import asyncio
+        import gzip
+        from compression import GZipDynamicMiddleware
+
+        def app_for(body, media_type):
+            async def app(scope, receive, send):
+                await send({"type": "http.response.start", "status": 200,
+                            "headers": [(b"content-type", media_type.encode("latin-1"))]})
+                await send({"type": "http.response.body", "body": body, "more_body": False})
+            return app
+
+        def call(body, media_type, accept_encoding):
+            headers = [(b"accept-encoding", accept_encoding.encode("latin-1"))] if accept_encoding else []
+            sent = []
+
+            async def send(message):
+                sent.append(message)
+
+            middleware = GZipDynamicMiddleware(app_for(body, media_type), minimum_size=100)
+            asyncio.run(middleware({"type": "http", "headers": headers}, None, send))
+            return dict((key.decode(), value.decode()) for key, value in sent[0]["headers"]), sent[1]["body"]
+
+        large, small = b'{"a": "' + b"x" * 500 + b'"}', b'{"a": 1}'
+        for body, accept_encoding in ((large, "gzip"), (large, None), (large, "gzip;q=0"), (small, "gzip")):
+            headers, sent_body = call(body, "application/json", accept_encoding)
+            if headers.get("vary") != "Accept-Encoding":
+                print(f"Missing Vary for {len(body)} bytes with Accept-Encoding {accept_encoding!r}: {headers}")
+                return False
+            compressed = headers.get("content-encoding") == "gzip"
+            if compressed != (body is large and accept_encoding == "gzip"):
+                print(f"Unexpected compression for Accept-Encoding {accept_encoding!r}: {headers}")
+                return False
+            if (gzip.decompress(sent_body) if compressed else sent_body) != body:
+                print("Response body altered")
+                return False
+
+        headers, _ = call(large, "image/png", "gzip")
+        if "vary" in headers or "content-encoding" in headers:
+            print(f"Non-compressible response touched: {headers}")
+            return False
+
+        print("Vary: Accept-Encoding set on every compressible response")
+        return True
+
+    except Exception as e:
+        print(f"✗ Compression test failed: {e}")
+        return False
+
+def test_serialization_module():
+    """
+    Test the response dataclasses and the fast JSON encoder
+    """
+    print("\nTesting serialization module...")
+    
+    try:
+        import json
+        import serialization
+        from serialization import SummaryResult, ThreadSummary, dumps
+        
+        result = SummaryResult(
+            success=True,
+            summary=ThreadSummary(
+                bullet_points=["First — point", "Second point"],
+                author="alice",
+                tweet_count=4,
+                original_url="https://x.com/alice/status/1",
+                processing_time_seconds=1.5
+            ),
+            processing_time=1.5
+        )
+        
+        if hasattr(result, "__dict__") or hasattr(result.summary, "__dict__"):
+            print("Response models are not slotted")
+            return False
+        
+        expected = result.to_dict()
+        if json.loads(dumps(result)) != expected or expected["summary"]["author"] != "alice":
+            print(f"Unexpected encoding with {serialization.BACKEND}: {dumps(result)}")
+            return False
+        print(f"Responses encoded with {serialization.BACKEND}")
+        
+        # The stdlib fallback produces the same document
+        fast_encoder = serialization.orjson
+        serialization.orjson = None
+        try:
+            fallback = dumps({"items": [result]})
+        finally:
+            serialization.orjson = fast_encoder
+        if json.loads(fallback) != {"items": [expected]} or "—".encode() not in fallback:
+            print(f"Unexpected stdlib encoding: {fallback}")
+            return False
+        print("Stdlib fallback encodes the same document")
+        
+        return True
+        
+    except Exception as e:
+        print(f"✗ Serialization test failed: {e}")
+        return False
+
+def test_structured_logging_module():
+    """
+    Test queued JSON logging with request IDs and sampling
+    """
+    print("\nTesting structured logging module...")
+    
+    import logging
+    root = logging.getLogger()
+    saved_handlers, saved_level = list(root.handlers), root.level
+    try:
+        import contextvars
+        import io
+        import json
+        from structured_logging import configure_logging, shutdown_logging, bind_request_id, parse_sample_rates
+        from metrics import LOG_RECORDS_DROPPED
+        
+        if parse_sample_rates("scraper=0.1, bad, =1, inflight=x") != {"scraper": 0.1}:
+            print("Malformed sample rates were not skipped")
+            return False
+        
+        stream = io.StringIO()
+        configure_logging(sample_rates={"test.sampled": 0}, stream=stream)
+        dropped_before = LOG_RECORDS_DROPPED.get(reason="sampled")
+        
+        def log_request():
+            bind_request_id("req-1")
+            logging.getLogger("test.app").info("Scraping %s", "https://x.com/a/status/1", extra={"attempt": 2})
+        contextvars.copy_context().run(log_request)
+        sampled = logging.getLogger("test.sampled.child")
+        sampled.info("Dropped by sampling")
+        sampled.warning("Warnings are always kept")
+        span_tree = {"name": "GET /", "children": [{"name": "scrape", "duration_ms": 1.5}]}
+        logging.getLogger("trace").info("trace %s", "t1", extra={"trace": span_tree})
+        shutdown_logging()
+        
+        records = [json.loads(line) for line in stream.getvalue().splitlines()]
+        if [record["message"] for record in records] != ["Scraping https://x.com/a/status/1", "Warnings are always kept", "trace t1"]:
+            print(f"Unexpected records: {records}")
+            return False
+        if records[0]["request_id"] != "req-1" or records[0]["attempt"] != 2 or records[1]["request_id"] is not None:
+            print(f"Request context not recorded: {records}")
+            return False
+        if records[2]["trace"] != span_tree:
+            print(f"Nested extra field not serialized as JSON: {records[2]}")
+            return False
+        if LOG_RECORDS_DROPPED.get(reason="sampled") != dropped_before + 1:
+            print("Sampled record was not counted")
+            return False
+        print("JSON records carry request IDs; INFO records are sampled")
+        
+        return True
+        
+    except Exception as e:
+        print(f"✗ Structured logging test failed: {e}")
+        return False
+    finally:
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        for handler in saved_handlers:
+            root.addHandler(handler)
+        root.setLevel(saved_level)
+
+def test_http_cache_module():
+    """
+    Test the summary ETag, If-None-Match revalidation and Cache-Control
+    """
+    print("\nTesting HTTP cache module...")
+
+    try:
+        import hashlib
+        import json
+        from http_cache import summary_body, strong_etag, etag_matches, conditional_response
+
+        summary = {"bullet_points": ["a", "b"], "author": "alice", "tweet_count": 2}
+        reordered = {"tweet_count": 2, "author": "alice", "bullet_points": ["a", "b"]}
+        body = summary_body("42", summary)
+        if body != summary_body("42", reordered) or body != json.dumps(json.loads(body), sort_keys=True, separators=(",", ":")).encode("utf-8"):
+            print(f"Summary body not serialized deterministically: {body}")
+            return False
+        if json.loads(body)["summary"]["original_url"] != "https://x.com/i/status/42":
+            print("Summary body missing the original URL")
+            return False
+
+        etag = strong_etag(body)
+        if etag != '"' + hashlib.sha256(body).hexdigest()[:32] + '"' or etag.startswith("W/"):
+            print(f"Unexpected ETag: {etag}")
+            return False
+        if strong_etag(summary_body("42", {**summary, "tweet_count": 3})) == etag:
+            print("Changed summary kept its ETag")
+            return False
+
+        for header, expected in ((None, False), ("", False), ('"other"', False), (etag, True),
+                                 (f'"other", {etag}', True), (f"W/{etag}", True), ("*", True)):
+            if etag_matches(etag, header) != expected:
+                print(f"If-None-Match {header!r} matched={not expected}")
+                return False
+
+        status, headers, payload = conditional_response(body, None, 300, 86400)
+        if status != 200 or payload != body or headers != {
+            "ETag": etag, "Cache-Control": "public, max-age=300, stale-while-revalidate=86400"
+        }:
+            print(f"Unexpected fresh response: {status} {headers}")
+            return False
+        status, revalidated, payload = conditional_response(body, etag, 300, 86400)
+        if status != 304 or payload != b"" or revalidated != headers:
+            print(f"Matching If-None-Match did not get 304: {status} {revalidated}")
+            return False
+
+        print("ETag, If-None-Match and Cache-Control working correctly")
+        return True
+
+    except Exception as e:
+        print(f"✗ HTTP cache module test failed: {e}")
+        return False
+
+def test_fragments_module():
+    """
+    Test cached result cards: hits, template versions and invalidation
+    """
+    print("\nTesting result fragments...")
+    
+    try:
+        import asyncio
+        from fragments import ResultFragments, PROCESSING_TIME_SLOT, fill_processing_time
+        
+        store = {}
+        renders, summaries, hits = [], [], []
+        
+        def render(status_id, summary):
+            renders.append(status_id)
+            return f"<div>{summary['author']} in {PROCESSING_TIME_SLOT}s</div>"
+        
+        def fragments_for(version):
+            return ResultFragments(
+                lambda ns, key: store.get((ns, key)) if key else None,
+                lambda ns, key, value: store.__setitem__((ns, key), value) if key else None,
+                lambda ns, key: store.pop((ns, key), None),
+                render, version
+            )
+        
+        async def summarize():
+            summaries.append(1)
+            return {"author": "alice"}
+        
+        async def on_hit():
+            hits.append(1)
+        
+        fragments = fragments_for("v1")
+        first = asyncio.run(fragments.get_or_render("42", summarize, on_hit=on_hit))
+        second = asyncio.run(fragments.get_or_render("42", summarize, on_hit=on_hit))
+        if first != second or (len(renders), len(summaries), len(hits)) != (1, 1, 1):
+            print(f"Cache hit did not skip the pipeline and render: {renders}, {summaries}, {hits}")
+            return False
+        print("Cached card skips the pipeline and the render")
+        
+        if fill_processing_time(second, 1.234) != "<div>alice in 1.23s</div>":
+            print(f"Processing time slot not filled: {fill_processing_time(second, 1.234)}")
+            return False
+        
+        # A card from another template version is a miss and is re-rendered
+        asyncio.run(fragments_for("v2").get_or_render("42", summarize))
+        if len(renders) != 2 or store[("fragment", "42")]["version"] != "v2":
+            print("Card from an old template version was served")
+            return False
+        
+        fragments.invalidate("42")
+        if fragments.get("42") is not None:
+            print("Invalidated card still served")
+            return False
+        
+        # Invalid URLs have no status ID and are never cached
+        asyncio.run(fragments.get_or_render(None, summarize))
+        if any(key is None for _, key in store):
+            print("Card cached without a status ID")
+            return False
+        print("Template versions and invalidation working correctly")
+        
+        return True
+        
+    except Exception as e:
+        print(f"✗ Result fragments test failed: {e}")
+        return False
+
+def test_summary_store_module():
+    """
+    Test batched persistence and indexed search in the summary store
+    """
+    print("\nTesting summary store module...")
+    
+    try:
+        import sqlite3
+        import tempfile
+        from summary_store import SummaryStore
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            store = SummaryStore(os.path.join(tmp_dir, "summaries.db"))
+            
+            thread_data = {
+                "author": "alice",
+                "tweets": [
+                    {"text": "Rust makes systems programming safer"},
+                    {"text": "Ownership removes whole classes of bugs"}
+                ]
+            }
+            summary = {"author": "alice", "bullet_points": ["Rust is memory safe"], "tweet_count": 2}
+            store.save("111", thread_data, summary, original_url="https://x.com/alice/status/111")
+            store.save("222", {"author": "bob", "tweets": [{"text": "Gardening tips for spring"}]},
+                       {"author": "bob", "bullet_points": ["Plant early"], "tweet_count": 1})
+            store.close()
+            
+            if store.get("111")["tweets"][1] != "Ownership removes whole classes of bugs":
+                print("Stored thread lookup by status ID failed")
+                return False
+            print("Lookup by status ID working correctly")
+            
+            by_author = store.search(author="@alice")
+            if [item["status_id"] for item in by_author["items"]] != ["111"]:
+                print(f"Author filter returned {by_author['items']}")
+                return False
+            print("Author filter working correctly")
+            
+            by_text = store.search(query="ownership bugs")
+            if [item["status_id"] for item in by_text["items"]] != ["111"]:
+                print(f"Full-text search returned {by_text['items']}")
+                return False
+            print("Full-text search working correctly")
+            
+            page = store.search(limit=1)
+            if len(page["items"]) != 1 or not page["has_more"]:
+                print("Pagination did not report another page")
+                return False
+            print("Pagination working correctly")
+            
+            # A repost of the thread shares its tweets; a re-save replaces the index entry
+            store.save("333", thread_data, summary)
+            store.save("222", {"author": "bob", "tweets": [{"text": "Pruning roses in autumn"}]},
+                       {"author": "bob", "bullet_points": ["Prune late"], "tweet_count": 1})
+            store.close()
+            if store.tweets.stats()["tweets"] != 3:
+                print(f"Tweets not stored once: {store.tweets.stats()}")
+                return False
+            if store.search(query="gardening")["items"] or [item["status_id"] for item in store.search(query="pruning")["items"]] != ["222"]:
+                print("Re-saved thread left its old text indexed")
+                return False
+            print("Tweet text stored once and re-indexed on update")
+            
+            legacy_path = os.path.join(tmp_dir, "legacy.db")
+            conn = sqlite3.connect(legacy_path)
+            conn.executescript("""
+                CREATE TABLE threads (status_id TEXT PRIMARY KEY, author TEXT NOT NULL, original_url TEXT,
+                    tweet_count INTEGER NOT NULL, tweets TEXT NOT NULL, bullet_points TEXT NOT NULL,
+                    created_at REAL NOT NULL, updated_at REAL NOT NULL);
+                CREATE VIRTUAL TABLE threads_fts USING fts5(status_id UNINDEXED, tweets_text, bullets_text);
+                INSERT INTO threads VALUES ('444', 'carol', '', 1, '["Tide pools at low tide"]', '["Go early"]', 1, 1);
+                INSERT INTO threads_fts VALUES ('444', 'Tide pools at low tide', 'Go early');
+            """)
+            conn.commit()
+            conn.close()
+            legacy = SummaryStore(legacy_path)
+            if legacy.get("444")["tweets"] != ["Tide pools at low tide"] or [item["status_id"] for item in legacy.search(query="tide")["items"]] != ["444"]:
+                print("Inline tweets were not migrated into the tweet store")
+                return False
+            print("Stores with inline tweets are migrated")
+        
+        return True
+        
+    except Exception as e:
+        print(f"✗ Summary store module test failed: {e}")
+        return False
+
+def test_scrape_archive_module():
+    """
+    Test archive append, indexed lookup, and re-parsing a segment
+    """
+    print("\nTesting scrape archive module...")
+    
+    try:
+        import tempfile
+        from scrape_archive import ScrapeArchive, iter_segment, _reparse_segment
+        from xthread_scraper import PARSER_VERSION
+        
+        markdown = (
+            "@alice\n\n"
+            "1/ Compression trades CPU time for smaller archives on disk.\n\n"
+            "2/ Memory-mapped segments let readers skip the read syscalls.\n"
+        )
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            archive = ScrapeArchive(tmp_dir)
+            archive.append("111", "https://x.com/alice/status/111", {"markdown": markdown})
+            archive.append("222", "https://x.com/bob/status/222", {"markdown": "too short"})
+            
+            record = archive.lookup("111")
+            if not record or record["payload"]["markdown"] != markdown:
+                print("Indexed lookup did not return the archived payload")
+                return False
+            print("Indexed lookup working correctly")
+            
+            segments = archive.segments()
+            if len(list(iter_segment(segments[0]))) != 2:
+                print("Segment scan did not return both records")
+                return False
+            print("Memory-mapped segment scan working correctly")
+            
+            results = _reparse_segment(segments[0])["results"]
+            if not results[0]["success"] or results[1]["success"]:
+                print(f"Unexpected re-parse outcome: {results}")
+                return False
+            if results[0]["parser_version"] != PARSER_VERSION:
+                print("Re-parsed results are not stamped with the parser version")
+                return False
+            print(f"Re-parse working correctly ({results[0]['thread_data']['total_tweets']} tweets)")
+        
+        return True
+        
+    except Exception as e:
+        print(f"✗ Scrape archive module test failed: {e}")
+        return False
+
+def test_pipeline_module():
+    """
+    Test the shared scrape-and-summarize pipeline against a real cache
+    """
+    print("\nTesting pipeline module...")
+
+    try:
+        import asyncio
+        import tempfile
+        from cache import SharedCache
+        from pipeline import SummaryPipeline, PipelineError
+        from scheduler import PriorityScheduler
+
+        class FakeScraper:
+            def __init__(self):
+                self.calls = 0
+            async def scrape_thread(self, url, expected_tweets=None):
+                self.calls += 1
+                if url.endswith("/3"):
+                    return {"success": False, "error": "Thread is private", "failure_cause": "private"}
+                if url.endswith("/4"):
+                    return {"success": False, "error": "No tweets found", "failure_cause": "truncated_by_deadline"}
+                return {"success": True, "thread_data": {
+                    "author": "alice", "tweets": [{"text": "hi", "author": "alice"}], "full_text": "hi", "total_tweets": 1
+                }}
+
+        class FakeSummarizer:
+            async def summarize_thread(self, thread_data):
+                return {"success": True, "summary": {"bullet_points": ["point"], "author": "alice", "tweet_count": 1},
+                        "usage": {"total_tokens": 10}}
+
+        class CountingScheduler(PriorityScheduler):
+            runs = 0
+            async def run(self, awaitable, priority=None):
+                CountingScheduler.runs += 1
+                return await super().run(awaitable, priority)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache = SharedCache(os.path.join(tmp_dir, "cache.db"))
+            scraper = FakeScraper()
+            pipeline = SummaryPipeline(scraper, FakeSummarizer(), cache=cache,
+                                       scrape_scheduler=CountingScheduler("scrape", 1),
+                                       llm_scheduler=CountingScheduler("llm", 1))
+
+            cache.set("fragment", "1", {"version": "v1", "html": "<div>old</div>"})
+            summary, usage = asyncio.run(pipeline.compute("https://x.com/a/status/1", "https://x.com/a/status/1", "1"))
+            if cache.get("summary", "1") != summary or cache.get("scrape", "1") is None or usage != {"total_tokens": 10}:
+                print(f"Pipeline did not fill the caches: {summary}")
+                return False
+            if cache.get("fragment", "1") is not None:
+                print("New summary left the rendered card cached")
+                return False
+            if CountingScheduler.runs != 2:
+                print(f"Scrape and LLM calls bypassed the schedulers: {CountingScheduler.runs}")
+                return False
+            print("Pipeline fills the caches through the schedulers and drops stale cards")
+
+            try:
+                asyncio.run(pipeline.compute("https://x.com/a/status/3", "https://x.com/a/status/3", "3"))
+                print("Failed scrape did not raise")
+                return False
+            except PipelineError as e:
+                if e.status_code != 400:
+                    print(f"Failed scrape raised status {e.status_code}")
+                    return False
+            try:
+                pipeline.check_failure("3")
+                print("Known-bad thread was not negative-cached")
+                return False
+            except PipelineError:
+                pass
+            print("Failed scrapes are negative-cached")
+
+            try:
+                asyncio.run(pipeline.compute("https://x.com/a/status/4", "https://x.com/a/status/4", "4"))
+                print("Deadline-capped scrape did not raise")
+                return False
+            except PipelineError:
+                pass
+            if cache.get("failure", "4") is not None:
+                print("Deadline-capped scrape was negative-cached")
+                return False
+            print("Scrapes cut short by the deadline are not negative-cached")
+
+        return True
+
+    except Exception as e:
+        print(f"✗ Pipeline module test failed: {e}")
+        return False
+
+def test_batch_summarize_module():
+    """
+    Test the batch CLI's incremental output and checkpoint resume
+    """
+    print("\nTesting batch summarize module...")
+
+    try:
+        import asyncio
+        import contextlib
+        import io
+        import json
+        import tempfile
+        from batch_summarize import BatchSummarizer, read_urls
+        from xthread_scraper import ThreadScraper
+
+        class FakeScraper(ThreadScraper):
+            def __init__(self):
+                self.calls = 0
+            async def scrape_thread(self, url, expected_tweets=None):
+                self.calls += 1
+                if url.endswith("/3"):
+                    return {"success": False, "error": "Thread is private", "failure_cause": "private"}
+                return {"success": True, "thread_data": {"author": "alice", "tweets": [{"text": url}], "total_tweets": 1}}
+
+        class FakeSummarizer:
+            async def summarize_thread(self, thread_data):
+                return {"success": True, "summary": {"bullet_points": ["point"], "author": "alice", "tweet_count": 1}}
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            url_file = os.path.join(tmp_dir, "urls.txt")
+            with open(url_file, "w") as f:
+                f.write("# research set\nhttps://x.com/a/status/1\n\nhttps://twitter.com/a/status/1?s=20\n"
+                        "https://x.com/a/status/2\nhttps://x.com/a/status/3\nnot a url\n")
+            urls = read_urls(url_file)
+            if len(urls) != 5:
+                print(f"Unexpected URLs read: {urls}")
+                return False
+
+            output = os.path.join(tmp_dir, "results.jsonl")
+            checkpoint = output + ".checkpoint"
+            scraper = FakeScraper()
+            batch = BatchSummarizer(scraper, FakeSummarizer(), concurrency=2, timeout=5)
+
+            with contextlib.redirect_stderr(io.StringIO()):
+                first = asyncio.run(batch.run(urls, output, checkpoint))
+                second = asyncio.run(batch.run(urls, output, checkpoint))
+
+            if (first["succeeded"], first["failed"]) != (2, 2) or scraper.calls != 4:
+                print(f"Unexpected first run: {first}, {scraper.calls} scrapes")
+                return False
+
+            # Completed threads are skipped; only failures are retried
+            if second["skipped"] != 3 or second["processed"] != 2:
+                print(f"Resume did not skip completed threads: {second}")
+                return False
+
+            with open(output) as f:
+                lines = [json.loads(line) for line in f]
+            if len(lines) != 6 or not all("processing_time" in line for line in lines):
+                print(f"Unexpected output lines: {lines}")
+                return False
+
+        print("Batch output and checkpoint resume working correctly")
+        return True
+
+    except Exception as e:
+        print(f"✗ Batch summarize module test failed: {e}")
+        return False
+
+def test_bulk_module():
+    """
+    Test bulk dedupe by status ID, per-item error lines and one line per input
+    """
+    print("\nTesting bulk module...")
+
+    try:
+        import asyncio
+        import json
+        from bulk import BulkSummary, group_by_thread
+        from xthread_scraper import ThreadScraper, canonicalize_thread_url
+
+        scraper = ThreadScraper.__new__(ThreadScraper)
+
+        def thread_key(url):
+            canonical_url = canonicalize_thread_url(url)
+            return scraper._extract_thread_id(canonical_url) if canonical_url else None
+
+        urls = [
+            "https://x.com/alice/status/1",
+            " https://mobile.twitter.com/alice/status/1?s=20 ",
+            "https://x.com/bob/status/2",
+            "not a url",
+            "https://x.com/carol/status/3",
+            "https://x.com/alice/status/1/photo/1"
+        ]
+        groups = group_by_thread(urls, thread_key)
+        if groups != {"1": [0, 1, 5], "2": [2], "not a url": [3], "3": [4]}:
+            print(f"URLs not grouped by status ID: {groups}")
+            return False
+
+        calls = []
+
+        async def summarize(url):
+            calls.append(url)
+            if "bob" in url:
+                raise RuntimeError("scraper exploded")
+            if url == "not a url":
+                return {"success": False, "error": "Invalid URL", "status_code": 400}
+            await asyncio.sleep(0.01 if "carol" in url else 0.02)
+            return {"success": True, "summary": {"author": url.split("/")[3]}}
+
+        async def collect():
+            bulk = BulkSummary(summarize, concurrency=2)
+            return [json.loads(line) async for line in bulk.stream(urls, groups)]
+
+        lines = asyncio.run(collect())
+        if sorted(line["index"] for line in lines) != list(range(len(urls))):
+            print(f"Indices not emitted exactly once: {[line['index'] for line in lines]}")
+            return False
+        if len(calls) != 4:
+            print(f"Repeated thread summarized more than once: {calls}")
+            return False
+
+        by_index = {line["index"]: line for line in lines}
+        if any(by_index[index]["summary"] != {"author": "alice"} for index in (0, 1, 5)):
+            print(f"Repeated thread lines differ: {lines}")
+            return False
+        if by_index[1]["url"] != urls[1]:
+            print("Line does not echo its own input URL")
+            return False
+        if by_index[2]["success"] or by_index[2]["status_code"] != 500 or "scraper exploded" not in by_index[2]["error"]:
+            print(f"Failing item not reported on its line: {by_index[2]}")
+            return False
+        if by_index[3] != {"index": 3, "url": "not a url", "success": False, "error": "Invalid URL", "status_code": 400}:
+            print(f"Item error payload not passed through: {by_index[3]}")
+            return False
+        if not by_index[4]["success"]:
+            print("One failing item stopped the others")
+            return False
+
+        print("Bulk streaming dedupes threads and reports every input once")
+        return True
+
+    except Exception as e:
+        print(f"✗ Bulk module test failed: {e}")
+        return False
+
+def test_author_digest_module():
+    """
+    Test concurrent fan-out and hierarchical combining of an author's threads
+    """
+    print("\nTesting author digest module...")
+
+    try:
+        import asyncio
+        import time
+        from author_digest import AuthorDigest
+
+        combined = []
+
+        async def combine(thread_data):
+            combined.append(len(thread_data["aggregate_of"]))
+            await asyncio.sleep(0.01)
+            return {"success": True, "summary": {"bullet_points": [f"digest of {len(thread_data['aggregate_of'])}"]}}
+
+        async def thread(author, delay, fail=False):
+            await asyncio.sleep(delay)
+            if fail:
+                raise ValueError("Failed to scrape thread")
+            return {"bullet_points": [f"point after {delay}"], "author": author, "tweet_count": 2}
+
+        async def scenario():
+            digest = AuthorDigest(combine, fan_in=2)
+            jobs = [(f"url{i}", thread("naval", 0.05 + i * 0.01)) for i in range(5)]
+            jobs.append(("other", thread("someone", 0.01)))
+            jobs.append(("broken", thread("naval", 0.01, fail=True)))
+            start = time.perf_counter()
+            lines = [line async for line in digest.run(jobs, author="@naval")]
+            return lines, time.perf_counter() - start
+
+        lines, elapsed = asyncio.run(scenario())
+        threads = [line for line in lines if line["type"] == "thread"]
+        final = lines[-1]
+
+        if len(threads) != 7 or sum(line["success"] for line in threads) != 5:
+            print(f"Unexpected thread lines: {threads}")
+            return False
+        if not final.get("final") or not final["success"]:
+            print(f"Unexpected final digest: {final}")
+            return False
+        if final["summary"]["thread_count"] != 5 or final["summary"]["tweet_count"] != 10:
+            print(f"Digest lost thread totals: {final['summary']}")
+            return False
+        # 5 threads with fan-in 2 reduce as 2+2+1 -> 2+1 -> 2
+        if sorted(combined) != [2, 2, 2, 2]:
+            print(f"Unexpected combine calls: {combined}")
+            return False
+        # Threads run concurrently: total is near the slowest thread, not the sum
+        if elapsed > 0.25:
+            print(f"Fan-out took {elapsed:.2f}s")
+            return False
+
+        print("Author digest fan-out and hierarchical combining working correctly")
+        return True
+
+    except Exception as e:
+        print(f"✗ Author digest module test failed: {e}")
+        return False
+
+def test_thread_watcher_module():
+    """
+    Test that watched threads are only re-summarized when new tweets appear
+    """
+    print("\nTesting thread watcher module...")
+    
+    try:
+        import asyncio
+        import tempfile
+        from thread_watcher import ThreadWatcher
+        
+        tweets = [{"text": "1/ First tweet of the thread"}, {"text": "2/ Second tweet"}]
+        
+        class FakeScraper:
+            async def scrape_thread(self, url, expected_tweets=None):
+                return {"success": True, "thread_data": {
+                    "author": "alice", "tweets": list(tweets), "full_text": "x"
+                }}
+        
+        class FakeSummarizer:
+            def __init__(self):
+                self.inputs = []
+            async def summarize_thread(self, thread_data):
+                self.inputs.append(thread_data)
+                return {"success": True, "summary": {
+                    "bullet_points": [f"point {len(self.inputs)}"],
+                    "author": "alice",
+                    "tweet_count": len(thread_data["tweets"])
+                }}
+        
+        published = []
+        summarizer = FakeSummarizer()
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            watcher = ThreadWatcher(
+                os.path.join(tmp_dir, "watches.db"), FakeScraper(), summarizer,
+                lambda *args: published.append(args)
+            )
+            watcher.add("1", "https://x.com/alice/status/1")
+            
+            first = asyncio.run(watcher.check("1"))
+            unchanged = asyncio.run(watcher.check("1"))
+            tweets.append({"text": "3/ A tweet appended later"})
+            updated = asyncio.run(watcher.check("1"))
+        
+        if not first["changed"] or unchanged["changed"] or not updated["changed"]:
+            print(f"Unexpected change detection: {first}, {unchanged}, {updated}")
+            return False
+        if len(summarizer.inputs) != 2:
+            print(f"Summarizer called {len(summarizer.inputs)} times, expected 2")
+            return False
+        print("Summarizer only called when the thread changed")
+        
+        incremental = summarizer.inputs[1]
+        if incremental.get("previous_summary") != ["point 1"] or len(incremental.get("new_tweets", [])) != 1:
+            print("Refresh did not send previous summary and new tweets")
+            return False
+        print("Refresh sent previous summary plus new tweets")
+        
+        if len(published) != 2 or published[-1][3]["tweet_count"] != 3:
+            print("Refreshed summary was not published")
+            return False
+        
+        return True
+        
+    except Exception as e:
+        print(f"✗ Thread watcher module test failed: {e}")
+        return False
+
+def test_main_module():
+    """
+    Test the main FastAPI module
+    """
+    print("\nTesting main module...")
+    
+    try:
+        from main import app
+        print("FastAPI app imported successfully")
+        
+        # Check if required routes exist
+        routes = [route.path for route in app.routes]
+        
+        required_routes = ["/", "/health", "/metrics", "/api/summarize", "/api/summarize/bulk", "/api/summary/{status_id}", "/api/summaries", "/summarize"]
+        
+        for route in required_routes:
+            if route in routes:
+                print(f"Route {route} exists")
+            else:
+                print(f"Route {route} missing")
+                return False
+        
+        # X-Priority can lower a request to batch but never raise bulk work
+        import main
+        from starlette.requests import Request
+        
+        def priority(path, **headers):
+            raw = [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()]
+            return main._request_priority(Request({"type": "http", "method": "POST", "path": path,
+                                                   "headers": raw, "query_string": b""}))
+        
+        cases = [
+            (("/api/summarize/bulk",), {}, "batch"),
+            (("/api/summarize/bulk",), {"x_priority": "interactive"}, "batch"),
+            (("/api/summarize",), {}, "interactive"),
+            (("/api/summarize",), {"x_priority": "batch"}, "batch")
+        ]
+        for args, headers, expected in cases:
+            if priority(*args, **headers) != expected:
+                print(f"Unexpected priority for {args[0]} with {headers}")
+                return False
+        print("X-Priority only lowers priority")
+        
+        return True
+        
+    except Exception as e:
+        print(f"✗ Main module test failed: {e}")
+        return False
+
+def test_main_result_pages():
+    """
+    Test the form and shared result pages against the fragment cache
+    """
+    print("\nTesting result pages...")
+    
+    try:
+        import asyncio
+        import tempfile
+        import main
+        from cache import SharedCache
+        from fragments import PROCESSING_TIME_SLOT
+        from xthread_scraper import ThreadScraper
+        from starlette.requests import Request
+        
+        def request(path):
+            return Request({"type": "http", "method": "GET", "path": path, "headers": [], "query_string": b""})
+        
+        summary = {"bullet_points": ["point"] * 5, "author": "alice", "tweet_count": 3}
+        thread_data = {"author": "alice", "tweets": [{"text": "hello", "author": "alice"}],
+                       "full_text": "hello", "total_tweets": 1}
+        pipeline = main.summary_pipeline
+        saved = (pipeline.cache, pipeline.store, pipeline.summarizer, main.summarize_thread, main.thread_scraper)
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            pipeline.cache = SharedCache(os.path.join(tmp_dir, "cache.db"))
+            pipeline.store = None
+            # Only its status ID parsing is used; no Firecrawl key needed
+            main.thread_scraper = ThreadScraper.__new__(ThreadScraper)
+            try:
+                async def no_pipeline(*args, **kwargs):
+                    raise AssertionError("pipeline ran on a cached card")
+                main.summarize_thread = no_pipeline
+                
+                def no_render(*args):
+                    raise AssertionError("cached card was re-rendered")
+                
+                main.result_fragments.render("42", summary)
+                render = main.result_fragments._render
+                main.result_fragments._render = no_render
+                try:
+                    response = asyncio.run(main.summarize_thread_form(request("/summarize"), url="https://x.com/alice/status/42"))
+                finally:
+                    main.result_fragments._render = render
+                if response.status_code != 200 or PROCESSING_TIME_SLOT.encode() in response.body or b"alice" not in response.body:
+                    print(f"Cached form result not served: {response.status_code}")
+                    return False
+                print("Form serves cached cards with the processing time filled in")
+                
+                main._publish_refreshed_summary("42", "https://x.com/alice/status/42", thread_data, summary)
+                if main.result_fragments.get("42") is not None:
+                    print("Refreshed summary left the old card cached")
+                    return False
+                
+                class FakeSummarizer:
+                    async def summarize_thread(self, data):
+                        return {"success": True, "summary": summary}
+                pipeline.summarizer = FakeSummarizer()
+                main.result_fragments.render("42", summary)
+                asyncio.run(main._compute_summary("https://x.com/alice/status/42", "https://x.com/alice/status/42", "42"))
+                if main.result_fragments.get("42") is not None:
+                    print("New summary left the old card cached")
+                    return False
+                print("New and refreshed summaries invalidate the card")
+                
+                class RecordingLimiter:
+                    def __init__(self):
+                        self.charges = []
+                    async def consume(self, kind, weight=1):
+                        self.charges.append(kind)
+                
+                limiter = RecordingLimiter()
+                saved_limiter = main.rate_limiter
+                main.rate_limiter = limiter
+                try:
+                    pipeline.cache_set("summary", "42", summary)
+                    asyncio.run(main.get_summary("42", request("/api/summary/42")))
+                    main.result_fragments.render("42", summary)
+                    asyncio.run(main.shared_result_page("42", request("/thread/42")))
+                    main.result_fragments.invalidate("42")
+                    asyncio.run(main.shared_result_page("42", request("/thread/42")))
+                finally:
+                    main.rate_limiter = saved_limiter
+                if limiter.charges != [main.HIT] * 3:
+                    print(f"Known summaries charged {limiter.charges}")
+                    return False
+                print("Summary lookups and share pages charge a hit when served from cache")
+                
+                response = asyncio.run(main.shared_result_page("abc", request("/thread/abc")))
+                if response.status_code != 404:
+                    print(f"Non-numeric share page returned {response.status_code}")
+                    return False
+                print("Non-numeric share pages return 404")
+            finally:
+                (pipeline.cache, pipeline.store, pipeline.summarizer,
+                 main.summarize_thread, main.thread_scraper) = saved
+        
+        return True
+        
+    except Exception as e:
+        print(f"✗ Result pages test failed: {e}")
         return False
 
 def test_file_structure():
@@ -188,8 +2148,34 @@ def main():
         test_file_structure,
         test_imports,
         test_firecrawl_module,
+        test_scrape_policy,
         test_summarizer_module,
-        test_main_module
+        test_token_usage_module,
+        test_lazy_imports,
+        test_metrics_module,
+        test_tracing_module,
+        test_deadline_module,
+        test_inflight_module,
+        test_progress_module,
+        test_scheduler_module,
+        test_rate_limit_module,
+        test_cache_module,
+        test_tweet_store_module,
+        test_build_assets_module,
+        test_compression_module,
+        test_serialization_module,
+        test_http_cache_module,
+        test_fragments_module,
+        test_structured_logging_module,
+        test_summary_store_module,
+        test_scrape_archive_module,
+        test_pipeline_module,
+        test_batch_summarize_module,
+        test_bulk_module,
+        test_author_digest_module,
+        test_thread_watcher_module,
+        test_main_module,
+        test_main_result_pages
     ]
     
     passed = 0
@@ -0,0 +1,290 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+import sqlite3
+import time
+from typing import Callable, Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: every process runs its own scheduler
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+def change_fingerprint(text: str) -> str:
+    """
+    Fingerprint for spotting new tweets, insensitive to whitespace and case changes.
+
+    Scrapes of the same tweet differ in whitespace, so this is deliberately
+    looser than tweet_store.tweet_hash, which addresses stored tweet content.
+    """
+    normalized = ' '.join((text or '').split()).lower()
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()[:16]
+
+class ThreadWatcher:
+    """
+    Periodically re-scrapes watched threads and re-summarizes only on change.
+
+    Each watch keeps the content hashes of the tweets seen so far. A refresh
+    diffs the new scrape against them and calls the summarizer only when new
+    tweets appeared, sending the previous summary plus the new tweets rather
+    than the whole thread. Refreshed summaries are handed to `publish`, which
+    updates the caches and store behind the regular API.
+
+    Watches live in SQLite so every worker can add and list them, while a
+    file lock makes sure only one worker runs the refresh schedule.
+    """
+    def __init__(self, path: str, scraper, summarizer, publish: Callable,
+                 default_interval: float = 900, jitter: float = 0.2, min_interval: float = 60):
+        self.path = path
+        self.scraper = scraper
+        self.summarizer = summarizer
+        self.publish = publish
+        self.default_interval = default_interval
+        self.jitter = jitter
+        self.min_interval = min_interval
+        self._task: Optional[asyncio.Task] = None
+        self._lock_file = None
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS watches (
+                status_id TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                interval_seconds REAL NOT NULL,
+                tweet_hashes TEXT NOT NULL DEFAULT '[]',
+                summary TEXT,
+                next_check_at REAL NOT NULL,
+                last_checked_at REAL,
+                last_changed_at REAL,
+                check_count INTEGER NOT NULL DEFAULT 0,
+                change_count INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT,
+                created_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_watches_next_check ON watches (next_check_at)")
+
+    def _next_check(self, interval: float) -> float:
+        # Jitter spreads refreshes out so watches added together do not scrape together
+        return time.time() + interval * (1 + random.uniform(-self.jitter, self.jitter))
+
+    def add(self, status_id: str, url: str, interval: Optional[float] = None,
+            thread_data: Optional[Dict] = None, summary: Optional[Dict] = None) -> Dict[str, any]:
+        """
+        Start watching a thread, seeding it with an already known scrape/summary
+        """
+        interval = max(self.min_interval, interval or self.default_interval)
+        hashes = [change_fingerprint(tweet.get('text', '')) for tweet in (thread_data or {}).get('tweets', [])]
+        now = time.time()
+
+        # Without a seed the first check builds the baseline summary right away
+        next_check_at = self._next_check(interval) if (hashes and summary) else now
+
+        self._conn.execute("""
+            INSERT INTO watches (status_id, url, interval_seconds, tweet_hashes, summary, next_check_at, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (status_id) DO UPDATE SET
+                url = excluded.url,
+                interval_seconds = excluded.interval_seconds,
+                next_check_at = MIN(watches.next_check_at, excluded.next_check_at)
+        """, (status_id, url, interval, json.dumps(hashes), json.dumps(summary) if summary else None,
+              next_check_at, now))
+
+        return self.get(status_id)
+
+    def remove(self, status_id: str) -> bool:
+        cursor = self._conn.execute("DELETE FROM watches WHERE status_id = ?", (status_id,))
+        return cursor.rowcount > 0
+
+    def get(self, status_id: str) -> Optional[Dict[str, any]]:
+        row = self._conn.execute("SELECT * FROM watches WHERE status_id = ?", (status_id,)).fetchone()
+        return self._row_to_dict(row) if row else None
+
+    def list(self) -> List[Dict[str, any]]:
+        rows = self._conn.execute("SELECT * FROM watches ORDER BY created_at").fetchall()
+        return [self._row_to_dict(row) for row in rows]
+
+    def _row_to_dict(self, row: sqlite3.Row) -> Dict[str, any]:
+        return {
+            'status_id': row['status_id'],
+            'url': row['url'],
+            'interval_seconds': row['interval_seconds'],
+            'tweet_count': len(json.loads(row['tweet_hashes'])),
+            'summary': json.loads(row['summary']) if row['summary'] else None,
+            'next_check_at': row['next_check_at'],
+            'last_checked_at': row['last_checked_at'],
+            'last_changed_at': row['last_changed_at'],
+            'check_count': row['check_count'],
+            'change_count': row['change_count'],
+            'last_error': row['last_error']
+        }
+
+    async def check(self, status_id: str) -> Dict[str, any]:
+        """
+        Re-scrape one watched thread and re-summarize it if new tweets appeared
+        """
+        row = self._conn.execute("SELECT * FROM watches WHERE status_id = ?", (status_id,)).fetchone()
+        if row is None:
+            return {'status_id': status_id, 'changed': False, 'error': 'Not watched'}
+
+        known_hashes = json.loads(row['tweet_hashes'])
+        previous_summary = json.loads(row['summary']) if row['summary'] else None
+        now = time.time()
+        next_check_at = self._next_check(row['interval_seconds'])
+
+        scrape_result = await self.scraper.scrape_thread(row['url'], expected_tweets=len(known_hashes) or None)
+        if not scrape_result['success']:
+            self._conn.execute("""
+                UPDATE watches SET next_check_at = ?, last_checked_at = ?, check_count = check_count + 1,
+                                   last_error = ? WHERE status_id = ?
+            """, (next_check_at, now, scrape_result.get('error'), status_id))
+            return {'status_id': status_id, 'changed': False, 'error': scrape_result.get('error')}
+
+        thread_data = scrape_result['thread_data']
+        known = set(known_hashes)
+        new_tweets = []
+        new_hashes = []
+        for tweet in thread_data['tweets']:
+            digest = change_fingerprint(tweet.get('text', ''))
+            if digest not in known:
+                known.add(digest)
+                new_tweets.append(tweet)
+                new_hashes.append(digest)
+
+        if not new_tweets and previous_summary:
+            self._conn.execute("""
+                UPDATE watches SET next_check_at = ?, last_checked_at = ?, check_count = check_count + 1,
+                                   last_error = NULL WHERE status_id = ?
+            """, (next_check_at, now, status_id))
+            return {'status_id': status_id, 'changed': False, 'new_tweets': 0}
+
+        summary_input = thread_data
+        if previous_summary and known_hashes:
+            summary_input = {
+                **thread_data,
+                'previous_summary': previous_summary['bullet_points'],
+                'new_tweets': new_tweets
+            }
+
+        logger.info(f"Watched thread {status_id} has {len(new_tweets)} new tweets, refreshing summary")
+        summary_result = await self.summarizer.summarize_thread(summary_input)
+        if not summary_result['success']:
+            # Leave the hashes alone so the same tweets are retried next time
+            self._conn.execute("""
+                UPDATE watches SET next_check_at = ?, last_checked_at = ?, check_count = check_count + 1,
+                                   last_error = ? WHERE status_id = ?
+            """, (next_check_at, now, summary_result.get('error'), status_id))
+            return {'status_id': status_id, 'changed': False, 'error': summary_result.get('error')}
+
+        summary = {
+            'bullet_points': summary_result['summary']['bullet_points'],
+            'author': summary_result['summary']['author'],
+            'tweet_count': summary_result['summary']['tweet_count']
+        }
+        self._conn.execute("""
+            UPDATE watches SET tweet_hashes = ?, summary = ?, next_check_at = ?, last_checked_at = ?,
+                               last_changed_at = ?, check_count = check_count + 1,
+                               change_count = change_count + 1, last_error = NULL
+            WHERE status_id = ?
+        """, (json.dumps(known_hashes + new_hashes), json.dumps(summary), next_check_at, now, now, status_id))
+
+        try:
+            self.publish(status_id, row['url'], thread_data, summary)
+        except Exception as e:
+            logger.warning(f"Failed to publish refreshed summary for {status_id}: {str(e)}")
+
+        return {'status_id': status_id, 'changed': True, 'new_tweets': len(new_tweets), 'summary': summary}
+
+    def _acquire_scheduler_lock(self) -> bool:
+        """
+        Let only one worker process run the refresh schedule
+        """
+        if fcntl is None:
+            return True
+        self._lock_file = open(self.path + '.lock', 'w')
+        try:
+            fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            self._lock_file.close()
+            self._lock_file = None
+            return False
+
+    def start(self) -> bool:
+        """
+        Start the refresh loop, returning False if another worker owns it
+        """
+        if self._task is not None:
+            return True
+        if not self._acquire_scheduler_lock():
+            logger.info("Thread watcher schedule is owned by another worker")
+            return False
+        self._task = asyncio.create_task(self._run())
+        return True
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    async def _run(self, poll_interval: float = 30):
+        """
+        Refresh due watches one at a time, then sleep until the next is due
+        """
+        while True:
+            due = self._conn.execute(
+                "SELECT status_id FROM watches WHERE next_check_at <= ? ORDER BY next_check_at LIMIT 20",
+                (time.time(),)
+            ).fetchall()
+
+            for row in due:
+                try:
+                    await self.check(row['status_id'])
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.error(f"Watch refresh failed for {row['status_id']}: {str(e)}")
+
+            next_row = self._conn.execute("SELECT MIN(next_check_at) AS next_at FROM watches").fetchone()
+            wait = poll_interval
+            if next_row and next_row['next_at'] is not None:
+                wait = min(poll_interval, max(1.0, next_row['next_at'] - time.time()))
+            await asyncio.sleep(wait)
+
+def create_watcher_from_env(scraper, summarizer, publish: Callable) -> Optional[ThreadWatcher]:
+    """
+    Build the watcher from WATCH_DB_PATH / WATCH_INTERVAL_SECONDS / WATCH_JITTER
+    """
+    path = os.getenv('WATCH_DB_PATH', '.cache/watches.db')
+    if not path or not scraper or not summarizer:
+        return None
+
+    try:
+        return ThreadWatcher(
+            path,
+            scraper,
+            summarizer,
+            publish,
+            default_interval=float(os.getenv('WATCH_INTERVAL_SECONDS', 900)),
+            jitter=float(os.getenv('WATCH_JITTER', 0.2))
+        )
+    except Exception as e:
+        logger.error(f"Failed to open watch database at {path}: {str(e)}")
+        return None
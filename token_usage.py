@@ -0,0 +1,150 @@
+import logging
+import os
+from functools import lru_cache
+from typing import Dict, Iterable, Optional, Tuple
+
+from metrics import LLM_TOKENS, LLM_COST, LLM_CALLS
+
+logger = logging.getLogger(__name__)
+
+# USD per million (prompt, completion) tokens; override or extend with
+# MODEL_PRICES="model=prompt:completion,..."
+DEFAULT_PRICES = {
+    'gpt-3.5-turbo': (0.50, 1.50),
+    'mistral-tiny': (0.25, 0.25)
+}
+
+def parse_prices(value: Optional[str]) -> Dict[str, Tuple[float, float]]:
+    prices = dict(DEFAULT_PRICES)
+    for item in (value or '').split(','):
+        model, _, rates = item.partition('=')
+        prompt_rate, _, completion_rate = rates.partition(':')
+        try:
+            if model.strip():
+                prices[model.strip()] = (float(prompt_rate), float(completion_rate or prompt_rate))
+        except ValueError:
+            logger.warning(f"Ignoring invalid model price: {item}")
+    return prices
+
+@lru_cache(maxsize=None)
+def _encoding(model: str):
+    """
+    The model's tiktoken encoding, or None when tiktoken cannot provide one.
+
+    Loading an encoding reads (and on first use downloads) its BPE file, so
+    each model's is looked up once per process; a failure is remembered too
+    rather than retried on every call.
+    """
+    try:
+        import tiktoken
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding('cl100k_base')
+    except Exception as e:
+        # Not installed, or its encoding files cannot be fetched
+        logger.info(f"Estimating tokens by length for {model or 'unknown model'}: {str(e)}")
+        return None
+
+def preload_encodings(models: Iterable[str]):
+    """
+    Load the models' encodings ahead of the first estimate; blocking, so run it off the event loop
+    """
+    for model in models:
+        _encoding(model)
+
+def estimate_tokens(text: str, model: str = '') -> int:
+    """
+    Count tokens with tiktoken when it is installed, else ~4 characters per token
+    """
+    if not text:
+        return 0
+    encoding = _encoding(model)
+    if encoding is None:
+        return max(1, (len(text) + 3) // 4)
+    return len(encoding.encode(text))
+
+def usage_from_llm_output(llm_output: Optional[Dict[str, any]]) -> Optional[Tuple[int, int]]:
+    """
+    Extract (prompt, completion) tokens from a provider's llm_output, if reported
+    """
+    usage = (llm_output or {}).get('token_usage') or (llm_output or {}).get('usage')
+    if not usage:
+        return None
+    if not isinstance(usage, dict):
+        usage = getattr(usage, '__dict__', {})
+    prompt = usage.get('prompt_tokens', usage.get('input_tokens'))
+    completion = usage.get('completion_tokens', usage.get('output_tokens'))
+    if prompt is None or completion is None:
+        return None
+    return int(prompt), int(completion)
+
+class UsageLedger:
+    """
+    Token and cost totals per (provider, model) for this worker process
+    """
+    def __init__(self, prices: Optional[Dict[str, Tuple[float, float]]] = None):
+        self._prices = prices
+        self._totals: Dict[Tuple[str, str], Dict[str, float]] = {}
+
+    @property
+    def prices(self) -> Dict[str, Tuple[float, float]]:
+        # Read on first use so MODEL_PRICES from a .env file loaded after import applies
+        if self._prices is None:
+            self._prices = parse_prices(os.getenv('MODEL_PRICES'))
+        return self._prices
+
+    def cost(self, model: str, prompt_tokens: int, completion_tokens: int) -> float:
+        rates = self.prices.get(model)
+        if rates is None:
+            # Providers report dated snapshots such as gpt-3.5-turbo-0125
+            prefixes = [name for name in self.prices if model.startswith(name)]
+            rates = self.prices[max(prefixes, key=len)] if prefixes else (0.0, 0.0)
+        prompt_rate, completion_rate = rates
+        return (prompt_tokens * prompt_rate + completion_tokens * completion_rate) / 1_000_000
+
+    def record(self, provider: str, model: str, prompt_tokens: int, completion_tokens: int,
+               estimated: bool = False) -> Dict[str, any]:
+        """
+        Add one LLM call to the totals and return its usage record
+        """
+        cost = self.cost(model, prompt_tokens, completion_tokens)
+        totals = self._totals.setdefault((provider, model), {
+            'calls': 0, 'estimated_calls': 0, 'prompt_tokens': 0, 'completion_tokens': 0, 'cost_usd': 0.0
+        })
+        totals['calls'] += 1
+        totals['estimated_calls'] += 1 if estimated else 0
+        totals['prompt_tokens'] += prompt_tokens
+        totals['completion_tokens'] += completion_tokens
+        totals['cost_usd'] += cost
+
+        LLM_CALLS.inc(provider=provider, model=model, source='estimated' if estimated else 'reported')
+        LLM_TOKENS.inc(prompt_tokens, provider=provider, model=model, type='prompt')
+        LLM_TOKENS.inc(completion_tokens, provider=provider, model=model, type='completion')
+        LLM_COST.inc(cost, provider=provider, model=model)
+
+        return {
+            'provider': provider,
+            'model': model,
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': completion_tokens,
+            'total_tokens': prompt_tokens + completion_tokens,
+            'cost_usd': round(cost, 6),
+            'estimated': estimated
+        }
+
+    def snapshot(self) -> Dict[str, Dict[str, any]]:
+        """
+        Totals keyed by provider, then model
+        """
+        result: Dict[str, Dict[str, any]] = {}
+        for (provider, model), totals in sorted(self._totals.items()):
+            result.setdefault(provider, {})[model] = {
+                **totals,
+                'total_tokens': totals['prompt_tokens'] + totals['completion_tokens'],
+                'cost_usd': round(totals['cost_usd'], 6)
+            }
+        return result
+
+# Process-wide ledger fed by every summarizer
+USAGE = UsageLedger()
@@ -0,0 +1,110 @@
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+# Span currently active in this request's context. asyncio tasks and
+# asyncio.to_thread copy the context, so children attach to the right parent
+# even when work hops onto worker threads.
+_current_span: ContextVar[Optional['Span']] = ContextVar('current_span', default=None)
+
+class Span:
+    """
+    A timed unit of work within a request trace
+    """
+    __slots__ = ('name', 'trace_id', 'attributes', 'children', 'start', 'end', 'error')
+
+    def __init__(self, name: str, trace_id: str, attributes: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.trace_id = trace_id
+        self.attributes = attributes or {}
+        self.children: List['Span'] = []
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        self.error: Optional[str] = None
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end if self.end is not None else time.perf_counter()
+        return (end - self.start) * 1000
+
+    def finish(self):
+        if self.end is None:
+            self.end = time.perf_counter()
+
+    def walk(self, depth: int = 0):
+        """
+        Yield (depth, span) for this span and all descendants, depth first
+        """
+        yield depth, self
+        for child in self.children:
+            yield from child.walk(depth + 1)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {
+            'name': self.name,
+            'duration_ms': round(self.duration_ms, 2),
+        }
+        if self.attributes:
+            data['attributes'] = self.attributes
+        if self.error:
+            data['error'] = self.error
+        if self.children:
+            data['children'] = [child.to_dict() for child in self.children]
+        return data
+
+def start_trace(name: str, **attributes) -> Span:
+    """
+    Start a new root span and make it current for this context
+    """
+    root = Span(name, uuid.uuid4().hex, attributes)
+    _current_span.set(root)
+    return root
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    Record a child span of the current span for the enclosed block.
+
+    Outside a traced request (CLI usage, tests) the span is still timed but
+    is not attached anywhere, so callers never need to check for a trace.
+    """
+    parent = _current_span.get()
+    child = Span(name, parent.trace_id if parent else '', attributes)
+    if parent is not None:
+        parent.children.append(child)
+    token = _current_span.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.error = type(e).__name__
+        raise
+    finally:
+        child.finish()
+        _current_span.reset(token)
+
+def _server_timing_token(name: str) -> str:
+    return ''.join(c if c.isalnum() or c in '-_.' else '-' for c in name)
+
+def server_timing_header(root: Span) -> str:
+    """
+    Render a span tree as a Server-Timing header value.
+
+    Nested spans are flattened with dotted names (e.g. summarize.mistral.llm)
+    so the browser devtools timing panel shows the whole breakdown.
+    """
+    entries = []
+    path: List[str] = []
+    for depth, item in root.walk():
+        del path[depth:]
+        path.append(_server_timing_token(item.name))
+        name = 'total' if depth == 0 else '.'.join(path[1:])
+        entry = f"{name};dur={item.duration_ms:.1f}"
+        if item.error:
+            entry += f';desc="error: {item.error}"'
+        entries.append(entry)
+    return ', '.join(entries)
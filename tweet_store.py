@@ -0,0 +1,123 @@
+import hashlib
+import logging
+import sqlite3
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Tweet fields that make up its content; everything else (e.g. the position
+# label in 'timestamp') belongs to the thread referencing it
+CONTENT_FIELDS = ('author', 'text')
+
+def tweet_hash(tweet: Dict[str, any]) -> str:
+    """
+    Content address of a tweet: the same author and text always hash the same
+    """
+    content = '\0'.join(str(tweet.get(field, '')) for field in CONTENT_FIELDS)
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()[:32]
+
+class TweetStore:
+    """
+    Tweets stored once by content hash and shared by every thread containing them.
+
+    Thread data is packed into a list of tweet references, so quote-tweets,
+    reposted threads and overlapping scrapes of one conversation store each
+    tweet's text once. Every reference holds a count on its tweet; releasing
+    a thread drops its counts and tweets nobody references are deleted. The
+    caller owns the transaction, so packing a new value and releasing the one
+    it replaces commit together.
+    """
+    def __init__(self, connection: Callable[[], sqlite3.Connection]):
+        self._connection = connection
+        self._connection().execute("""
+            CREATE TABLE IF NOT EXISTS tweets (
+                hash TEXT PRIMARY KEY,
+                author TEXT NOT NULL,
+                text TEXT NOT NULL,
+                refcount INTEGER NOT NULL
+            )
+        """)
+
+    def pack(self, thread_data: Dict[str, any]) -> Dict[str, any]:
+        """
+        Store the thread's tweets and return the thread with references in their place
+        """
+        conn = self._connection()
+        tweets = thread_data.get('tweets') or []
+        refs = []
+        for tweet in tweets:
+            digest = tweet_hash(tweet)
+            conn.execute("""
+                INSERT INTO tweets (hash, author, text, refcount) VALUES (?, ?, ?, 1)
+                ON CONFLICT (hash) DO UPDATE SET refcount = refcount + 1
+            """, (digest, str(tweet.get('author', '')), str(tweet.get('text', ''))))
+            refs.append([digest, {key: value for key, value in tweet.items() if key not in CONTENT_FIELDS}])
+
+        packed = {key: value for key, value in thread_data.items() if key != 'tweets'}
+        packed['tweet_refs'] = refs
+        # full_text is the tweets joined, so rebuild it on read instead of storing it twice
+        if packed.get('full_text') == ' '.join(tweet.get('text', '') for tweet in tweets):
+            del packed['full_text']
+            packed['full_text_joined'] = True
+        return packed
+
+    def unpack(self, packed: Dict[str, any]) -> Optional[Dict[str, any]]:
+        """
+        Rebuild thread data from its references, or None if a tweet is missing
+        """
+        hashes = list({digest for digest, _ in packed['tweet_refs']})
+        rows = {}
+        # Stay under SQLite's bound-parameter limit for very long threads
+        for start in range(0, len(hashes), 500):
+            chunk = hashes[start:start + 500]
+            rows.update({
+                digest: (author, text) for digest, author, text in self._connection().execute(
+                    f"SELECT hash, author, text FROM tweets WHERE hash IN ({','.join('?' * len(chunk))})",
+                    chunk
+                )
+            })
+
+        tweets = []
+        for digest, extra in packed['tweet_refs']:
+            if digest not in rows:
+                logger.warning(f"Thread references missing tweet {digest}")
+                return None
+            author, text = rows[digest]
+            tweets.append({'text': text, 'author': author, **extra})
+
+        thread_data = {key: value for key, value in packed.items()
+                       if key not in ('tweet_refs', 'full_text_joined')}
+        thread_data['tweets'] = tweets
+        if packed.get('full_text_joined'):
+            thread_data['full_text'] = ' '.join(tweet['text'] for tweet in tweets)
+        return thread_data
+
+    def release(self, packed: Dict[str, any]):
+        """
+        Drop a packed thread's references, deleting tweets no longer referenced
+        """
+        hashes: List[str] = [digest for digest, _ in packed.get('tweet_refs', [])]
+        if not hashes:
+            return
+
+        conn = self._connection()
+        conn.executemany("UPDATE tweets SET refcount = refcount - 1 WHERE hash = ?", [(h,) for h in hashes])
+        conn.executemany("DELETE FROM tweets WHERE hash = ? AND refcount <= 0", [(h,) for h in set(hashes)])
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Distinct tweets stored, references to them, and text bytes deduplication saved
+        """
+        tweets, references, stored_bytes, referenced_bytes = self._connection().execute(
+            "SELECT COUNT(*), COALESCE(SUM(refcount), 0), COALESCE(SUM(LENGTH(text)), 0), "
+            "COALESCE(SUM(LENGTH(text) * refcount), 0) FROM tweets"
+        ).fetchone()
+        return {
+            'tweets': tweets,
+            'references': references,
+            'text_bytes': stored_bytes,
+            'text_bytes_saved': referenced_bytes - stored_bytes
+        }
+
+def is_packed(value) -> bool:
+    return isinstance(value, dict) and 'tweet_refs' in value
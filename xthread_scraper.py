@@ -1,35 +1,235 @@
 import asyncio
+import inspect
+import random
 import re
+from collections import deque
 from typing import List, Dict, Optional
 import os
 import logging
-import json
+from urllib.parse import urlsplit
+
+from metrics import STAGE_DURATION, SCRAPE_WAIT_SAVED, SCRAPE_WAIT_EXTRA, SCRAPE_ESCALATIONS
+from tracing import span
+from deadline import remaining_seconds
+from inflight import mark_stage
+from progress import report, SCRAPING
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever _extract_tweets_from_markdown changes output, so re-parsed
+# archive results can be told apart from the originals
+PARSER_VERSION = 1
+
+TWITTER_HOSTS = {'twitter.com', 'x.com', 'mobile.twitter.com', 'mobile.x.com'}
+
+# Page text shown in place of a thread that will not come back on retry,
+# checked near the top of the page where the main tweet would be
+UNAVAILABLE_MARKERS = {
+    'private': ['this account is private', 'these posts are protected', 'these tweets are protected'],
+    'deleted': [
+        "this page doesn't exist", 'this tweet was deleted', 'this post was deleted',
+        'this tweet is unavailable', 'this post is unavailable'
+    ],
+    'suspended': ['account suspended']
+}
+
+# Failure causes that say nothing about the thread itself and must not be
+# negatively cached: an empty page from a scrape the deadline cut short
+TRUNCATED_BY_DEADLINE = 'truncated_by_deadline'
+TRANSIENT_FAILURE_CAUSES = frozenset({TRUNCATED_BY_DEADLINE})
+
+# Page elements Firecrawl keeps and drops when converting a thread to markdown
+SCRAPE_INCLUDE_TAGS = [
+    'article',
+    'div[data-testid="tweetText"]',
+    'div[data-testid="tweet"]',
+    'div[data-testid="cellInnerDiv"]',
+    'span[data-testid="tweetText"]',
+    'time',
+    'div[role="article"]'
+]
+SCRAPE_EXCLUDE_TAGS = ['script', 'style', 'nav', 'footer', 'aside', 'header']
+
+# The fixed waitFor every scrape used before adaptive waits; savings are measured against it
+BASELINE_WAIT_MS = 3000
+
+# "3/" or "3/10" opening a tweet
+THREAD_MARKER = re.compile(r'\s*(\d{1,2})\s?/\s?(\d{1,2})?(?=\s|$)')
+
+def thread_looks_truncated(tweets: List[Dict[str, str]]) -> bool:
+    """
+    Check numbered-tweet markers for signs that the thread was cut short.
+
+    A thread is treated as truncated when markers skip a number (saw 3/ and
+    5/ but not 4/) or a declared total is never reached (saw 3/10 but no 10/).
+    Only a marker opening a tweet counts, so fractions, dates and "24/7" in
+    the text are not mistaken for numbering. Threads without numbering are
+    assumed complete.
+    """
+    numbers = set()
+    declared_total = 0
+
+    for tweet in tweets:
+        match = THREAD_MARKER.match(tweet.get('text', ''))
+        if not match:
+            continue
+        number = int(match.group(1))
+        total = int(match.group(2)) if match.group(2) else None
+        # "0/" or "24/7" is not a position in a thread
+        if number == 0 or (total is not None and not number <= total <= 50):
+            continue
+        numbers.add(number)
+        if total is not None:
+            declared_total = max(declared_total, total)
+
+    if not numbers:
+        return False
+
+    if declared_total > max(numbers):
+        return True
+
+    return len(numbers) < max(numbers) - min(numbers) + 1
+
+class ScrapePolicy:
+    """
+    Adaptive Firecrawl waitFor/timeout ladder learned from recent scrapes.
+
+    Each scrape starts at the shortest wait that recent threads of a similar
+    size needed to come back complete, and escalates one level at a time
+    only when the parsed thread looks truncated. A small share of scrapes
+    start at the shortest wait regardless, so the policy keeps discovering
+    when shorter waits suffice.
+    """
+    SIZE_BUCKETS = (1, 5, 15)
+
+    def __init__(self, wait_levels_ms: List[int] = (1000, 3000, 6000), timeout_padding_ms: int = 7000,
+                 history_size: int = 200, min_samples: int = 5, target_completion: float = 0.9,
+                 explore_rate: float = 0.1):
+        self.wait_levels_ms = sorted(wait_levels_ms)
+        self.timeout_padding_ms = timeout_padding_ms
+        self.min_samples = min_samples
+        self.target_completion = target_completion
+        self.explore_rate = explore_rate
+        # (size bucket, level at which the thread was complete)
+        self.history = deque(maxlen=history_size)
+
+    @property
+    def max_level(self) -> int:
+        return len(self.wait_levels_ms) - 1
+
+    def params(self, level: int) -> Dict[str, int]:
+        wait_ms = self.wait_levels_ms[level]
+        return {'waitFor': wait_ms, 'timeout': wait_ms + self.timeout_padding_ms}
+
+    def _bucket(self, tweet_count: int) -> int:
+        for index, limit in enumerate(self.SIZE_BUCKETS):
+            if tweet_count <= limit:
+                return index
+        return len(self.SIZE_BUCKETS)
+
+    def initial_level(self, expected_tweets: Optional[int] = None) -> int:
+        """
+        Pick the starting wait level, per size bucket when the size is known
+        """
+        if random.random() < self.explore_rate:
+            return 0
+
+        if expected_tweets is not None:
+            bucket = self._bucket(expected_tweets)
+            levels = [level for sample_bucket, level in self.history if sample_bucket == bucket]
+        else:
+            levels = [level for _, level in self.history]
+
+        if len(levels) < self.min_samples:
+            return 0
+
+        for candidate in range(self.max_level + 1):
+            covered = sum(1 for level in levels if level <= candidate)
+            if covered / len(levels) >= self.target_completion:
+                return candidate
+        return self.max_level
+
+    def record(self, level: int, tweet_count: int, complete: bool):
+        """
+        Remember the level a scrape needed; incomplete scrapes count as the top level
+        """
+        self.history.append((self._bucket(tweet_count), level if complete else self.max_level))
+
+def _policy_from_env() -> ScrapePolicy:
+    levels = os.getenv('SCRAPE_WAIT_LEVELS_MS', '1000,3000,6000')
+    return ScrapePolicy(wait_levels_ms=[int(level) for level in levels.split(',') if level.strip()])
+
+def canonicalize_thread_url(url: str) -> Optional[str]:
+    """
+    Map every Twitter/X URL variant of a status to one canonical URL.
+
+    twitter.com, x.com, www. and mobile. hosts, missing schemes, trailing
+    paths like /photo/1, and tracking params (?s=20, ?t=...) all collapse to
+    https://x.com/<user>/status/<id>. Returns None for non-status URLs.
+    """
+    url = (url or '').strip()
+    if not url:
+        return None
+    if '://' not in url:
+        url = 'https://' + url
 
-# Import firecrawl with try/except for different versions
-try:
-    from firecrawl_py import FirecrawlApp
-    print('Using firecrawl_py import')
-except ImportError:
     try:
-        from firecrawl import FirecrawlApp
-        print('Using firecrawl import')
+        parts = urlsplit(url)
+    except ValueError:
+        return None
+
+    host = (parts.hostname or '').lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    if parts.scheme not in ('http', 'https') or host not in TWITTER_HOSTS:
+        return None
+
+    match = re.match(r'^/(\w+)/status(?:es)?/(\d+)', parts.path)
+    if not match:
+        return None
+
+    return f"https://x.com/{match.group(1)}/status/{match.group(2)}"
+
+class _MockFirecrawlApp:
+    def __init__(self, api_key):
+        self.api_key = api_key
+    def scrape_url(self, url, params=None):
+        return {'markdown': 'Mock content for testing'}
+
+def _load_firecrawl_app():
+    """
+    Import the Firecrawl SDK on first use, trying the different package names.
+
+    Prefers the SDK's async client, whose requests are closed when the
+    awaiting task is cancelled; older SDKs only offer the blocking one.
+    """
+    try:
+        from firecrawl import AsyncFirecrawlApp
+        logger.info('Using firecrawl async client')
+        return AsyncFirecrawlApp
     except ImportError:
-        print('Using mock FirecrawlApp')
-        class FirecrawlApp:
-            def __init__(self, api_key):
-                self.api_key = api_key
-            def scrape_url(self, url, params=None):
-                return {'markdown': 'Mock content for testing'}
-
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
+        pass
+    try:
+        from firecrawl_py import FirecrawlApp
+        logger.info('Using firecrawl_py import')
+    except ImportError:
+        try:
+            from firecrawl import FirecrawlApp
+            logger.info('Using firecrawl import')
+        except ImportError:
+            logger.warning('Using mock FirecrawlApp')
+            FirecrawlApp = _MockFirecrawlApp
+    return FirecrawlApp
 
 class ThreadScraper:
-    def __init__(self):
+    def __init__(self, archive=None, policy: Optional[ScrapePolicy] = None):
         self.firecrawl_api_key = os.getenv('FIRECRAWL_API_KEY')
         if not self.firecrawl_api_key:
             raise ValueError("FIRECRAWL_API_KEY environment variable is required")
-        self.app = FirecrawlApp(api_key=self.firecrawl_api_key)
+        self.app = _load_firecrawl_app()(api_key=self.firecrawl_api_key)
+        # Optional ScrapeArchive that keeps every raw payload for re-parsing
+        self.archive = archive
+        self.policy = policy or _policy_from_env()
     
     def _validate_twitter_url(self, url: str) -> bool:
         """
@@ -48,74 +248,203 @@ class ThreadScraper:
         match = re.search(r'/status/(\d+)', url)
         return match.group(1) if match else None
     
-    async def scrape_thread(self, url: str) -> Dict[str, any]:
+    async def scrape_thread(self, url: str, expected_tweets: Optional[int] = None) -> Dict[str, any]:
         """
-        Scrape a Twitter thread using Firecrawl API
+        Scrape a Twitter thread using Firecrawl API.
+
+        Starts with the policy's learned waitFor and re-scrapes with a longer
+        wait only while the parsed thread looks truncated.
         """
+        # Whether the deadline shortened a wait or blocked an escalation
+        capped = False
         try:
             # Validate URL
-            if not self._validate_twitter_url(url):
+            with STAGE_DURATION.time(stage='validate'):
+                is_valid_url = self._validate_twitter_url(url)
+            if not is_valid_url:
                 raise ValueError("Invalid Twitter/X URL format")
             
-            logger.info(f"Scraping thread: {url}")
+            logger.info("Scraping thread: %s", url)
             
-            # Use Firecrawl to scrape the page
-            result = await asyncio.to_thread(
-                self.app.scrape_url,
-                url,
-                params={
-                    'formats': ['markdown', 'html'],
-                    'includeTags': [
-                        'article', 
-                        'div[data-testid="tweetText"]', 
-                        'div[data-testid="tweet"]',
-                        'div[data-testid="cellInnerDiv"]',
-                        'span[data-testid="tweetText"]',
-                        'time',
-                        'div[role="article"]'
-                    ],
-                    'excludeTags': ['script', 'style', 'nav', 'footer', 'aside', 'header'],
-                    'waitFor': 3000,  # Wait longer for dynamic content to load
-                    'timeout': 10000,  # Increase timeout for complex pages
-                    'onlyMainContent': True  # Focus on main content area
-                }
-            )
+            level = self.policy.initial_level(expected_tweets)
+            waited_ms = 0
+            best = None
             
-            if not result:
-                logger.error("Firecrawl returned empty result")
-                raise Exception("Failed to scrape content: Firecrawl returned empty result")
+            while True:
+                params = self.policy.params(level)
+                
+                # Never let Firecrawl run past the scrape stage's deadline budget
+                budget = remaining_seconds()
+                if budget is not None:
+                    requested = (params['timeout'], params['waitFor'])
+                    params['timeout'] = max(1, min(params['timeout'], int(budget * 1000)))
+                    params['waitFor'] = min(params['waitFor'], params['timeout'])
+                    capped = capped or (params['timeout'], params['waitFor']) != requested
                 
-            if 'markdown' not in result:
-                logger.error(f"Firecrawl result missing markdown content: {json.dumps(result)[:200]}")
-                raise Exception("Failed to scrape content: No markdown in response")
+                report(SCRAPING, wait_ms=params['waitFor'], retry=waited_ms > 0)
+                result = await self._fetch(url, params)
+                waited_ms += params['waitFor']
+                
+                if self.archive:
+                    await self._archive_payload(url, result)
+                
+                # Only escalate if the longer wait still fits in the deadline
+                can_escalate = level < self.policy.max_level
+                if can_escalate and budget is not None:
+                    next_wait_ms = self.policy.params(level + 1)['waitFor']
+                    can_escalate = remaining_seconds() * 1000 > next_wait_ms + 1000
+                    capped = capped or not can_escalate
+                
+                # Extract and process thread content
+                try:
+                    with span('parse'), STAGE_DURATION.time(stage='parse'):
+                        thread_data = self._process_scraped_content(result['markdown'], url)
+                except Exception:
+                    # Deleted/private threads will not improve with a longer wait
+                    if not can_escalate or self._detect_unavailable(result['markdown']):
+                        if best is None:
+                            raise
+                        break
+                    thread_data = None
+                
+                if thread_data and (best is None or thread_data['total_tweets'] > best['total_tweets']):
+                    best = thread_data
+                
+                complete = thread_data is not None and not thread_looks_truncated(thread_data['tweets'])
+                if complete or not can_escalate:
+                    break
+                
+                logger.info("Thread looks incomplete after waitFor=%dms, retrying with a longer wait", params['waitFor'])
+                SCRAPE_ESCALATIONS.inc(from_wait_ms=params['waitFor'])
+                level += 1
             
-            # Extract and process thread content
-            thread_data = self._process_scraped_content(result['markdown'], url)
+            self.policy.record(level, best['total_tweets'], complete)
+            # Counters only grow, so savings and escalation overruns are kept apart;
+            # the net saving is their difference
+            SCRAPE_WAIT_SAVED.inc(max(0, BASELINE_WAIT_MS - waited_ms) / 1000)
+            SCRAPE_WAIT_EXTRA.inc(max(0, waited_ms - BASELINE_WAIT_MS) / 1000)
             
             return {
                 'success': True,
-                'thread_data': thread_data,
+                'thread_data': best,
                 'original_url': url
             }
             
         except Exception as e:
-            logger.error(f"Error scraping thread {url}: {str(e)}")
+            logger.error("Error scraping thread %s: %s", url, e)
             return {
                 'success': False,
                 'error': str(e),
+                'failure_cause': self._classify_failure(e, capped),
                 'original_url': url
             }
     
+    def _classify_failure(self, error: Exception, capped: bool = False) -> Optional[str]:
+        """
+        Name the cause of a scrape failure that will not succeed on retry.
+
+        Returns None for transient failures (timeouts, API errors) so that
+        only known-bad threads are negatively cached. A page without tweets
+        from a scrape the deadline cut short (`capped`) is reported as
+        TRUNCATED_BY_DEADLINE, since a full-length scrape may well find them.
+        """
+        message = str(error)
+        if isinstance(error, ValueError) and 'URL format' in message:
+            return 'invalid_url'
+        for cause in UNAVAILABLE_MARKERS:
+            if f"Thread is unavailable ({cause})" in message:
+                return cause
+        if 'No tweets found' in message:
+            return TRUNCATED_BY_DEADLINE if capped else 'no_tweets'
+        return None
+    
+    def _detect_unavailable(self, markdown: str) -> Optional[str]:
+        """
+        Check the top of the page for a deleted/private/suspended notice
+        """
+        head = markdown[:600].lower()
+        for cause, markers in UNAVAILABLE_MARKERS.items():
+            if any(marker in head for marker in markers):
+                return cause
+        return None
+    
+    async def _fetch(self, url: str, wait_params: Dict[str, int]) -> Dict[str, any]:
+        """
+        Fetch the page through Firecrawl with the given waitFor/timeout.
+
+        With the async client, cancelling the caller closes the HTTP request.
+        The blocking client runs in a thread that cancellation cannot stop, so
+        its scrape finishes (and is billed) after the caller has gone; the
+        flight is marked 'scrape.blocking' meanwhile so abandoned runs say so.
+        """
+        with span('firecrawl', wait_ms=wait_params['waitFor']), STAGE_DURATION.time(stage='scrape'):
+            if inspect.iscoroutinefunction(self.app.scrape_url):
+                response = await self.app.scrape_url(
+                    url,
+                    formats=['markdown', 'html'],
+                    include_tags=SCRAPE_INCLUDE_TAGS,
+                    exclude_tags=SCRAPE_EXCLUDE_TAGS,
+                    wait_for=wait_params['waitFor'],  # Wait for dynamic content to load
+                    timeout=wait_params['timeout'],
+                    only_main_content=True  # Focus on main content area
+                )
+                # The SDK returns a pydantic document; unset formats are dropped
+                result = response.model_dump(exclude_none=True) if hasattr(response, 'model_dump') else response
+            else:
+                mark_stage('scrape.blocking')
+                try:
+                    result = await asyncio.to_thread(
+                        self.app.scrape_url,
+                        url,
+                        params={
+                            'formats': ['markdown', 'html'],
+                            'includeTags': SCRAPE_INCLUDE_TAGS,
+                            'excludeTags': SCRAPE_EXCLUDE_TAGS,
+                            'waitFor': wait_params['waitFor'],
+                            'timeout': wait_params['timeout'],
+                            'onlyMainContent': True
+                        }
+                    )
+                finally:
+                    mark_stage('scrape')
+        
+        if not result:
+            logger.error("Firecrawl returned empty result")
+            raise Exception("Failed to scrape content: Firecrawl returned empty result")
+            
+        if 'markdown' not in result:
+            # Log the payload's shape; serializing all of it just to truncate it is wasted work
+            fields = sorted(result)[:20] if isinstance(result, dict) else type(result).__name__
+            logger.error(f"Firecrawl result missing markdown content: {fields}")
+            raise Exception("Failed to scrape content: No markdown in response")
+        
+        return result
+    
+    async def _archive_payload(self, url: str, result: Dict[str, any]):
+        """
+        Append the raw Firecrawl payload to the archive, never failing the scrape
+        """
+        try:
+            payload = dict(result) if isinstance(result, dict) else {'markdown': result['markdown']}
+            await asyncio.to_thread(self.archive.append, self._extract_thread_id(url), url, payload)
+        except Exception as e:
+            logger.warning(f"Failed to archive scrape of {url}: {str(e)}")
+    
     def _process_scraped_content(self, markdown_content: str, url: str) -> Dict[str, any]:
         """
         Process the scraped markdown content to extract thread tweets
         """
         try:
+            unavailable_cause = self._detect_unavailable(markdown_content)
+            if unavailable_cause:
+                raise Exception(f"Thread is unavailable ({unavailable_cause})")
+            
             # Extract tweets from markdown content
             tweets = self._extract_tweets_from_markdown(markdown_content)
             
             if not tweets:
-                logger.warning(f"No tweets found in content. Raw content sample: {markdown_content[:200]}")
+                # %.200s truncates when the record is written, not on the request path
+                logger.warning("No tweets found in content. Raw content sample: %.200s", markdown_content)
                 raise Exception("No tweets found in the scraped content")
             
             # Get thread metadata
@@ -126,7 +455,8 @@ class ThreadScraper:
                 'tweets': tweets,
                 'total_tweets': len(tweets),
                 'full_text': ' '.join([tweet['text'] for tweet in tweets]),
-                'author': tweets[0].get('author', 'Unknown') if tweets else 'Unknown'
+                'author': tweets[0].get('author', 'Unknown') if tweets else 'Unknown',
+                'parser_version': PARSER_VERSION
             }
             
         except Exception as e: